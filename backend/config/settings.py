@@ -190,6 +190,36 @@ if _klaes_server and _klaes_db:
 else:
     KLAES_DB_CONNECTION_STRING = ''
 
+# ============================================
+# BI Engine — Persisted app data (tables, rollups)
+# ============================================
+BI_STORE_ROOT = Path(os.getenv('BI_STORE_ROOT', BASE_DIR / 'bi_store'))
+# Content-addressed cache of parsed files (LRU-evicted above this size)
+PARSE_CACHE_MAX_BYTES = int(os.getenv('PARSE_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+# Queue a Parquet copy of every source file read (completed uploads are always converted)
+COLUMNAR_AUTO_CONVERT = os.getenv('COLUMNAR_AUTO_CONVERT', 'True').lower() in ('true', '1', 'yes')
+# In-process LRU of loaded source frames (deep memory usage of the cached frames)
+FRAME_CACHE_MAX_BYTES = int(os.getenv('FRAME_CACHE_MAX_BYTES', 512 * 1024 ** 2))
+# Memory one request may use to load its sources (decoded size estimated before reading)
+LOAD_MEMORY_BUDGET_BYTES = int(os.getenv('LOAD_MEMORY_BUDGET_BYTES', 1024 ** 3))
+# Load scripts whose joins are estimated to produce more rows are refused
+JOIN_MAX_ROWS = int(os.getenv('JOIN_MAX_ROWS', 20_000_000))
+# Join results estimated above this size are written to disk in chunks (BI_STORE_ROOT/spill)
+SPILL_THRESHOLD_BYTES = int(os.getenv('SPILL_THRESHOLD_BYTES', 512 * 1024 ** 2))
+# SQL load scripts (DuckDB): scan threads and memory before spilling to disk
+SQL_ENGINE_THREADS = int(os.getenv('SQL_ENGINE_THREADS', os.cpu_count() or 1))
+SQL_ENGINE_MEMORY_LIMIT = os.getenv('SQL_ENGINE_MEMORY_LIMIT', '2GB')
+# Process pool for heavy ETL jobs (0 = run in the web worker) and per-job limits
+ETL_POOL_WORKERS = int(os.getenv('ETL_POOL_WORKERS', 2))
+ETL_JOB_CPU_SECONDS = int(os.getenv('ETL_JOB_CPU_SECONDS', 900))
+ETL_JOB_MEMORY_BYTES = int(os.getenv('ETL_JOB_MEMORY_BYTES', 4 * 1024 ** 3))
+# Work is offloaded above these sizes (source bytes / estimated join rows)
+ETL_OFFLOAD_MIN_BYTES = int(os.getenv('ETL_OFFLOAD_MIN_BYTES', 32 * 1024 ** 2))
+ETL_OFFLOAD_MIN_ROWS = int(os.getenv('ETL_OFFLOAD_MIN_ROWS', 1_000_000))
+# Line charts: points kept per series by visual downsampling ('lttb' or 'minmax')
+CHART_MAX_POINTS = int(os.getenv('CHART_MAX_POINTS', 500))
+CHART_DOWNSAMPLE_METHOD = os.getenv('CHART_DOWNSAMPLE_METHOD', 'lttb')
+
 # ============================================
 # File Upload — Big Data (Qlik QVD up to 1 GB)
 # ============================================
@@ -200,3 +230,6 @@ FILE_UPLOAD_MAX_MEMORY_SIZE = 1073741824      # 1 GB
 FILE_UPLOAD_HANDLERS = [
     'django.core.files.uploadhandler.TemporaryFileUploadHandler',
 ]
+
+# Resumable (tus) uploads are streamed to disk in chunks, so they may be larger
+RESUMABLE_UPLOAD_MAX_BYTES = int(os.getenv('RESUMABLE_UPLOAD_MAX_BYTES', 10 * 1024 ** 3))
@@ -0,0 +1,9 @@
+"""
+Benchmark suite of the file ETL services (qlik_parser, data_manager,
+query_engine) over deterministic synthetic ERP datasets.
+
+    python manage.py bench_etl --sizes 10k,100k --save-baseline
+    python manage.py bench_etl --sizes 10k,100k            ← compares with the baseline
+
+datasets.py generates the files, runner.py times the stages.
+"""
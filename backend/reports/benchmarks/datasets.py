@@ -0,0 +1,254 @@
+"""
+Deterministic synthetic ERP datasets for the ETL benchmarks.
+
+Two related tables with realistic cardinalities:
+
+  - ventas:   order lines — date, order number, customer (skewed: a few
+              customers buy most), article and family, warehouse, sales rep,
+              quantity, price, discount, amount and a mostly-empty free text
+              column with Spanish accents
+  - clientes: one row per customer — name, province, segment, sign-up date
+
+The same seed and row count always give the same data, in every format:
+
+  csv_utf8         UTF-8, ',' separator, '.' decimals, ISO dates
+  csv_utf8sig      UTF-8 with BOM, ';' separator, ',' decimals, dd/mm/yyyy
+  csv_cp1252       Windows-1252, ';' separator, ',' decimals, dd/mm/yyyy
+  csv_latin1_tab   Latin-1, tab separator, '.' decimals, ISO dates
+  xlsx             openpyxl write-only workbook (at most XLSX_MAX_ROWS rows)
+  qvd              Qlik QVD: symbol tables + bit-packed index table
+"""
+import struct
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+GENERATOR_VERSION = 1
+DEFAULT_SEED = 20240601
+WRITE_CHUNK_ROWS = 1_000_000
+XLSX_MAX_ROWS = 1_048_575  # Excel sheet limit minus the header row
+QLIK_EPOCH = pd.Timestamp('1899-12-30')
+
+CSV_VARIANTS = {
+    'csv_utf8': {'encoding': 'utf-8', 'sep': ',', 'decimal': '.', 'date_format': '%Y-%m-%d'},
+    'csv_utf8sig': {'encoding': 'utf-8-sig', 'sep': ';', 'decimal': ',', 'date_format': '%d/%m/%Y'},
+    'csv_cp1252': {'encoding': 'cp1252', 'sep': ';', 'decimal': ',', 'date_format': '%d/%m/%Y'},
+    'csv_latin1_tab': {'encoding': 'latin-1', 'sep': '\t', 'decimal': '.', 'date_format': '%Y-%m-%d'},
+}
+FORMATS = list(CSV_VARIANTS) + ['xlsx', 'qvd']
+EXTENSIONS = {**{name: '.csv' for name in CSV_VARIANTS}, 'xlsx': '.xlsx', 'qvd': '.qvd'}
+
+PROVINCIAS = [
+    'Madrid', 'Barcelona', 'Valencia', 'Sevilla', 'Málaga', 'Córdoba', 'Cádiz', 'Jaén',
+    'A Coruña', 'León', 'Ávila', 'Álava', 'Castellón', 'Guipúzcoa', 'Almería', 'Cáceres',
+]
+SEGMENTOS = ['Distribuidor', 'Instalador', 'Particular', 'Constructora', 'Administración']
+OBSERVACIONES = [
+    'Entrega urgente', 'Pedido telefónico', 'Revisar albarán', 'Cliente recogerá en almacén',
+    'Facturación a 60 días', 'Descuento aplicado por campaña', 'Pendiente de confirmación',
+]
+
+
+def parse_size(text):
+    """'10k' → 10_000, '1m' / '1M' → 1_000_000, '2500' → 2500."""
+    text = str(text).strip().lower()
+    factor = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if factor > 1 else text
+    try:
+        return int(float(number) * factor)
+    except ValueError:
+        raise ValueError(f'Tamaño no válido: "{text}" (usa p. ej. 10k, 1m)')
+
+
+def _cardinalities(rows):
+    return {
+        'clientes': int(np.clip(rows // 200, 100, 50_000)),
+        'articulos': int(np.clip(rows // 500, 50, 20_000)),
+        'familias': 25,
+        'almacenes': 12,
+        'comerciales': 40,
+    }
+
+
+# ── Tables ──
+
+def clientes(rows, seed=DEFAULT_SEED):
+    """Customer dimension of a `rows`-line ventas table."""
+    n = _cardinalities(rows)['clientes']
+    rng = np.random.default_rng([seed, 1])
+    return pd.DataFrame({
+        'cod_cliente': [f'C{i:06d}' for i in range(n)],
+        'nombre': [f'Cliente {i} S.L.' for i in range(n)],
+        'provincia': pd.Categorical.from_codes(rng.integers(0, len(PROVINCIAS), n), PROVINCIAS),
+        'segmento': pd.Categorical.from_codes(rng.integers(0, len(SEGMENTOS), n), SEGMENTOS),
+        'fecha_alta': pd.Timestamp('2010-01-01') + pd.to_timedelta(rng.integers(0, 5000, n), unit='D'),
+    })
+
+
+def ventas(rows, seed=DEFAULT_SEED):
+    """Order lines fact table; text columns are categoricals to keep generation compact."""
+    card = _cardinalities(rows)
+    rng = np.random.default_rng([seed, 0])
+
+    # Zipf-like popularity: a few customers / articles take most of the lines
+    cliente_weights = 1.0 / np.arange(1, card['clientes'] + 1) ** 0.8
+    articulo_weights = 1.0 / np.arange(1, card['articulos'] + 1) ** 0.6
+    cliente = rng.choice(card['clientes'], rows, p=cliente_weights / cliente_weights.sum())
+    articulo = rng.choice(card['articulos'], rows, p=articulo_weights / articulo_weights.sum())
+    familia_of = rng.integers(0, card['familias'], card['articulos'])
+
+    cantidad = rng.geometric(0.15, rows).clip(1, 500)
+    precio_of = np.round(rng.lognormal(3.0, 1.0, card['articulos']), 2)
+    descuento = rng.choice(np.array([0.0, 5.0, 10.0, 15.0]), rows, p=[0.6, 0.2, 0.15, 0.05])
+    precio = precio_of[articulo]
+    has_obs = rng.random(rows) < 0.1
+
+    return pd.DataFrame({
+        'fecha': pd.Timestamp('2022-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 1096, rows)), unit='D'),
+        'num_pedido': np.arange(rows) // 3 + 100_000,
+        'cod_cliente': pd.Categorical.from_codes(cliente, [f'C{i:06d}' for i in range(card['clientes'])]),
+        'cod_articulo': pd.Categorical.from_codes(articulo, [f'A{i:05d}' for i in range(card['articulos'])]),
+        'familia': pd.Categorical.from_codes(
+            familia_of[articulo], [f'Familia {i:02d}' for i in range(card['familias'])],
+        ),
+        'almacen': pd.Categorical.from_codes(
+            rng.integers(0, card['almacenes'], rows), [f'ALM{i:02d}' for i in range(card['almacenes'])],
+        ),
+        'comercial': pd.Categorical.from_codes(
+            rng.integers(0, card['comerciales'], rows), [f'Comercial {i:02d}' for i in range(card['comerciales'])],
+        ),
+        'cantidad': cantidad,
+        'precio': precio,
+        'descuento': descuento,
+        'importe': np.round(cantidad * precio * (1 - descuento / 100), 2),
+        'observaciones': pd.Categorical.from_codes(
+            np.where(has_obs, rng.integers(0, len(OBSERVACIONES), rows), -1), OBSERVACIONES,
+        ),
+    })
+
+
+TABLES = {'ventas': ventas, 'clientes': clientes}
+
+
+# ── Writers ──
+
+def write_csv(df, path, variant):
+    opts = CSV_VARIANTS[variant]
+    with open(path, 'w', encoding=opts['encoding'], newline='') as f:
+        for start in range(0, max(len(df), 1), WRITE_CHUNK_ROWS):
+            df.iloc[start:start + WRITE_CHUNK_ROWS].to_csv(
+                f, sep=opts['sep'], decimal=opts['decimal'], date_format=opts['date_format'],
+                index=False, header=start == 0,
+            )
+
+
+def write_xlsx(df, path):
+    from openpyxl import Workbook
+
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f'Excel admite como máximo {XLSX_MAX_ROWS:,} filas.')
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Datos')
+    ws.append(list(df.columns))
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        chunk = df.iloc[start:start + WRITE_CHUNK_ROWS].astype(object)
+        for row in chunk.where(chunk.notna(), None).itertuples(index=False, name=None):
+            ws.append(row)
+    wb.save(path)
+
+
+def _qvd_symbols(values):
+    """Symbol table bytes and QVD number format of a column's distinct values."""
+    if isinstance(values, pd.DatetimeIndex):
+        days = (values - QLIK_EPOCH).days.to_numpy()
+        texts = values.strftime('%Y-%m-%d')
+        return b''.join(
+            b'\x05' + struct.pack('<i', int(d)) + t.encode('utf-8') + b'\0' for d, t in zip(days, texts)
+        ), 'DATE'
+    if pd.api.types.is_integer_dtype(values) and (values.min() >= -2 ** 31 and values.max() < 2 ** 31):
+        table = np.empty(len(values), dtype=[('kind', 'u1'), ('value', '<i4')])
+        table['kind'], table['value'] = 1, values
+        return table.tobytes(), 'INTEGER'
+    if pd.api.types.is_numeric_dtype(values):
+        table = np.empty(len(values), dtype=[('kind', 'u1'), ('value', '<f8')])
+        table['kind'], table['value'] = 2, values.astype('float64')
+        return table.tobytes(), 'REAL'
+    return b''.join(b'\x04' + str(v).encode('utf-8') + b'\0' for v in values), 'UNKNOWN'
+
+
+def write_qvd(df, path, table='ventas'):
+    """QVD file readable by qvd_native: one symbol table per field + bit-packed records."""
+    n = len(df)
+    fields, blobs, codes_by_field = [], [], []
+    bit, offset = 0, 0
+    for col in df.columns:
+        codes, uniques = pd.factorize(df[col], sort=False)
+        has_nulls = bool((codes < 0).any())
+        bias = -2 if has_nulls else 0
+        stored = (codes - bias).astype('uint64') if has_nulls else codes.astype('uint64')
+        width = int(stored.max()).bit_length() if n and stored.max() > 0 else 0
+        blob, fmt = _qvd_symbols(uniques)
+        fields.append({
+            'name': col, 'bit_offset': bit, 'bit_width': width, 'bias': bias, 'format': fmt,
+            'symbols': len(uniques), 'offset': offset, 'length': len(blob),
+        })
+        blobs.append(blob)
+        codes_by_field.append(stored)
+        bit += width
+        offset += len(blob)
+
+    record_size = max((bit + 7) // 8, 1)
+    records = np.zeros((n, record_size), dtype='uint8')
+    for field, stored in zip(fields, codes_by_field):
+        if not field['bit_width']:
+            continue
+        shifted = stored << np.uint64(field['bit_offset'] % 8)
+        first = field['bit_offset'] // 8
+        last = (field['bit_offset'] + field['bit_width'] - 1) // 8
+        for k, b in enumerate(range(first, last + 1)):
+            records[:, b] |= ((shifted >> np.uint64(8 * k)) & np.uint64(0xFF)).astype('uint8')
+
+    headers = ''.join(
+        f'<QvdFieldHeader><FieldName>{f["name"]}</FieldName><BitOffset>{f["bit_offset"]}</BitOffset>'
+        f'<BitWidth>{f["bit_width"]}</BitWidth><Bias>{f["bias"]}</Bias>'
+        f'<NumberFormat><Type>{f["format"]}</Type><nDec>0</nDec></NumberFormat>'
+        f'<NoOfSymbols>{f["symbols"]}</NoOfSymbols><Offset>{f["offset"]}</Offset>'
+        f'<Length>{f["length"]}</Length></QvdFieldHeader>'
+        for f in fields
+    )
+    xml = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+        f'<QvdTableHeader><TableName>{table}</TableName><Fields>{headers}</Fields>'
+        f'<RecordByteSize>{record_size}</RecordByteSize><NoOfRecords>{n}</NoOfRecords>'
+        f'<Offset>{offset}</Offset><Length>{records.size}</Length></QvdTableHeader>\r\n'
+    )
+    with open(path, 'wb') as f:
+        f.write(xml.encode('utf-8') + b'\0')
+        for blob in blobs:
+            f.write(blob)
+        f.write(records.tobytes())
+
+
+def dataset_path(root, table, rows, fmt, seed=DEFAULT_SEED):
+    return Path(root) / f'{table}_{rows}_{fmt}_s{seed}_v{GENERATOR_VERSION}{EXTENSIONS[fmt]}'
+
+
+def ensure_dataset(root, table, rows, fmt, seed=DEFAULT_SEED, frame=None):
+    """Path of a generated dataset file, writing it first if it does not exist yet."""
+    path = dataset_path(root, table, rows, fmt, seed)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = frame if frame is not None else TABLES[table](rows, seed)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    if fmt in CSV_VARIANTS:
+        write_csv(df, tmp, fmt)
+    elif fmt == 'xlsx':
+        write_xlsx(df, tmp)
+    elif fmt == 'qvd':
+        write_qvd(df, tmp, table)
+    else:
+        raise ValueError(f'Formato de benchmark no soportado: "{fmt}"')
+    tmp.replace(path)
+    return path
@@ -0,0 +1,312 @@
+"""
+Stage timings and peak memory of the file ETL services, compared with a baseline.
+
+For every generated dataset (ventas × size × format) each stage runs
+`repeat` times; a run's time is wall-clock, its memory the peak RSS growth
+over the RSS at its start (sampled every SAMPLE_INTERVAL seconds from
+/proc/self/statm; None where that is not available). The median time and
+the largest peak are kept.
+
+  read           qlik_parser.read_file_to_dataframe   (cold: no caches, no Parquet copy)
+  classify       qlik_parser.classify_columns
+  charts         qlik_parser.generate_chart_data
+  summary        qlik_parser.generate_summary
+  preview        qlik_parser.generate_table_preview
+  process_file   qlik_parser.process_file               (whole pipeline, uncached)
+  serialize      DRF JSON rendering of the process_file payload
+  records        query_engine._df_to_records
+  convert        columnar_store.convert                  (needs pyarrow)
+  read_columnar  read_file_to_dataframe from the Parquet copy
+  load_script    data_manager: ventas ⋈ clientes load script over the files
+  joins          join_planner: plan + execute ventas ⋈ clientes on every generated row
+
+Every run starts from an empty BI store (parse cache, Parquet copies,
+dialects) and an empty frame cache, with background conversion and the ETL
+process pool disabled, so the numbers measure the code and not the caches.
+"""
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.test import override_settings
+
+from reports.benchmarks import datasets
+
+SAMPLE_INTERVAL = 0.005
+FILE_STAGES = (
+    'read', 'classify', 'charts', 'summary', 'preview', 'process_file',
+    'serialize', 'records', 'convert', 'read_columnar', 'load_script',
+)
+STAGES = FILE_STAGES + ('joins',)
+# Differences below these are noise, whatever the ratio
+MIN_SECONDS_DELTA = 0.005
+MIN_BYTES_DELTA = 8 * 1024 * 1024
+# Load scripts run as this pseudo-user, whose upload folder holds the datasets
+BENCH_USER = SimpleNamespace(pk='benchmark')
+
+
+def benchmarks_root():
+    return Path(settings.BI_STORE_ROOT) / 'benchmarks'
+
+
+# ── Measuring ──
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _PeakMemory:
+    """Peak RSS growth while the block runs, sampled from a background thread."""
+
+    def __enter__(self):
+        self.start = self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        if self.start is not None:
+            self._thread = threading.Thread(target=self._sample, daemon=True)
+            self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            self.peak = max(self.peak, _rss_bytes() or 0)
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.start is not None:
+            self._thread.join()
+            self.peak = max(self.peak, _rss_bytes() or 0)
+
+    @property
+    def growth(self):
+        return None if self.start is None else self.peak - self.start
+
+
+def measure(func, repeat, setup=None):
+    """Run `func()` `repeat` times (after `setup()`); returns (stats, last result)."""
+    seconds, peaks, result = [], [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        result = None
+        with _PeakMemory() as memory:
+            start = time.perf_counter()
+            result = func()
+            seconds.append(time.perf_counter() - start)
+        peaks.append(memory.growth)
+    known = [p for p in peaks if p is not None]
+    return {
+        'seconds': statistics.median(seconds),
+        'min_seconds': min(seconds),
+        'peak_bytes': max(known) if known else None,
+        'runs': len(seconds),
+    }, result
+
+
+# ── Suite ──
+
+class _Store:
+    """Throwaway BI store: every run starts without caches."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def reset(self):
+        from reports.services.frame_cache import get_cache
+
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.root.mkdir(parents=True)
+        get_cache().clear()
+
+
+def _load_script(rows, fmt, seed):
+    return {
+        'sources': [
+            {'source_id': 1, 'path': datasets.dataset_path('', 'ventas', rows, fmt, seed).name},
+            {'source_id': 2, 'path': datasets.dataset_path('', 'clientes', rows, fmt, seed).name},
+        ],
+        'joins': [{
+            'left_source': 1, 'right_source': 2,
+            'left_key': 'cod_cliente', 'right_key': 'cod_cliente', 'how': 'left',
+        }],
+    }
+
+
+def _file_stages(path, rows, fmt, seed, stages, repeat, store, report):
+    from rest_framework.renderers import JSONRenderer
+
+    from reports.services import columnar_store, qlik_parser, query_engine
+
+    def run(stage, func, setup=None):
+        if stage not in stages:
+            return None
+        stats, result = measure(func, repeat, setup)
+        report(stage, stats)
+        return result
+
+    df = run('read', lambda: qlik_parser.read_file_to_dataframe(str(path)), store.reset)
+    if df is None and stages & {'classify', 'charts', 'summary', 'preview', 'records'}:
+        store.reset()
+        df = qlik_parser.read_file_to_dataframe(str(path))
+    if df is not None:
+        info = run('classify', lambda: qlik_parser.classify_columns(df)) or qlik_parser.classify_columns(df)
+        run('charts', lambda: qlik_parser.generate_chart_data(df, info))
+        run('summary', lambda: qlik_parser.generate_summary(df))
+        run('preview', lambda: qlik_parser.generate_table_preview(df))
+        run('records', lambda: query_engine._df_to_records(df))
+
+    result = run('process_file', lambda: qlik_parser.process_file(str(path), use_cache=False), store.reset)
+    if 'serialize' in stages:
+        if result is None:
+            store.reset()
+            result = qlik_parser.process_file(str(path), use_cache=False)
+        run('serialize', lambda: JSONRenderer().render(result[0]))
+
+    if stages & {'convert', 'read_columnar'}:
+        if columnar_store.is_available():
+            run('convert', lambda: columnar_store.convert(str(path)), store.reset)
+
+            def ensure_converted():
+                if not columnar_store.columnar_path(str(path)).exists():
+                    columnar_store.convert(str(path))
+
+            run('read_columnar', lambda: qlik_parser.read_file_to_dataframe(str(path)), ensure_converted)
+        else:
+            for stage in stages & {'convert', 'read_columnar'}:
+                report(stage, None, 'pyarrow no instalado')
+
+    if 'load_script' in stages:
+        from reports.services.data_manager import QlikEngine
+
+        config = type('Config', (), {'load_script_json': _load_script(rows, fmt, seed)})()
+        run('load_script', lambda: QlikEngine.execute_load_script(config, BENCH_USER), store.reset)
+
+
+def run_suite(sizes, formats, stages=STAGES, repeat=3, seed=datasets.DEFAULT_SEED, report=None):
+    """
+    Generate the datasets (once, kept under BI_STORE_ROOT/benchmarks/data as
+    the uploads of BENCH_USER) and measure `stages` on each.
+    `report(key, stats, skipped_reason)` is called after every stage.
+    Returns {'meta': {...}, 'results': {key: stats}}.
+    """
+    from reports.services.uploads import user_root
+
+    root = benchmarks_root()
+    root.mkdir(parents=True, exist_ok=True)
+    work = Path(tempfile.mkdtemp(prefix='run_', dir=root))
+    store = _Store(work / 'store')
+    stages = set(stages)
+    results = {}
+
+    def reporter(prefix):
+        def report_stage(stage, stats, skipped=None):
+            key = f'{prefix}/{stage}'
+            results[key] = stats if stats is not None else {'skipped': skipped}
+            if report:
+                report(key, stats, skipped)
+        return report_stage
+
+    overrides = {
+        'BI_STORE_ROOT': store.root, 'MEDIA_ROOT': root / 'data',
+        'COLUMNAR_AUTO_CONVERT': False, 'ETL_POOL_WORKERS': 0,
+    }
+    try:
+        with override_settings(**overrides):
+            data_root = user_root(BENCH_USER)
+            for rows in sizes:
+                ventas = datasets.ventas(rows, seed)
+                clientes = datasets.clientes(rows, seed)
+                for fmt in formats:
+                    if fmt == 'xlsx' and rows > datasets.XLSX_MAX_ROWS:
+                        reporter(f'ventas/{rows}/{fmt}')('read', None, 'Excel no admite tantas filas')
+                        continue
+                    path = datasets.ensure_dataset(data_root, 'ventas', rows, fmt, seed, frame=ventas)
+                    datasets.ensure_dataset(data_root, 'clientes', rows, fmt, seed, frame=clientes)
+                    _file_stages(path, rows, fmt, seed, stages, repeat, store, reporter(f'ventas/{rows}/{fmt}'))
+
+                if 'joins' in stages:
+                    from reports.services.join_planner import execute_plan, plan_joins
+
+                    frames = {1: ventas, 2: clientes}
+                    joins = _load_script(rows, 'csv_utf8', seed)['joins']
+                    stats, _ = measure(lambda: execute_plan(plan_joins(joins, frames), frames), repeat)
+                    reporter(f'ventas+clientes/{rows}/memory')('joins', stats)
+                del ventas, clientes
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    return {'meta': environment(seed, repeat), 'results': results}
+
+
+def environment(seed, repeat):
+    import django
+    versions = {'python': platform.python_version(), 'django': django.get_version(),
+                'pandas': pd.__version__, 'numpy': np.__version__}
+    for module in ('pyarrow', 'duckdb'):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'versions': versions,
+        'seed': seed,
+        'repeat': repeat,
+        'generator_version': datasets.GENERATOR_VERSION,
+    }
+
+
+# ── Baselines ──
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def compare(current, baseline, tolerance=0.2):
+    """
+    Per-stage comparison with a baseline run: {key: {'time_ratio',
+    'memory_ratio', 'regression': [...]}}. A regression is a stage more than
+    `tolerance` slower (or hungrier) than the baseline, beyond noise.
+    """
+    comparison = {}
+    for key, stats in current['results'].items():
+        base = baseline.get('results', {}).get(key)
+        if not base or 'seconds' not in stats or 'seconds' not in base:
+            continue
+        entry = {'time_ratio': stats['seconds'] / base['seconds'] if base['seconds'] else None,
+                 'memory_ratio': None, 'regression': []}
+        if (stats['seconds'] > base['seconds'] * (1 + tolerance)
+                and stats['seconds'] - base['seconds'] > MIN_SECONDS_DELTA):
+            entry['regression'].append('time')
+        if stats['peak_bytes'] is not None and base.get('peak_bytes'):
+            entry['memory_ratio'] = stats['peak_bytes'] / base['peak_bytes']
+            if (stats['peak_bytes'] > base['peak_bytes'] * (1 + tolerance)
+                    and stats['peak_bytes'] - base['peak_bytes'] > MIN_BYTES_DELTA):
+                entry['regression'].append('memory')
+        comparison[key] = entry
+    return comparison
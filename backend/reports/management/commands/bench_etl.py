@@ -0,0 +1,88 @@
+"""
+Benchmark the file ETL services over synthetic ERP datasets.
+Usage: python manage.py bench_etl [--sizes 10k,100k,1m] [--formats csv_utf8,qvd] [--save-baseline]
+
+Results are written to BI_STORE_ROOT/benchmarks/results/ and compared with
+the baseline (BI_STORE_ROOT/benchmarks/baseline.json by default) if there is one.
+"""
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from reports.benchmarks import datasets, runner
+
+
+def _csv_option(value, allowed, name):
+    items = [v.strip() for v in value.split(',') if v.strip()]
+    unknown = [v for v in items if v not in allowed]
+    if unknown:
+        raise CommandError(f'{name} desconocido(s): {", ".join(unknown)}. Opciones: {", ".join(allowed)}')
+    return items
+
+
+class Command(BaseCommand):
+    help = 'Mide los tiempos y la memoria de cada etapa del ETL de archivos con datos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='10k,100k', help='Filas de ventas, p. ej. 10k,100k,1m,10m (default: 10k,100k)')
+        parser.add_argument('--formats', default=','.join(datasets.FORMATS), help='Formatos (default: todos)')
+        parser.add_argument('--stages', default=','.join(runner.STAGES), help='Etapas (default: todas)')
+        parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por etapa (default: 3)')
+        parser.add_argument('--seed', type=int, default=datasets.DEFAULT_SEED, help='Semilla del generador')
+        parser.add_argument('--baseline', default=None, help='Archivo de referencia (default: benchmarks/baseline.json)')
+        parser.add_argument('--save-baseline', action='store_true', help='Guarda esta ejecución como referencia')
+        parser.add_argument('--tolerance', type=float, default=0.2, help='Empeoramiento tolerado (default: 0.2 = 20%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Termina con error si hay regresiones')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [datasets.parse_size(s) for s in options['sizes'].split(',') if s.strip()]
+        except ValueError as e:
+            raise CommandError(str(e))
+        formats = _csv_option(options['formats'], datasets.FORMATS, 'Formato')
+        stages = _csv_option(options['stages'], runner.STAGES, 'Etapa')
+        if options['repeat'] < 1:
+            raise CommandError('--repeat debe ser al menos 1.')
+
+        root = runner.benchmarks_root()
+        baseline_path = Path(options['baseline']) if options['baseline'] else root / 'baseline.json'
+        baseline = runner.load_results(baseline_path) if baseline_path.exists() else None
+
+        self.stdout.write(f'{"Etapa":<44} {"Mediana":>10} {"Pico RSS":>10} {"vs. ref.":>10}')
+
+        def report(key, stats, skipped):
+            if stats is None:
+                self.stdout.write(self.style.WARNING(f'{key:<44} omitida: {skipped}'))
+                return
+            peak = '—' if stats['peak_bytes'] is None else f'{stats["peak_bytes"] / 1024 ** 2:.1f} MB'
+            base = (baseline or {}).get('results', {}).get(key, {})
+            delta = f'{(stats["seconds"] / base["seconds"] - 1) * 100:+.0f}%' if base.get('seconds') else ''
+            self.stdout.write(f'{key:<44} {stats["seconds"] * 1000:>8.1f}ms {peak:>10} {delta:>10}')
+
+        results = runner.run_suite(
+            sizes, formats, stages=stages, repeat=options['repeat'], seed=options['seed'], report=report,
+        )
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = runner.save_results(results, root / 'results' / f'bench_{stamp}.json')
+        self.stdout.write(f'Resultados: {output}')
+
+        if options['save_baseline']:
+            runner.save_results(results, baseline_path)
+            self.stdout.write(self.style.SUCCESS(f'✅ Referencia guardada: {baseline_path}'))
+            return
+        if baseline is None:
+            self.stdout.write('Sin referencia: usa --save-baseline para guardar esta ejecución.')
+            return
+
+        regressions = {
+            key: entry for key, entry in runner.compare(results, baseline, options['tolerance']).items()
+            if entry['regression']
+        }
+        for key, entry in regressions.items():
+            ratios = [f'{kind} x{entry[f"{kind}_ratio"]:.2f}' for kind in ('time', 'memory') if kind in entry['regression']]
+            self.stdout.write(self.style.ERROR(f'Regresión en {key}: {", ".join(ratios)}'))
+        if not regressions:
+            self.stdout.write(self.style.SUCCESS('✅ Sin regresiones respecto a la referencia.'))
+        elif options['fail_on_regression']:
+            raise CommandError(f'{len(regressions)} etapa(s) empeoran más de un {options["tolerance"]:.0%}.')
@@ -5,7 +5,10 @@ DBConnection:    Global reusable database connections
 ReportApp:       The BI application container (≈ Qlik .qvf)
 AppLoadScript:   N load scripts per app, each hitting a different DB
 ReportSheet:     N visualization sheets per app
+UploadSession:   Resumable (tus-style) chunked upload of a large data file
 """
+import uuid
+
 from django.conf import settings
 from django.db import models
 
@@ -111,3 +114,38 @@ class ReportSheet(models.Model):
 
     def __str__(self):
         return f'{self.title} (App: {self.app.name})'
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload: chunks are appended straight to `file` at `offset`.
+    sha256 is the content hash, complete once offset == size.
+    dialect / profile are computed from the first chunks, before the end.
+    """
+    STATUS_CHOICES = [
+        ('uploading', 'Subiendo'),
+        ('complete', 'Completa'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    file = models.FileField(max_length=500)
+    size = models.BigIntegerField()
+    offset = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    sha256 = models.CharField(max_length=64, blank=True, default='')
+    dialect = models.JSONField(null=True, blank=True)
+    profile = models.JSONField(null=True, blank=True)
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+        related_name='upload_sessions',
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.filename} ({self.offset}/{self.size})'
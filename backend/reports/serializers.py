@@ -3,7 +3,7 @@ Reports BI Serializers — Nested App Container pattern.
 ReportApp nests its AppLoadScript[] and ReportSheet[].
 """
 from rest_framework import serializers
-from .models import DBConnection, ReportApp, AppLoadScript, ReportSheet
+from .models import DBConnection, ReportApp, AppLoadScript, ReportSheet, UploadSession
 
 
 # ── DBConnection ──
@@ -79,3 +79,17 @@ class ReportAppCreateSerializer(serializers.ModelSerializer):
         model = ReportApp
         fields = ['id', 'name', 'description']
         read_only_fields = ['id']
+
+
+# ── UploadSession ──
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    path = serializers.CharField(source='file.name', read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'filename', 'path', 'size', 'offset', 'status',
+            'sha256', 'dialect', 'profile', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
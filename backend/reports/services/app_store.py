@@ -0,0 +1,124 @@
+"""
+[AGENTE_DATA_ENGINEER] — AppStore: persisted data model of each ReportApp.
+
+Every reload writes the FULL result of each AppLoadScript to disk, so sheets
+can be served from the stored data instead of the 500-row preview that goes
+to the browser. Layout per app:
+
+    BI_STORE_ROOT/app_<id>/
+        manifest.json          ← { table_name: {file, row_count, columns, version, loaded_at} }
+        tables/<slug>.pkl      ← full DataFrame of the script
+        rollups/               ← pre-aggregated cubes (see rollups.py)
+        indexes/<slug>.pkl     ← distinct-value index per field (see field_index.py)
+
+`version` changes on every reload of a table; derived artifacts (rollups,
+indexes) record the version they were built from and are stale otherwise.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def app_dir(app_id):
+    """Root directory of an app's persisted data."""
+    return Path(settings.BI_STORE_ROOT) / f'app_{int(app_id)}'
+
+
+def table_slug(name):
+    """Filesystem-safe, collision-free file stem for a table name."""
+    base = re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_')[:40] or 'table'
+    digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:10]
+    return f'{base}_{digest}'
+
+
+def read_json(path, default=None):
+    """Read a JSON file, returning `default` if it does not exist or is corrupt."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return default
+
+
+def write_json(path, data):
+    """Atomically write a JSON file (tmp + rename)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+
+def read_manifest(app_id):
+    """Return { table_name: info } for all stored tables of an app."""
+    return read_json(app_dir(app_id) / MANIFEST_NAME, default={})
+
+
+def save_table(app_id, name, df):
+    """Persist the full DataFrame of a load script and register it in the manifest."""
+    root = app_dir(app_id)
+    tables_dir = root / 'tables'
+    tables_dir.mkdir(parents=True, exist_ok=True)
+
+    filename = f'{table_slug(name)}.pkl'
+    tmp = tables_dir / f'{filename}.{uuid.uuid4().hex}.tmp'
+    df.to_pickle(tmp)
+    os.replace(tmp, tables_dir / filename)
+
+    manifest = read_manifest(app_id)
+    manifest[name] = {
+        'file': filename,
+        'row_count': len(df),
+        'columns': [str(c) for c in df.columns],
+        'version': uuid.uuid4().hex,
+        'loaded_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    write_json(root / MANIFEST_NAME, manifest)
+    logger.info(f'[APP_STORE] App {app_id}: stored "{name}" ({len(df)} rows)')
+    return manifest[name]
+
+
+def table_info(app_id, name):
+    """Manifest entry of a stored table, or None if it was never loaded."""
+    return read_manifest(app_id).get(name)
+
+
+def load_table(app_id, name):
+    """Load a stored table. Raises ValueError if the app has not loaded it."""
+    info = table_info(app_id, name)
+    if info is None:
+        raise ValueError(f'La tabla "{name}" no está cargada. Ejecuta la carga de la app primero.')
+    return pd.read_pickle(app_dir(app_id) / 'tables' / info['file'])
+
+
+def prune_tables(app_id, keep):
+    """Drop stored tables whose script no longer exists (renamed or deleted)."""
+    manifest = read_manifest(app_id)
+    stale = [name for name in manifest if name not in keep]
+    for name in stale:
+        (app_dir(app_id) / 'tables' / manifest.pop(name)['file']).unlink(missing_ok=True)
+        (app_dir(app_id) / 'indexes' / f'{table_slug(name)}.pkl').unlink(missing_ok=True)
+        (app_dir(app_id) / 'profiles' / f'{table_slug(name)}.json').unlink(missing_ok=True)
+    if stale:
+        write_json(app_dir(app_id) / MANIFEST_NAME, manifest)
+        logger.info(f'[APP_STORE] App {app_id}: pruned {len(stale)} stale tables')
+    return stale
+
+
+def drop_app(app_id):
+    """Remove all persisted data of an app."""
+    shutil.rmtree(app_dir(app_id), ignore_errors=True)
@@ -0,0 +1,118 @@
+"""
+[AGENTE_DATA_ENGINEER] — ChunkedAggregates: mergeable partial aggregates.
+
+Out-of-core building block for process_file(): a file is read in chunks and
+every chunk is folded into a PartialAggregates. Partials are mergeable
+(a + b), so the result is identical to aggregating the whole file at once
+while memory depends on the number of distinct categories / days, never on
+the number of rows.
+
+Tracked per file:
+  - group_sums:   { cat_col: DataFrame[num_cols] }  sums by category
+  - value_counts: { cat_col: Series }                 rows per category
+  - num_stats:    DataFrame[count, sum, min, max]     per numeric column
+  - time_buckets: DataFrame[num_cols]                 daily sums of the datetime column
+"""
+import pandas as pd
+
+
+class PartialAggregates:
+    """Aggregates of a slice of a file; merge() folds two slices together."""
+
+    def __init__(self, cat_cols, num_cols, dt_col=None, count_cols=None, trend_cols=None, dt_format=None):
+        self.cat_cols = list(cat_cols)
+        self.num_cols = list(num_cols)
+        self.dt_col = dt_col
+        self.dt_format = dt_format
+        self.count_cols = list(count_cols if count_cols is not None else cat_cols)
+        self.trend_cols = list(trend_cols if trend_cols is not None else num_cols)
+
+        self.rows = 0
+        self.dated_rows = 0
+        self.memory_bytes = 0
+        self.group_sums = {}
+        self.value_counts = {}
+        self.num_stats = None
+        self.time_buckets = None
+
+    def _coerce_numeric(self, chunk):
+        """A column classified numeric on the first chunk may hold junk later on."""
+        for col in self.num_cols:
+            if col in chunk.columns and not pd.api.types.is_numeric_dtype(chunk[col]):
+                chunk[col] = pd.to_numeric(chunk[col], errors='coerce')
+        return chunk
+
+    def update(self, chunk):
+        """Fold one chunk into the partial."""
+        chunk = self._coerce_numeric(chunk)
+        self.rows += len(chunk)
+        self.memory_bytes += int(chunk.memory_usage(deep=True).sum())
+
+        for cat in self.cat_cols:
+            part = chunk.groupby(cat, observed=True)[self.num_cols].sum() if self.num_cols else None
+            if part is not None:
+                prev = self.group_sums.get(cat)
+                self.group_sums[cat] = part if prev is None else prev.add(part, fill_value=0)
+
+        for cat in self.count_cols:
+            part = chunk[cat].value_counts()
+            prev = self.value_counts.get(cat)
+            self.value_counts[cat] = part if prev is None else prev.add(part, fill_value=0)
+
+        if self.num_cols:
+            nums = chunk[self.num_cols]
+            stats = pd.DataFrame({
+                'count': nums.count(),
+                'sum': nums.sum(),
+                'min': nums.min(),
+                'max': nums.max(),
+            })
+            self.num_stats = stats if self.num_stats is None else _merge_stats(self.num_stats, stats)
+
+        if self.dt_col and self.trend_cols:
+            dates = pd.to_datetime(chunk[self.dt_col], format=self.dt_format, errors='coerce')
+            valid = dates.notna()
+            self.dated_rows += int(valid.sum())
+            if valid.any():
+                part = chunk.loc[valid, self.trend_cols].groupby(dates[valid].dt.floor('D')).sum()
+                self.time_buckets = part if self.time_buckets is None else self.time_buckets.add(part, fill_value=0)
+        return self
+
+    def merge(self, other):
+        """Fold another partial (same columns) into this one."""
+        self.rows += other.rows
+        self.dated_rows += other.dated_rows
+        self.memory_bytes += other.memory_bytes
+        for cat, part in other.group_sums.items():
+            prev = self.group_sums.get(cat)
+            self.group_sums[cat] = part if prev is None else prev.add(part, fill_value=0)
+        for cat, part in other.value_counts.items():
+            prev = self.value_counts.get(cat)
+            self.value_counts[cat] = part if prev is None else prev.add(part, fill_value=0)
+        if other.num_stats is not None:
+            self.num_stats = other.num_stats if self.num_stats is None else _merge_stats(self.num_stats, other.num_stats)
+        if other.time_buckets is not None:
+            self.time_buckets = (
+                other.time_buckets if self.time_buckets is None
+                else self.time_buckets.add(other.time_buckets, fill_value=0)
+            )
+        return self
+
+    def numeric_summary(self, col):
+        """{mean, sum, min, max} of a numeric column over everything folded so far."""
+        s = self.num_stats.loc[col]
+        return {
+            'mean': round(float(s['sum'] / s['count']), 2) if s['count'] else None,
+            'sum': round(float(s['sum']), 2),
+            'min': round(float(s['min']), 2) if pd.notna(s['min']) else None,
+            'max': round(float(s['max']), 2) if pd.notna(s['max']) else None,
+        }
+
+
+def _merge_stats(a, b):
+    return pd.DataFrame({
+        'count': a['count'].add(b['count'], fill_value=0),
+        'sum': a['sum'].add(b['sum'], fill_value=0),
+        'min': pd.concat([a['min'], b['min']], axis=1).min(axis=1),
+        'max': pd.concat([a['max'], b['max']], axis=1).max(axis=1),
+    })
@@ -0,0 +1,337 @@
+"""
+[AGENTE_DATA_ENGINEER] — ColumnarStore: typed Parquet copy of every source file.
+
+Text formats (CSV, XLSX) and QVD are parsed from scratch on every read. Each
+file is converted ONCE, in a background thread, into a compressed, typed
+Parquet file: completed uploads always (see uploads.py), any other source
+the first time it is read while COLUMNAR_AUTO_CONVERT is on.
+
+    BI_STORE_ROOT/columnar/<content digest>.parquet   ← zstd, row groups of ROW_GROUP_ROWS
+    BI_STORE_ROOT/columnar/<content digest>.json      ← per-column stats (type, nulls, min, max)
+
+From then on readers go to the Parquet copy: only the requested columns and
+only the row groups needed for `nrows` are read, so a repeated load is an
+I/O-bound columnar read instead of a text parse. CSVs and QVDs are converted
+chunk by chunk, so conversion memory does not grow with the file size; Excel
+workbooks are read whole and skipped when they would not fit
+LOAD_MEMORY_BUDGET_BYTES.
+
+Parquet needs text column names and one type per column, so names are
+stored as text and mixed-type columns as text values (also when the mix only
+shows up in a later chunk: the part already written is rewritten with the
+wider type); the original names and dtypes are kept in the schema metadata
+and restored on every read.
+
+Keyed by content (see parse_cache.file_digest): identical uploads share one
+copy and a changed file never reads a stale one. pyarrow is imported lazily;
+without it conversion is skipped and readers keep parsing the original.
+"""
+import json
+import logging
+import os
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+
+from reports.services.app_store import read_json, write_json
+from reports.services.parse_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+SOURCE_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.qvd')
+ROW_GROUP_ROWS = 128_000
+CHUNK_ROWS = 256_000
+COMPRESSION = 'zstd'
+COLUMNS_META_KEY = b'bi_columns'
+# Peak memory of reading a workbook / its uncompressed sheet XML
+EXCEL_PARSE_OVERHEAD = 3.0
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='columnar')
+_in_flight = set()
+_lock = threading.Lock()
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        return pa, pq
+    except ImportError:
+        raise ImportError('Librería "pyarrow" no instalada. Ejecuta: pip install pyarrow')
+
+
+def is_available():
+    try:
+        _arrow()
+        return True
+    except ImportError:
+        return False
+
+
+def _root():
+    return Path(settings.BI_STORE_ROOT) / 'columnar'
+
+
+def columnar_path(filepath):
+    return _root() / f'{file_digest(filepath)}.parquet'
+
+
+def _stats_path(parquet_path):
+    return parquet_path.with_suffix('.json')
+
+
+# ── Conversion ──
+
+def _columns_meta(df):
+    """Original column names and dtypes, as stored in the schema metadata."""
+    def name(value):
+        value = value.item() if hasattr(value, 'item') else value
+        return value if isinstance(value, (str, int, float, bool)) else str(value)
+    return json.dumps([[name(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode('utf-8')
+
+
+def _arrow_safe(df):
+    """Mixed-type object columns (e.g. numbers and text) are stored as text."""
+    for col in df.columns:
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True).startswith('mixed'):
+            df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    df.columns = [str(c) for c in df.columns]
+    return df
+
+
+def _restore(df, schema):
+    """Original column names and object dtypes of a frame read back from Parquet."""
+    meta = (schema.metadata or {}).get(COLUMNS_META_KEY)
+    if meta is None:
+        return df
+    original = {str(name): (name, dtype) for name, dtype in json.loads(meta)}
+    for col in df.columns:
+        if col in original and original[col][1] == 'object' and df[col].dtype != object:
+            df[col] = df[col].astype(object)
+    df.columns = [original[col][0] if col in original else col for col in df.columns]
+    return df
+
+
+def _excel_bytes(filepath):
+    """Rough in-memory size of reading a workbook whole."""
+    if Path(filepath).suffix.lower() == '.xlsx':
+        with zipfile.ZipFile(filepath) as zf:
+            size = sum(i.file_size for i in zf.infolist() if i.filename.startswith('xl/worksheets/'))
+    else:
+        size = Path(filepath).stat().st_size
+    return size * EXCEL_PARSE_OVERHEAD
+
+
+def _iter_source_frames(filepath):
+    """The whole source file as DataFrames (chunked for CSV and QVD)."""
+    ext = Path(filepath).suffix.lower()
+    if ext == '.csv':
+        from reports.services.file_dialect import csv_read_kwargs, detect_dialect
+        kwargs = csv_read_kwargs(detect_dialect(filepath))
+        yield from pd.read_csv(filepath, chunksize=CHUNK_ROWS, **kwargs)
+    elif ext in ('.xlsx', '.xls'):
+        from reports.services.excel_reader import read_excel
+        needed = _excel_bytes(filepath)
+        if needed > settings.LOAD_MEMORY_BUDGET_BYTES:
+            raise ValueError(
+                f'"{Path(filepath).name}" necesitaría ~{needed / 1024 / 1024:,.0f} MB de memoria para '
+                f'convertirse (presupuesto {settings.LOAD_MEMORY_BUDGET_BYTES / 1024 / 1024:,.0f} MB).'
+            )
+        yield read_excel(filepath)
+    elif ext == '.qvd':
+        from reports.services.qvd_native import read_header, read_qvd
+        records = read_header(filepath)['records']
+        for start in range(0, max(records, 1), CHUNK_ROWS):
+            yield read_qvd(filepath, start=start, stop=start + CHUNK_ROWS)
+    else:
+        raise ValueError(f'Formato no soportado: {ext}')
+
+
+def _column_stats(pq_file):
+    """Per-column type, null count and min / max merged from the row-group statistics."""
+    meta = pq_file.metadata
+    stats = {}
+    for i, field in enumerate(pq_file.schema_arrow):
+        col = {'type': str(field.type), 'null_count': 0, 'min': None, 'max': None}
+        for rg in range(meta.num_row_groups):
+            s = meta.row_group(rg).column(i).statistics
+            if s is None:
+                continue
+            col['null_count'] += s.null_count if s.has_null_count else 0
+            if s.has_min_max:
+                col['min'] = s.min if col['min'] is None else min(col['min'], s.min)
+                col['max'] = s.max if col['max'] is None else max(col['max'], s.max)
+        stats[field.name] = col
+    return {'rows': meta.num_rows, 'row_groups': meta.num_row_groups, 'columns': stats}
+
+
+def _widened(schema, incoming):
+    """
+    Writer schema that can also hold a chunk of schema `incoming`: all-null
+    columns take the other type, integers widen to floats and any other
+    conflict (e.g. numbers first, text later) falls back to text.
+    """
+    pa, _ = _arrow()
+    fields = []
+    for field in schema:
+        other = incoming.field(field.name)
+        try:
+            unified = pa.unify_schemas([pa.schema([field]), pa.schema([other])], promote_options='permissive')
+            fields.append(unified.field(0))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            fields.append(pa.field(field.name, pa.string()))
+
+    # Columns turned into text are restored as object columns, like a mixed column
+    meta = json.loads(schema.metadata[COLUMNS_META_KEY])
+    for entry, old, new in zip(meta, schema, fields):
+        if new.type != old.type and pa.types.is_string(new.type):
+            entry[1] = 'object'
+    metadata = {**schema.metadata, COLUMNS_META_KEY: json.dumps(meta).encode('utf-8')}
+    return pa.schema(fields, metadata=metadata)
+
+
+def _rewrite(tmp, schema):
+    """Copy the row groups written so far under a wider schema; returns the new writer and path."""
+    pa, pq = _arrow()
+    widened = tmp.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+    writer = pq.ParquetWriter(widened, schema, compression=COMPRESSION)
+    try:
+        for batch in pq.ParquetFile(tmp).iter_batches(batch_size=ROW_GROUP_ROWS):
+            writer.write_table(pa.Table.from_batches([batch]).cast(schema), row_group_size=ROW_GROUP_ROWS)
+    except Exception:
+        writer.close()
+        widened.unlink(missing_ok=True)
+        raise
+    tmp.unlink()
+    return writer, widened
+
+
+def convert(filepath):
+    """Convert a source file to its Parquet copy (no-op if it already exists)."""
+    pa, pq = _arrow()
+    target = columnar_path(filepath)
+    if target.exists():
+        return target
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+
+    writer = None
+    try:
+        for df in _iter_source_frames(filepath):
+            meta = _columns_meta(df) if writer is None else None
+            table = pa.Table.from_pandas(_arrow_safe(df), preserve_index=False)
+            if writer is None:
+                schema = table.schema.with_metadata({**(table.schema.metadata or {}), COLUMNS_META_KEY: meta})
+                writer = pq.ParquetWriter(tmp, schema, compression=COMPRESSION)
+            else:
+                # Chunks are typed apart: a later one may not fit the types of the first
+                schema = _widened(writer.schema, table.schema)
+                if not schema.equals(writer.schema):
+                    writer.close()
+                    writer, tmp = _rewrite(tmp, schema)
+                table = table.cast(schema)
+            writer.write_table(table, row_group_size=ROW_GROUP_ROWS)
+    except Exception:
+        if writer is not None:
+            writer.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    if writer is None:
+        raise ValueError('El archivo está vacío.')
+    writer.close()
+
+    os.replace(tmp, target)
+    stats = _column_stats(pq.ParquetFile(target))
+    write_json(_stats_path(target), stats)
+    logger.info(
+        f'[COLUMNAR] {Path(filepath).name} → {target.name}: {stats["rows"]} rows, '
+        f'{target.stat().st_size / 1024 / 1024:.1f} MB'
+    )
+    return target
+
+
+def _convert_job(filepath, digest):
+    try:
+        convert(filepath)
+    except Exception as e:
+        logger.warning(f'[COLUMNAR] Conversion of {Path(filepath).name} failed: {e}')
+    finally:
+        with _lock:
+            _in_flight.discard(digest)
+
+
+def convert_async(filepath):
+    """Queue the conversion of a file in the background (once per content)."""
+    if not settings.COLUMNAR_AUTO_CONVERT:
+        return None
+    if not is_available() or Path(filepath).suffix.lower() not in SOURCE_EXTENSIONS:
+        return None
+    digest = file_digest(filepath)
+    if (_root() / f'{digest}.parquet').exists():
+        return None
+    with _lock:
+        if digest in _in_flight:
+            return None
+        _in_flight.add(digest)
+    return _executor.submit(_convert_job, str(filepath), digest)
+
+
+# ── Reading ──
+
+def read_columnar(filepath, columns=None, nrows=None):
+    """
+    Read the Parquet copy of a file: only `columns` (unknown names ignored,
+    all if none exists) and only the row groups needed for `nrows`.
+    Returns None if the file has not been converted (yet).
+    """
+    if not is_available():
+        return None
+    path = columnar_path(filepath)
+    if not path.exists():
+        return None
+
+    _, pq = _arrow()
+    pq_file = pq.ParquetFile(path)
+    names = pq_file.schema_arrow.names
+    selected = [str(c) for c in (columns or []) if str(c) in names] or None
+
+    groups, rows = [], 0
+    for rg in range(pq_file.metadata.num_row_groups):
+        if nrows is not None and rows >= nrows:
+            break
+        groups.append(rg)
+        rows += pq_file.metadata.row_group(rg).num_rows
+
+    df = pq_file.read_row_groups(groups, columns=selected, use_pandas_metadata=True).to_pandas()
+    df = _restore(df, pq_file.schema_arrow)
+    return df.head(nrows) if nrows is not None else df
+
+
+def iter_columnar(filepath, chunk_rows, columns=None):
+    """
+    Batches of at most `chunk_rows` rows of the Parquet copy, or None if the
+    file has not been converted (yet).
+    """
+    if not is_available():
+        return None
+    path = columnar_path(filepath)
+    if not path.exists():
+        return None
+    _, pq = _arrow()
+    pq_file = pq.ParquetFile(path)
+    names = pq_file.schema_arrow.names
+    selected = [str(c) for c in (columns or []) if str(c) in names] or None
+    return (
+        _restore(batch.to_pandas(), pq_file.schema_arrow)
+        for batch in pq_file.iter_batches(batch_size=chunk_rows, columns=selected, use_pandas_metadata=True)
+    )
+
+
+def column_stats(filepath):
+    """Stored column statistics of a converted file, or None."""
+    return read_json(_stats_path(columnar_path(filepath)))
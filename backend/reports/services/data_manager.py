@@ -3,14 +3,32 @@
 
 Provides:
   - extract_metadata(): Read file → column names, types, row count, preview
+                        (approximate, sketch-based, above APPROX_ROW_THRESHOLD rows)
   - execute_load_script(): Read DataModelConfig JSON → load, join, return records
+                           (or run it as SQL over the files with "engine": "sql";
+                           oversized join results are spilled to disk)
 """
+import hashlib
+import json
 import logging
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
 
-from reports.models import DataSource
+from reports.models import UploadSession
+from reports.services import columnar_store, etl_pool, load_planner, parse_cache, uploads
+from reports.services.excel_reader import read_excel
+from reports.services.file_dialect import detect_dialect, csv_read_kwargs
+from reports.services.frame_cache import get_cache, get_source_frame
+from reports.services.join_planner import execute_plan, execute_plan_spilled, plan_joins, should_spill
+from reports.services.multi_file import is_multi_source, read_files, resolve_source_path, source_files
+from reports.services.profiler import PROFILE_VERSION, profile_frame, profile_sketch
+from reports.services.qlik_parser import CHUNK_ROWS, estimate_rows, iter_file_chunks
+from reports.services.qvd_native import read_qvd
+from reports.services.sketches import APPROX_ROW_THRESHOLD, TableSketch
+from reports.services.spill import SpilledFrame
+from reports.services.sql_engine import execute_sql
 
 logger = logging.getLogger(__name__)
 
@@ -18,91 +36,184 @@ MAX_PREVIEW_ROWS = 50
 MAX_LOAD_ROWS = 100_000
 
 
+def _load_variant(columns=None, sheets=None):
+    """parse_cache variant of a (possibly projected) _read_file() call."""
+    if not columns and sheets is None:
+        return f'load_{MAX_LOAD_ROWS}'
+    key = json.dumps([columns or [], sheets], ensure_ascii=False)
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]
+    return f'load_{MAX_LOAD_ROWS}_{digest}'
+
+
+def _required_columns(source_id, selected_columns, joins_config):
+    """Projected columns of a source plus every join key it takes part in."""
+    if not selected_columns:
+        return []
+    required = list(selected_columns)
+    for join in joins_config:
+        if join.get('left_source') == source_id:
+            required.append(join['left_key'])
+        if join.get('right_source') == source_id:
+            required.append(join['right_key'])
+    return list(dict.fromkeys(required))
+
+
+def _column_type(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return 'numeric'
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return 'datetime'
+    return 'categorical'
+
+
+def _preview_rows(df):
+    """First MAX_PREVIEW_ROWS rows as list of dicts."""
+    return [
+        {col: (str(v) if pd.notna(v) else None) for col, v in row.items()}
+        for _, row in df.head(MAX_PREVIEW_ROWS).iterrows()
+    ]
+
+
 class QlikEngine:
     """In-memory ETL engine that reads files and executes load scripts."""
 
     @staticmethod
-    def _read_file(filepath):
-        """Read a data file into a Pandas DataFrame."""
+    def _read_file(filepath, columns=None, sheets=None):
+        """
+        Read a data file into a Pandas DataFrame.
+        Only `columns` are parsed (None = all); unknown names are ignored and
+        if none of them exists the whole file is read. `sheets` selects the
+        Excel sheets (see excel_reader.read_excel). A folder / glob source is
+        read file by file (see multi_file.py).
+        The Parquet copy of the file is preferred when it exists (see
+        columnar_store.py); otherwise its conversion is queued.
+        """
+        if is_multi_source(filepath):
+            return read_files(
+                filepath, partial(QlikEngine._read_file, columns=columns, sheets=sheets),
+                variant=_load_variant(columns, sheets), nrows=MAX_LOAD_ROWS,
+            )
+
         path = Path(filepath)
         ext = path.suffix.lower()
 
+        if sheets is None:
+            df = columnar_store.read_columnar(filepath, columns, nrows=MAX_LOAD_ROWS)
+            if df is not None:
+                return df
+            columnar_store.convert_async(filepath)
+        wanted = set(columns) if columns else None
+        usecols = (lambda c: c in wanted) if wanted else None
+
         if ext == '.csv':
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                for sep in [',', ';', '\t', '|']:
-                    try:
-                        df = pd.read_csv(filepath, encoding=encoding, sep=sep, nrows=5)
-                        if len(df.columns) > 1:
-                            return pd.read_csv(filepath, encoding=encoding, sep=sep, nrows=MAX_LOAD_ROWS)
-                    except Exception:
-                        continue
-            return pd.read_csv(filepath, nrows=MAX_LOAD_ROWS)
+            dialect = detect_dialect(filepath)
+            df = pd.read_csv(filepath, nrows=MAX_LOAD_ROWS, usecols=usecols, **csv_read_kwargs(dialect))
 
         elif ext in ('.xlsx', '.xls'):
-            return pd.read_excel(filepath, nrows=MAX_LOAD_ROWS)
+            df = read_excel(filepath, sheets=sheets, columns=wanted, nrows=MAX_LOAD_ROWS)
 
         elif ext == '.qvd':
-            try:
-                from qvd import qvd_reader
-                df = qvd_reader.read(str(filepath))
-                return df.head(MAX_LOAD_ROWS) if len(df) > MAX_LOAD_ROWS else df
-            except ImportError:
-                raise ImportError('Librería "qvd" no instalada.')
+            return read_qvd(filepath, columns=columns, stop=MAX_LOAD_ROWS)
+
+        else:
+            raise ValueError(f'Formato no soportado: {ext}')
 
-        raise ValueError(f'Formato no soportado: {ext}')
+        if wanted and len(df.columns) == 0:
+            return QlikEngine._read_file(filepath, sheets=sheets)
+        return df
 
     @staticmethod
     def extract_metadata(datasource):
         """
-        Read a DataSource file and extract metadata.
-        Returns dict with columns info, row count, and preview rows.
+        Read a data file (anything with a `file`, e.g. a complete UploadSession)
+        and extract metadata.
+        Returns dict with columns info, row count, preview rows and the
+        column profile (see profiler.py).
+        Memoized by file content (see parse_cache.py).
         """
-        df = QlikEngine._read_file(datasource.file.path)
+        return parse_cache.get_result(
+            datasource.file.path, f'metadata_v{PROFILE_VERSION}_{MAX_LOAD_ROWS}', QlikEngine._extract_metadata,
+        )
 
-        columns = []
-        for col in df.columns:
-            dtype = str(df[col].dtype)
-            if pd.api.types.is_numeric_dtype(df[col]):
-                col_type = 'numeric'
-            elif pd.api.types.is_datetime64_any_dtype(df[col]):
-                col_type = 'datetime'
-            else:
-                col_type = 'categorical'
+    @staticmethod
+    def _extract_metadata(filepath):
+        # Sources too large for the memory budget are also profiled in chunks
+        plan = load_planner.plan_load(filepath, nrows=MAX_LOAD_ROWS, chunk_rows=CHUNK_ROWS)
+        if plan['strategy'] == 'reject':
+            raise ValueError(plan['reason'])
+        if (estimate_rows(filepath) or 0) > APPROX_ROW_THRESHOLD or plan['strategy'] == 'chunked':
+            return QlikEngine._approximate_metadata(filepath, plan['chunk_rows'] or CHUNK_ROWS)
+
+        df = parse_cache.get_frame(filepath, QlikEngine._read_file, variant=_load_variant())
+
+        profile = profile_frame(df)
+        columns = [
+            {
+                'name': col,
+                'type': _column_type(df[col]),
+                'dtype': str(df[col].dtype),
+                'null_count': profile['columns'][str(col)]['null_count'],
+                'unique_count': profile['columns'][str(col)]['distinct_count'],
+            }
+            for col in df.columns
+        ]
 
+        return {
+            'columns': columns,
+            'row_count': len(df),
+            'column_count': len(df.columns),
+            'preview': _preview_rows(df),
+            'profile': profile,
+        }
+
+    @staticmethod
+    def _approximate_metadata(filepath, chunk_rows=CHUNK_ROWS):
+        """
+        Metadata of a very large source in one streaming pass over the whole
+        file: exact row and null counts, HyperLogLog distinct counts.
+        """
+        chunks = iter_file_chunks(filepath, chunk_rows)
+        first = next(chunks, None)
+        if first is None:
+            raise ValueError('El archivo está vacío.')
+        sketch = TableSketch().update(first)
+        for chunk in chunks:
+            sketch.update(chunk)
+        stats = sketch.summary()
+        profile = profile_sketch(sketch, first)
+
+        columns = []
+        for col in first.columns:
+            col_stats = stats['columns'][str(col)]
             columns.append({
                 'name': col,
-                'type': col_type,
-                'dtype': dtype,
-                'null_count': int(df[col].isnull().sum()),
-                'unique_count': int(df[col].nunique()),
-            })
-
-        # Preview: first N rows as list of dicts
-        preview_df = df.head(MAX_PREVIEW_ROWS)
-        preview = []
-        for _, row in preview_df.iterrows():
-            preview.append({
-                col: (str(v) if pd.notna(v) else None)
-                for col, v in row.items()
+                'type': _column_type(first[col]),
+                'dtype': str(first[col].dtype),
+                'null_count': col_stats['null_count'],
+                'unique_count': col_stats['distinct_count'],
             })
+        logger.info(f'[QLIK_ENGINE] Approximate metadata: {Path(filepath).name} ({stats["row_count"]} rows)')
 
         return {
             'columns': columns,
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'preview': preview,
+            'row_count': stats['row_count'],
+            'column_count': len(first.columns),
+            'preview': _preview_rows(first),
+            'approximate': True,
+            'profile': profile,
         }
 
     @staticmethod
-    def execute_load_script(data_model_config):
+    def execute_load_script(data_model_config, user):
         """
         Execute a DataModelConfig's load_script_json.
 
         Schema expected:
         {
             "sources": [
-                {"source_id": 1, "columns": ["Col1", "Col2"]},
-                {"source_id": 2, "columns": ["ID", "Name"]}
+                {"source_id": 1, "upload": "<uuid>", "columns": ["Col1", "Col2"]},
+                {"source_id": 2, "upload": "<uuid>", "columns": ["ID", "Name"], "sheets": "*"},
+                {"source_id": 3, "path": "*/ventas_*.csv"}
             ],
             "joins": [
                 {
@@ -115,7 +226,17 @@ class QlikEngine:
             ]
         }
 
-        Returns: dict with columns, rows (records), and row_count.
+        "source_id" names the source within the script (joins refer to it).
+        "upload" is a complete UploadSession of `user`; a source with "path"
+        reads that file, folder or glob of `user`'s uploads instead, e.g.
+        "*/ventas_2024_*.csv" (see multi_file.py and uploads.user_root).
+        Sources are checked against the request's memory budget before any is
+        read (see load_planner.py); joins are reordered and size-checked
+        before running (see join_planner.py); a result estimated above
+        SPILL_THRESHOLD_BYTES is written to disk in chunks and the response
+        built from them (see spill.py).
+        With "engine": "sql" the script is a SELECT over the files (see sql_engine.py).
+        Returns: dict with columns, rows (records), row_count and planner warnings.
         """
         script = data_model_config.load_script_json
         sources_config = script.get('sources', [])
@@ -124,63 +245,92 @@ class QlikEngine:
         if not sources_config:
             raise ValueError('El script de carga no tiene fuentes de datos configuradas.')
 
-        # Load all source DataFrames
-        dataframes = {}
+        if script.get('engine') == 'sql':
+            return QlikEngine._execute_sql_script(script, user)
+
+        # Memory budget of the whole request, checked before any source is read
+        loads = []
         for src in sources_config:
+            required_columns = _required_columns(src['source_id'], src.get('columns', []), joins_config)
+            filepath = QlikEngine._source_path(src, user)
+            plan = load_planner.plan_load(
+                filepath, required_columns or None, src.get('sheets'), nrows=MAX_LOAD_ROWS,
+            )
+            loads.append((src, required_columns, filepath, plan))
+        load_planner.check_budget([plan for *_, plan in loads])
+
+        # Load all source DataFrames (in-process frame cache → parse cache → file)
+        dataframes = {}
+        hits = 0
+        for src, required_columns, filepath, _ in loads:
             source_id = src['source_id']
-            selected_columns = src.get('columns', [])
-
-            try:
-                ds = DataSource.objects.get(pk=source_id)
-            except DataSource.DoesNotExist:
-                raise ValueError(f'Fuente de datos ID={source_id} no existe.')
-
-            df = QlikEngine._read_file(ds.file.path)
-
-            # Filter columns if specified
-            if selected_columns:
-                available = [c for c in selected_columns if c in df.columns]
+            sheets = src.get('sheets')
+
+            variant = _load_variant(required_columns, sheets)
+            df, hit = get_source_frame(
+                filepath, variant,
+                lambda: parse_cache.get_frame(
+                    filepath,
+                    lambda path: QlikEngine._parse_source(path, required_columns or None, sheets),
+                    variant=variant,
+                ),
+            )
+            hits += hit
+
+            # Filter columns if specified (join keys are kept for the merge)
+            if required_columns:
+                available = [c for c in required_columns if c in df.columns]
                 if available:
                     df = df[available]
 
             dataframes[source_id] = df
-            logger.info(f'[QLIK_ENGINE] Loaded source {source_id}: {len(df)} rows × {len(df.columns)} cols')
-
-        # Execute joins sequentially
+            logger.info(
+                f'[QLIK_ENGINE] Loaded source {source_id}: {len(df)} rows × {len(df.columns)} cols'
+                f'{" (cached)" if hit else ""}'
+            )
+
+        cache = get_cache().stats()
+        used_mb, max_mb = cache['used_bytes'] / 1024 / 1024, cache['max_bytes'] / 1024 / 1024
+        logger.info(
+            f'[QLIK_ENGINE] Frame cache: {hits} hits, {len(sources_config) - hits} misses '
+            f'this load; {cache["hits"]} hits / {cache["misses"]} misses / '
+            f'{cache["evictions"]} evictions total, {used_mb:.1f}/{max_mb:.0f} MB'
+        )
+
+        # Plan the joins (order, estimated sizes, row budget) before running them
+        warnings = []
         if joins_config:
-            # Start with first join's left source
-            first_join = joins_config[0]
-            result_df = dataframes.get(first_join['left_source'])
-            if result_df is None:
-                raise ValueError(f'Fuente izquierda {first_join["left_source"]} no encontrada.')
-
-            for join in joins_config:
-                right_df = dataframes.get(join['right_source'])
-                if right_df is None:
-                    raise ValueError(f'Fuente derecha {join["right_source"]} no encontrada.')
-
-                how = join.get('how', 'left')
-                if how not in ('left', 'right', 'inner', 'outer'):
-                    how = 'left'
-
-                result_df = pd.merge(
-                    result_df,
-                    right_df,
-                    left_on=join['left_key'],
-                    right_on=join['right_key'],
-                    how=how,
-                    suffixes=('', f'_{join["right_source"]}'),
+            plan = plan_joins(joins_config, dataframes)
+            warnings = plan['warnings']
+            spill = should_spill(plan)
+            executor = execute_plan_spilled if spill else execute_plan
+            if etl_pool.should_offload(rows=max(step['estimated_rows'] for step in plan['steps'])):
+                used = {plan['base']} | {step['join']['right_source'] for step in plan['steps']}
+                result_df = etl_pool.run(
+                    f'reports.services.join_planner:{executor.__name__}',
+                    plan, {source: dataframes[source] for source in used},
                 )
+            else:
+                result_df = executor(plan, dataframes)
+            if spill:
                 logger.info(
-                    f'[QLIK_ENGINE] Join: {join["left_key"]} ↔ {join["right_key"]} '
-                    f'({how}) → {len(result_df)} rows'
+                    f'[QLIK_ENGINE] Join result spilled: {len(result_df)} rows, '
+                    f'{result_df.nbytes / 1024 / 1024:.1f} MB on disk'
                 )
         else:
             # No joins — use the first (or only) source
             first_id = sources_config[0]['source_id']
             result_df = dataframes[first_id]
 
-        # Build response
+        try:
+            return QlikEngine._build_response(result_df, warnings)
+        finally:
+            if isinstance(result_df, SpilledFrame):
+                result_df.cleanup()
+
+    @staticmethod
+    def _build_response(result_df, warnings):
+        """Preview records and column types of a DataFrame or SpilledFrame."""
         columns = list(result_df.columns)
         records = []
         for _, row in result_df.head(MAX_PREVIEW_ROWS * 2).iterrows():
@@ -191,9 +341,13 @@ class QlikEngine:
             })
 
         # Column classification for chart building
+        if isinstance(result_df, SpilledFrame):
+            numeric = result_df.numeric_columns()
+        else:
+            numeric = {col for col in columns if pd.api.types.is_numeric_dtype(result_df[col])}
         col_info = []
         for col in columns:
-            if pd.api.types.is_numeric_dtype(result_df[col]):
+            if col in numeric:
                 col_info.append({'name': col, 'type': 'numeric'})
             else:
                 col_info.append({'name': col, 'type': 'categorical'})
@@ -203,4 +357,35 @@ class QlikEngine:
             'rows': records,
             'row_count': len(result_df),
             'showing': len(records),
+            'warnings': warnings,
         }
+
+    @staticmethod
+    def _parse_source(filepath, columns=None, sheets=None):
+        """_read_file(), in the ETL process pool for large sources (see etl_pool.py)."""
+        size = sum(f.stat().st_size for f in source_files(filepath))
+        if etl_pool.should_offload(source_bytes=size):
+            return etl_pool.run('reports.services.data_manager:QlikEngine._read_file', str(filepath), columns, sheets)
+        return QlikEngine._read_file(filepath, columns, sheets)
+
+    @staticmethod
+    def _source_path(src, user):
+        """File (or folder / glob) of a load script source."""
+        if src.get('path'):
+            return resolve_source_path(src['path'], uploads.user_root(user))
+        if not src.get('upload'):
+            raise ValueError(f'La fuente {src.get("source_id")} no indica archivo ("upload" o "path").')
+        session = UploadSession.objects.filter(
+            pk=src['upload'], created_by=user, status='complete',
+        ).first()
+        if session is None:
+            raise ValueError(f'Archivo subido {src["upload"]} no encontrado o incompleto.')
+        return session.file.path
+
+    @staticmethod
+    def _execute_sql_script(script, user):
+        """Run a SQL load script over the source files (DuckDB, no pandas materialization)."""
+        sources = {}
+        for src in script['sources']:
+            sources[src.get('alias') or f'source_{src["source_id"]}'] = QlikEngine._source_path(src, user)
+        return execute_sql(script.get('sql', ''), sources)
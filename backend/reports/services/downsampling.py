@@ -0,0 +1,107 @@
+"""
+[AGENTE_DATA_ENGINEER] — Downsampling: visual reduction of line chart series.
+
+A line chart cannot show more points than the canvas has pixels, but
+resampling to a fixed month / week / day rule averages the spikes away.
+These methods keep the original points that matter visually instead:
+
+  - lttb:   Largest-Triangle-Three-Buckets. One point per bucket: the one
+            forming the largest triangle with the point kept in the previous
+            bucket and the mean of the next bucket — follows the shape.
+  - minmax: the minimum and the maximum of every bucket — every peak and
+            every dip survives, at the cost of a jagged line.
+
+The first and last points are always kept. A frame with several columns
+keeps the union of the points selected for each column, so the datasets of
+a chart share their labels.
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('lttb', 'minmax')
+
+
+def _x_values(index):
+    """Numeric x of an index: datetimes and numbers as they are, else positions."""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype('float64')
+    if pd.api.types.is_numeric_dtype(index):
+        return np.asarray(index, dtype='float64')
+    return np.arange(len(index), dtype='float64')
+
+
+def lttb(x, y, n_out):
+    """Indices of the `n_out` points LTTB keeps of (x, y); x must be sorted."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    # Buckets of the inner points; first and last points are buckets on their own
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < n_out - 1:
+            nxt = slice(edges[i + 1], edges[i + 2])
+            next_x, next_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        bx, by = x[start:end], y[start:end]
+        # Twice the triangle area (previous kept point, candidate, next bucket mean)
+        area = np.abs((x[prev] - next_x) * (by - y[prev]) - (x[prev] - bx) * (next_y - y[prev]))
+        prev = start + int(np.argmax(area))
+        keep[i + 1] = prev
+    return keep
+
+
+def minmax(y, n_out):
+    """Indices of the minimum and maximum of `n_out // 2` buckets of y."""
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    buckets = max(1, (n_out - 2) // 2)
+    bucket = np.minimum((np.arange(n) * buckets) // n, buckets - 1)
+    # Sorted by (bucket, value): the first / last of each bucket are its min / max
+    order = np.lexsort((y, bucket))
+    ends = np.flatnonzero(np.diff(bucket[order])) + 1
+    firsts = order[np.concatenate(([0], ends))]
+    lasts = order[np.concatenate((ends - 1, [n - 1]))]
+    return np.unique(np.concatenate(([0, n - 1], firsts, lasts)))
+
+
+def downsample(frame, max_points=None, method=None):
+    """
+    Reduce a Series / DataFrame sorted by its index to about `max_points`
+    points per column (CHART_MAX_POINTS, CHART_DOWNSAMPLE_METHOD by default).
+    Returns the same type with the kept rows, in order.
+    """
+    max_points = int(max_points or settings.CHART_MAX_POINTS)
+    method = method or settings.CHART_DOWNSAMPLE_METHOD
+    if method not in METHODS:
+        raise ValueError(f'Método de reducción no soportado: "{method}" (usa {", ".join(METHODS)}).')
+    if len(frame) <= max_points:
+        return frame
+
+    columns = frame.to_frame() if isinstance(frame, pd.Series) else frame
+    x = _x_values(frame.index)
+    keep = []
+    for col in columns.columns:
+        y = pd.to_numeric(columns[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+        valid = np.flatnonzero(~np.isnan(y))
+        if not len(valid):
+            continue
+        picked = lttb(x[valid], y[valid], max_points) if method == 'lttb' else minmax(y[valid], max_points)
+        keep.append(valid[picked])
+
+    rows = np.unique(np.concatenate(keep)) if keep else np.arange(min(len(frame), max_points))
+    logger.debug(f'[DOWNSAMPLING] {len(frame)} → {len(rows)} points ({method})')
+    return frame.iloc[rows]
@@ -0,0 +1,209 @@
+"""
+[AGENTE_DATA_ENGINEER] — EtlPool: managed process pool for heavy pandas work.
+
+CSV parsing, merges and group-bys hold the GIL: run inside the Django worker,
+one large file stalls every other request served by that process. Heavy jobs
+run here instead, at most ETL_POOL_WORKERS at a time, each in its own process:
+
+  - a fresh process per job (forkserver) with RLIMIT_CPU = ETL_JOB_CPU_SECONDS
+    and RLIMIT_AS = ETL_JOB_MEMORY_BYTES; a job over its limits is killed and
+    reported as a ValueError to ITS caller only — jobs running next to it
+    are separate processes and never notice
+  - DataFrames go in and out through files in BI_STORE_ROOT/etl_jobs/<job>/
+    (Arrow IPC / Feather when pyarrow is installed, else pickle files, both
+    keeping the index), and so does the job's outcome; the job directory is
+    removed afterwards
+  - jobs are named as 'module:function' so nothing but data is pickled;
+    an exception raised by the job is raised again in the caller
+
+The calling thread only waits on the process, without holding the GIL, so
+interactive endpoints of the same worker stay responsive.
+"""
+import logging
+import multiprocessing
+import pickle
+import resource
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from functools import reduce
+from importlib import import_module
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FRAME_KEY = '__frame__'
+OUTCOME_FILE = 'outcome.pkl'
+PRELOAD_MODULES = ['django', 'numpy', 'pandas']
+
+_context = None
+_slots = None
+_lock = threading.Lock()
+# True inside a job process: nested heavy work runs in place
+_in_job = False
+
+
+def _jobs_root():
+    return Path(settings.BI_STORE_ROOT) / 'etl_jobs'
+
+
+# ── Frames as files ──
+
+def save_frame(df, path):
+    """Write a DataFrame (with its index) for another process; returns the reference to pass."""
+    try:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        feather.write_feather(pa.Table.from_pandas(df), str(path.with_suffix('.feather')))
+        return {FRAME_KEY: str(path.with_suffix('.feather'))}
+    except (ImportError, ValueError, TypeError, NotImplementedError):
+        # No pyarrow, or columns Arrow cannot store as they are
+        df.to_pickle(path.with_suffix('.pkl'))
+        return {FRAME_KEY: str(path.with_suffix('.pkl'))}
+
+
+def load_frame(ref):
+    path = Path(ref[FRAME_KEY])
+    return pd.read_feather(path) if path.suffix == '.feather' else pd.read_pickle(path)
+
+
+def _is_frame_ref(value):
+    return isinstance(value, dict) and set(value) == {FRAME_KEY}
+
+
+def _dump(value, job_dir):
+    """Replace the DataFrames inside a value by file references."""
+    if isinstance(value, pd.DataFrame):
+        return save_frame(value, job_dir / f'frame_{uuid.uuid4().hex[:8]}')
+    if isinstance(value, (list, tuple)):
+        return type(value)(_dump(v, job_dir) for v in value)
+    if isinstance(value, dict):
+        return {k: _dump(v, job_dir) for k, v in value.items()}
+    return value
+
+
+def _load(value):
+    """Inverse of _dump()."""
+    if _is_frame_ref(value):
+        return load_frame(value)
+    if isinstance(value, (list, tuple)):
+        return type(value)(_load(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _load(v) for k, v in value.items()}
+    return value
+
+
+# ── Job process ──
+
+def _job_main(func_ref, payload, job_dir, cpu_seconds, memory_bytes):
+    global _in_job
+    _in_job = True
+    import django
+    django.setup()
+    # Unpickled only now: the arguments may reference models / app modules
+    args, kwargs = pickle.loads(payload)
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 5))
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+    try:
+        module, name = func_ref.split(':')
+        func = reduce(getattr, name.split('.'), import_module(module))
+        outcome = ('ok', _dump(func(*_load(args), **_load(kwargs)), Path(job_dir)))
+    except MemoryError:
+        outcome = ('memory', None)
+    except Exception as e:
+        outcome = ('error', e)
+    path = Path(job_dir) / OUTCOME_FILE
+    try:
+        data = pickle.dumps(outcome)
+    except Exception as e:
+        data = pickle.dumps(('error', ValueError(str(outcome[1] if outcome[0] == 'error' else e))))
+    path.write_bytes(data)
+
+
+# ── Caller side ──
+
+def _get_context():
+    global _context
+    with _lock:
+        if _context is None:
+            _context = multiprocessing.get_context('forkserver')
+            _context.set_forkserver_preload(PRELOAD_MODULES)
+        return _context
+
+
+def _get_slots():
+    """Semaphore allowing ETL_POOL_WORKERS job processes at a time."""
+    global _slots
+    with _lock:
+        if _slots is None or _slots[0] != settings.ETL_POOL_WORKERS:
+            _slots = (settings.ETL_POOL_WORKERS, threading.BoundedSemaphore(max(settings.ETL_POOL_WORKERS, 1)))
+        return _slots[1]
+
+
+def run(func_ref, *args, timeout=None, **kwargs):
+    """
+    Run `func_ref` ('module:function' or 'module:Class.method') in a job
+    process and return its result. DataFrames in the arguments and in the
+    result (also inside lists / tuples / dicts) are passed as files.
+    """
+    job_dir = _jobs_root() / uuid.uuid4().hex
+    job_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        job_args = (
+            func_ref, pickle.dumps((_dump(args, job_dir), _dump(kwargs, job_dir))), str(job_dir),
+            settings.ETL_JOB_CPU_SECONDS, settings.ETL_JOB_MEMORY_BYTES,
+        )
+        with _get_slots():
+            process = _get_context().Process(target=_job_main, args=job_args)
+            process.start()
+            process.join(timeout)
+            if process.is_alive():
+                process.kill()
+                process.join()
+                logger.error(f'[ETL_POOL] Job {func_ref} timed out after {timeout}s')
+                raise ValueError('El proceso de datos superó el tiempo máximo.')
+
+        outcome_path = job_dir / OUTCOME_FILE
+        if not outcome_path.exists():
+            if process.exitcode < 0:
+                # Killed before reporting: SIGXCPU / SIGKILL, or an allocation failing outside Python
+                logger.error(f'[ETL_POOL] Job {func_ref} killed (signal {-process.exitcode}, CPU / memory limit)')
+                raise ValueError('El proceso de datos superó el límite de CPU o memoria.')
+            logger.error(f'[ETL_POOL] Job {func_ref} exited with code {process.exitcode} without a result')
+            raise ValueError('El proceso de datos terminó sin resultado.')
+        status, value = pickle.loads(outcome_path.read_bytes())
+        if status == 'memory':
+            logger.error(f'[ETL_POOL] Job {func_ref} ran out of memory')
+            raise ValueError('El proceso de datos superó el límite de memoria.')
+        if status == 'error':
+            logger.warning(f'[ETL_POOL] Job {func_ref} failed: {value}')
+            raise value
+        result = _load(value)
+        logger.info(f'[ETL_POOL] Job {func_ref} done')
+        return result
+    finally:
+        shutil.rmtree(job_dir, ignore_errors=True)
+
+
+def run_many(func_ref, args_list, timeout=None):
+    """
+    run() once per argument tuple, concurrently (still ETL_POOL_WORKERS
+    processes at a time); results in the order of `args_list`. The first
+    error is raised once every job has finished.
+    """
+    workers = max(1, min(len(args_list), settings.ETL_POOL_WORKERS))
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        futures = [threads.submit(run, func_ref, *args, timeout=timeout) for args in args_list]
+    return [future.result() for future in futures]
+
+
+def should_offload(source_bytes=0, rows=0):
+    """True if a job of that size goes to the pool instead of the web worker."""
+    return not _in_job and settings.ETL_POOL_WORKERS > 0 and (
+        source_bytes > settings.ETL_OFFLOAD_MIN_BYTES or rows > settings.ETL_OFFLOAD_MIN_ROWS
+    )
@@ -0,0 +1,455 @@
+"""
+[AGENTE_DATA_ENGINEER] — ExcelReader: fast .xlsx ingestion with sheet selection.
+
+Replaces pd.read_excel (openpyxl object per cell + a second round of type
+guessing) with a streaming reader:
+
+  - python-calamine (Rust), if installed  → typed cells, natively fast
+  - native .xlsx reader otherwise         → the sheet XML is streamed out of the
+                                            zip and split into rows / cells with
+                                            compiled regexes, never building
+                                            per-cell objects
+  - openpyxl read_only                     → fallback for unusual workbooks
+
+Types come from the cell metadata, not from re-guessing text: `t="s"` is a
+shared string, `t="b"` a boolean, plain numbers are converted column-wise in
+one vectorized pass and numbers whose style has a date number format become
+datetimes (1900 or 1904 date system, as declared by the workbook). Only the
+requested columns are decoded, blank rows are dropped and reading stops
+after `nrows` data rows; iter_excel() hands the rows over in chunks instead,
+for the streaming (out-of-core) readers.
+
+Sheets: None → first sheet, a name / index / list of them, or '*' for all
+sheets. Several sheets are read one after another (parsing holds the GIL)
+and concatenated with a `_sheet` column telling where each row came from;
+once `nrows` rows are read the remaining sheets are not opened. Legacy .xls
+workbooks go through pandas, with the same sheet selection.
+"""
+import html
+import logging
+import posixpath
+import re
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+ALL_SHEETS = '*'
+SHEET_COLUMN = '_sheet'
+STREAM_BLOCK_BYTES = 4 * 1024 * 1024
+
+# Built-in number formats that are dates / times
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+
+_SHEET_RE = re.compile(r'<sheet\b[^>]*?\bname="([^"]*)"[^>]*?\br:id="([^"]*)"', re.S)
+_REL_RE = re.compile(r'<Relationship\b[^>]*?\bId="([^"]*)"[^>]*?\bTarget="([^"]*)"', re.S)
+_REL_RE_ALT = re.compile(r'<Relationship\b[^>]*?\bTarget="([^"]*)"[^>]*?\bId="([^"]*)"', re.S)
+_DATE1904_RE = re.compile(r'<workbookPr\b[^>]*\bdate1904="(1|true)"')
+_NUMFMT_RE = re.compile(r'<numFmt\b[^>]*?\bnumFmtId="(\d+)"[^>]*?\bformatCode="([^"]*)"', re.S)
+_CELLXFS_RE = re.compile(r'<cellXfs\b[^>]*>(.*?)</cellXfs>', re.S)
+_XF_RE = re.compile(r'<xf\b([^>]*)')
+_XF_NUMFMT_RE = re.compile(r'\bnumFmtId="(\d+)"')
+_SI_RE = re.compile(r'<si>(.*?)</si>|<si/>', re.S)
+_RPH_RE = re.compile(r'<rPh\b.*?</rPh>', re.S)
+_T_RE = re.compile(r'<t\b[^>]*>(.*?)</t>', re.S)
+_ROW_RE = re.compile(r'<row\b[^>]*?(?:/>|>(.*?)</row>)', re.S)
+# Cells as written by Excel / openpyxl (r, s, t in this order; plain <v> captured directly)
+_CELL_RE = re.compile(
+    r'<c r="([A-Z]+)\d+"(?: s="(\d+)")?(?: t="(\w+)")?\s*(?:/>|>(?:<v>([^<]*)</v>|(.*?))</c>)',
+    re.S,
+)
+# Any attribute order (slower): used for rows the fast pattern does not fully match
+_CELL_RE_ANY = re.compile(
+    r'<c\b(?=[^>]*?\br="([A-Z]+)\d+")?(?=[^>]*?\bs="(\d+)")?(?=[^>]*?\bt="(\w+)")?[^>]*?(?:/>|>()(.*?)</c>)',
+    re.S,
+)
+_V_RE = re.compile(r'<v>(.*?)</v>', re.S)
+
+
+def _calamine():
+    try:
+        from python_calamine import CalamineWorkbook
+        return CalamineWorkbook
+    except ImportError:
+        return None
+
+
+# ── Native .xlsx reader ──
+
+def _is_date_format(code):
+    code = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', '', code).lower()
+    return any(ch in code for ch in 'dmyhs') and 'general' not in code
+
+
+class _Workbook:
+    """Sheets, shared strings and date styles of an .xlsx (zip + regex, no DOM)."""
+
+    def __init__(self, filepath):
+        self.zip = zipfile.ZipFile(filepath)
+        workbook = self._text('xl/workbook.xml')
+        rels = self._text('xl/_rels/workbook.xml.rels')
+        targets = dict(_REL_RE.findall(rels)) or {i: t for t, i in _REL_RE_ALT.findall(rels)}
+
+        self.sheets = {}
+        for name, rel_id in _SHEET_RE.findall(workbook):
+            target = targets[rel_id]
+            path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(f'xl/{target}')
+            self.sheets[html.unescape(name)] = path
+        self.origin = '1904-01-01' if _DATE1904_RE.search(workbook) else '1899-12-30'
+        self.date_styles = self._date_styles()
+        self._shared = None
+
+    def _text(self, name, default=''):
+        try:
+            return self.zip.read(name).decode('utf-8')
+        except KeyError:
+            return default
+
+    def _date_styles(self):
+        styles = self._text('xl/styles.xml')
+        custom = {int(i): code for i, code in _NUMFMT_RE.findall(styles)}
+        xfs = _CELLXFS_RE.search(styles)
+        result = set()
+        for index, attrs in enumerate(_XF_RE.findall(xfs.group(1)) if xfs else []):
+            fmt = _XF_NUMFMT_RE.search(attrs)
+            fmt_id = int(fmt.group(1)) if fmt else 0
+            if fmt_id in _BUILTIN_DATE_FORMATS or (fmt_id in custom and _is_date_format(html.unescape(custom[fmt_id]))):
+                result.add(str(index))
+        return result
+
+    @property
+    def shared(self):
+        if self._shared is None:
+            text = self._text('xl/sharedStrings.xml')
+            self._shared = [
+                html.unescape(''.join(_T_RE.findall(_RPH_RE.sub('', si)))) if si else ''
+                for si in (m.group(1) for m in _SI_RE.finditer(text))
+            ]
+        return self._shared
+
+    def iter_rows(self, sheet):
+        """Raw rows of a sheet: lists of (ref, style, type, value, inner xml) cells."""
+        buffer = ''
+        with self.zip.open(self.sheets[sheet]) as f:
+            while True:
+                block = f.read(STREAM_BLOCK_BYTES)
+                buffer += block.decode('utf-8', errors='replace') if block else ''
+                cut = len(buffer) if not block else buffer.rfind('</row>') + len('</row>')
+                if cut >= len('</row>') or not block:
+                    for m in _ROW_RE.finditer(buffer, 0, cut):
+                        xml = m.group(1)
+                        if not xml:
+                            continue
+                        cells = _CELL_RE.findall(xml)
+                        if len(cells) != xml.count('<c ') + xml.count('<c>'):
+                            cells = _CELL_RE_ANY.findall(xml)
+                        yield cells
+                    buffer = buffer[cut:]
+                if not block:
+                    break
+
+    def close(self):
+        self.zip.close()
+
+
+def _column_index(letters):
+    n = 0
+    for ch in letters:
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+
+def _place(cells, letters):
+    """{column index: cell} of a sparse row (cells without a ref follow the previous one)."""
+    row, pos = {}, 0
+    for cell in cells:
+        ref = cell[0]
+        if ref:
+            j = letters.get(ref)
+            if j is None:
+                j = letters[ref] = _column_index(ref)
+        else:
+            j = pos
+        row[j] = cell
+        pos = j + 1
+    return row
+
+
+def _cell_text(cell):
+    if cell[3]:
+        return cell[3]
+    inner = cell[4]
+    m = _V_RE.search(inner)
+    if m:
+        return m.group(1)
+    return ''.join(_T_RE.findall(inner))  # inline string
+
+
+def _present(cell):
+    return cell is not None and bool(cell[3] or cell[4])
+
+
+def _cell_value(cell, wb):
+    """Python value of one raw cell (used for headers and mixed columns)."""
+    if not _present(cell):
+        return None
+    _, style, kind, _, _ = cell
+    text = _cell_text(cell)
+    if kind == 's':
+        return wb.shared[int(text)]
+    if kind in ('str', 'inlineStr'):
+        return html.unescape(text)
+    if kind == 'b':
+        return text == '1'
+    if kind == 'e':
+        return None
+    if kind == 'd':
+        return pd.Timestamp(text)
+    number = float(text)
+    if style in wb.date_styles:
+        return pd.Timestamp(wb.origin) + pd.to_timedelta(number, unit='D')
+    return int(number) if number.is_integer() and abs(number) < 2 ** 53 else number
+
+
+def _decode_column(cells, wb):
+    """Typed Series of one column, decoded in a single pass by cell type."""
+    present = [_present(c) for c in cells]
+    kinds = {c[2] for c, p in zip(cells, present) if p}
+    if not any(present):
+        return pd.Series(np.full(len(cells), np.nan))
+
+    if kinds == {'s'}:
+        shared = wb.shared
+        return pd.Series([shared[int(_cell_text(c))] if p else None for c, p in zip(cells, present)], dtype=object)
+
+    if kinds and kinds <= {'', 'n'}:
+        texts = np.array([_cell_text(c) if p else 'nan' for c, p in zip(cells, present)], dtype=object)
+        try:
+            values = texts.astype('float64')
+        except ValueError:
+            return pd.Series([_cell_value(c, wb) for c in cells]).infer_objects()
+        styles = {c[1] for c, p in zip(cells, present) if p}
+        if styles <= wb.date_styles:
+            return pd.Series(pd.Timestamp(wb.origin) + pd.to_timedelta(values, unit='D').round('ms'))
+        if all(present) and np.all(np.mod(values, 1) == 0) and np.all(np.abs(values) < 2 ** 53):
+            return pd.Series(values.astype('int64'))
+        return pd.Series(values)
+
+    # Mixed / text / boolean / date-string columns: per cell
+    return pd.Series([_cell_value(c, wb) for c in cells]).infer_objects()
+
+
+def _iter_sheet_native(filepath, sheet, columns, nrows, chunk_rows):
+    wb = _Workbook(filepath)
+    letters = {}
+    try:
+        rows = wb.iter_rows(sheet)
+        header = next(rows, None)
+        if not header:
+            yield pd.DataFrame()
+            return
+        header = _place(header, letters)
+        width = max(header) + 1
+        names = _header_names([_cell_value(header.get(j), wb) for j in range(width)])
+        keep = [j for j, n in enumerate(names) if not columns or n in columns] or list(range(width))
+        last_ref = {j: ref for ref, j in letters.items()}.get(width - 1)
+
+        def frame(data):
+            return pd.DataFrame({names[j]: _decode_column(data[j], wb) for j in keep}, columns=[names[j] for j in keep])
+
+        data = {j: [] for j in keep}
+        count = 0
+        for cells in rows:
+            if nrows is not None and count >= nrows:
+                break
+            if len(cells) == width and cells[0][0] == 'A' and cells[-1][0] == last_ref:
+                row = cells  # dense row: position == column index
+                if not any(c[3] or c[4] for c in cells):
+                    continue
+                for j in keep:
+                    data[j].append(row[j])
+            else:
+                row = _place(cells, letters)
+                if not any(c[3] or c[4] for c in row.values()):
+                    continue  # blank rows carry no data
+                for j in keep:
+                    data[j].append(row.get(j))
+            count += 1
+            if chunk_rows and len(data[keep[0]]) >= chunk_rows:
+                yield frame(data)
+                data = {j: [] for j in keep}
+        if data[keep[0]] or not count:
+            yield frame(data)
+    finally:
+        wb.close()
+
+
+# ── Fallback readers (calamine / openpyxl): typed rows ──
+
+def _iter_rows(filepath, sheet):
+    """Typed cell values of a sheet, row by row."""
+    calamine = _calamine()
+    if calamine is not None:
+        yield from calamine.from_path(str(filepath)).get_sheet_by_name(sheet).to_python(skip_empty_area=False)
+        return
+    from openpyxl import load_workbook
+    wb = load_workbook(filepath, read_only=True, data_only=True, keep_links=False)
+    try:
+        yield from wb[sheet].iter_rows(values_only=True)
+    finally:
+        wb.close()
+
+
+def _header_names(row):
+    """Column names as pandas would give them (Unnamed: i, duplicates as name.1)."""
+    names, seen = [], {}
+    for i, value in enumerate(row):
+        name = f'Unnamed: {i}' if value is None or value == '' else value
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _iter_sheet_rows(filepath, sheet, columns, nrows, chunk_rows):
+    rows = _iter_rows(filepath, sheet)
+    header = next(rows, None)
+    if header is None:
+        yield pd.DataFrame()
+        return
+
+    names = _header_names(header)
+    keep = [i for i, n in enumerate(names) if not columns or n in columns] or list(range(len(names)))
+
+    data, count = [], 0
+    for row in rows:
+        if nrows is not None and count >= nrows:
+            break
+        if not any(v is not None and v != '' for v in row):
+            continue  # blank rows carry no data
+        data.append([row[i] if i < len(row) else None for i in keep])
+        count += 1
+        if chunk_rows and len(data) >= chunk_rows:
+            yield pd.DataFrame(data, columns=[names[i] for i in keep])
+            data = []
+    if data or not count:
+        yield pd.DataFrame(data, columns=[names[i] for i in keep])
+
+
+def _iter_sheet(filepath, sheet, columns, nrows, chunk_rows):
+    """DataFrames of at most `chunk_rows` rows of one sheet (one frame if None)."""
+    if _calamine() is None:
+        chunks = _iter_sheet_native(filepath, sheet, columns, nrows, chunk_rows)
+        try:
+            first = next(chunks)
+        except (KeyError, ValueError, IndexError, zipfile.BadZipFile) as e:
+            logger.warning(f'[EXCEL_READER] Native reader failed on "{sheet}" ({e}), using openpyxl')
+        else:
+            yield first
+            yield from chunks
+            return
+    yield from _iter_sheet_rows(filepath, sheet, columns, nrows, chunk_rows)
+
+
+# ── Public API ──
+
+def sheet_names(filepath):
+    """Names of all sheets of a workbook, in order."""
+    calamine = _calamine()
+    if calamine is not None:
+        return list(calamine.from_path(str(filepath)).sheet_names)
+    try:
+        wb = _Workbook(filepath)
+        try:
+            return list(wb.sheets)
+        finally:
+            wb.close()
+    except (KeyError, ValueError, zipfile.BadZipFile):
+        from openpyxl import load_workbook
+        wb = load_workbook(filepath, read_only=True)
+        try:
+            return list(wb.sheetnames)
+        finally:
+            wb.close()
+
+
+def _resolve_sheets(names, sheets):
+    if sheets is None:
+        return names[:1]
+    if sheets == ALL_SHEETS:
+        return names
+    resolved = []
+    for sheet in sheets if isinstance(sheets, (list, tuple)) else [sheets]:
+        if isinstance(sheet, int):
+            if not 0 <= sheet < len(names):
+                raise ValueError(f'La hoja {sheet} no existe (el libro tiene {len(names)}).')
+            resolved.append(names[sheet])
+        elif sheet in names:
+            resolved.append(sheet)
+        else:
+            raise ValueError(f'Hoja no encontrada: "{sheet}". Disponibles: {", ".join(names)}')
+    return list(dict.fromkeys(resolved))
+
+
+def read_sheet(filepath, sheet, columns=None, nrows=None):
+    """One sheet as a DataFrame (first row = header)."""
+    return next(_iter_sheet(filepath, sheet, columns, nrows, None))
+
+
+def read_excel(filepath, sheets=None, columns=None, nrows=None):
+    """
+    Read one or more sheets of a workbook. Several sheets are concatenated
+    with a `_sheet` column.
+    """
+    path = Path(filepath)
+    if path.suffix.lower() == '.xls':
+        # Legacy binary format: no streaming reader, keep pandas
+        book = pd.ExcelFile(filepath)
+        names = _resolve_sheets(book.sheet_names, sheets)
+        usecols = (lambda c: c in columns) if columns else None
+
+        def read(name, limit):
+            return pd.read_excel(book, sheet_name=name, nrows=limit, usecols=usecols)
+    else:
+        names = _resolve_sheets(sheet_names(filepath), sheets)
+
+        def read(name, limit):
+            return read_sheet(filepath, name, columns, limit)
+
+    frames = []
+    for name in names:
+        frames.append(read(name, None if nrows is None else nrows - sum(len(f) for f in frames)))
+        if nrows is not None and sum(len(f) for f in frames) >= nrows:
+            break
+    if len(names) == 1:
+        df = frames[0]
+    else:
+        df = pd.concat(
+            [f.assign(**{SHEET_COLUMN: name}) for f, name in zip(frames, names)],
+            ignore_index=True,
+        )
+
+    logger.info(
+        f'[EXCEL_READER] {path.name}: {len(df)} rows × {len(df.columns)} cols from {len(frames)} sheet(s)'
+    )
+    return df
+
+
+def iter_excel(filepath, chunk_rows, sheets=None, columns=None):
+    """
+    The selected sheets of an .xlsx as DataFrames of at most `chunk_rows`
+    rows (tagged with `_sheet` when several sheets are read). Only one chunk
+    of cells is held at a time, except with calamine, which loads each sheet.
+    """
+    if Path(filepath).suffix.lower() == '.xls':
+        raise ValueError('Los libros .xls no se pueden leer por partes: guárdalo como .xlsx.')
+    names = _resolve_sheets(sheet_names(filepath), sheets)
+    for name in names:
+        for chunk in _iter_sheet(filepath, name, columns, None, chunk_rows):
+            yield chunk.assign(**{SHEET_COLUMN: name}) if len(names) > 1 else chunk
@@ -0,0 +1,404 @@
+"""
+[AGENTE_DATA_ENGINEER] — Expressions: Qlik-style calculated fields for sheets.
+
+A layout_json `metric` or `dimension` starting with "=" is an expression:
+
+    "metric":    "=Sum(Importe) / Count(DISTINCT Cliente)"
+    "metric":    "=Sum(If(Estado = 'Cobrado', Importe, 0)) / Sum(Importe)"
+    "metric":    "=Sum(Importe) / Above(Sum(Importe)) - 1"     ← vs previous period
+    "dimension": "=Year(Fecha)"
+
+Expressions are parsed ONCE into an AST (lru-cached by text) and evaluated
+as whole-column NumPy operations — never row by row:
+  - row context:   fields are column arrays, operators are vectorized
+  - group context: aggregations reduce a row-context array by group codes
+                   (np.bincount & co.); Above() shifts along the sorted dimension
+
+Grammar:
+    expr    := or
+    or      := and ('OR' and)*
+    and     := not ('AND' not)*
+    not     := 'NOT' not | compare
+    compare := add (('=' | '<>' | '!=' | '<' | '<=' | '>' | '>=') add)?
+    add     := mul (('+' | '-') mul)*
+    mul     := unary (('*' | '/') unary)*
+    unary   := '-' unary | primary
+    primary := NUMBER | 'string' | field | [Field Name] | "Field Name"
+             | FUNC '(' ['DISTINCT'] expr (',' expr)* ')' | '(' expr ')'
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# ── AST ──
+
+Num = namedtuple('Num', 'value')
+Str = namedtuple('Str', 'value')
+Field = namedtuple('Field', 'name')
+Unary = namedtuple('Unary', 'op operand')
+Binary = namedtuple('Binary', 'op left right')
+Call = namedtuple('Call', 'name args distinct')
+
+AGGREGATIONS = {'SUM', 'COUNT', 'AVG', 'MIN', 'MAX'}
+ROW_FUNCTIONS = {'IF': (3, 3), 'YEAR': (1, 1), 'MONTH': (1, 1), 'DAY': (1, 1), 'ABS': (1, 1), 'ROUND': (1, 2)}
+KEYWORDS = {'AND', 'OR', 'NOT', 'DISTINCT'}
+
+_TOKEN_RE = re.compile(r'''
+    \s*(?:
+        (?P<num>\d+(?:\.\d+)?)
+      | '(?P<str>(?:[^']|'')*)'
+      | \[(?P<bracket>[^\]]+)\]
+      | "(?P<quoted>[^"]+)"
+      | (?P<name>[^\W\d]\w*)
+      | (?P<op><>|!=|<=|>=|[-+*/()=<>,])
+    )''', re.VERBOSE)
+
+
+def is_expression(text):
+    """True if a layout value is an expression ("=..."), not a plain column name."""
+    return isinstance(text, str) and text.startswith('=')
+
+
+def _tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f'Expresión inválida cerca de: "{text[pos:pos + 15]}"')
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        if kind == 'str':
+            value = value.replace("''", "'")
+        elif kind in ('bracket', 'quoted'):
+            kind = 'field'
+        elif kind == 'name' and value.upper() in KEYWORDS:
+            kind, value = 'kw', value.upper()
+        tokens.append((kind, value))
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        tok = self.peek()
+        if (kind and tok[0] != kind) or (value and tok[1] != value):
+            found = 'el final' if tok[0] is None else f'"{tok[1]}"'
+            raise ValueError(f'Expresión inválida: se esperaba "{value or kind}" y se encontró {found}')
+        self.pos += 1
+        return tok
+
+    def accept(self, kind, value):
+        if self.peek() == (kind, value):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self):
+        node = self.parse_or()
+        if self.peek()[0] is not None:
+            raise ValueError(f'Expresión inválida: símbolo inesperado "{self.peek()[1]}"')
+        return node
+
+    def parse_or(self):
+        node = self.parse_and()
+        while self.accept('kw', 'OR'):
+            node = Binary('OR', node, self.parse_and())
+        return node
+
+    def parse_and(self):
+        node = self.parse_not()
+        while self.accept('kw', 'AND'):
+            node = Binary('AND', node, self.parse_not())
+        return node
+
+    def parse_not(self):
+        if self.accept('kw', 'NOT'):
+            return Unary('NOT', self.parse_not())
+        return self.parse_compare()
+
+    def parse_compare(self):
+        node = self.parse_add()
+        kind, value = self.peek()
+        if kind == 'op' and value in ('=', '<>', '!=', '<', '<=', '>', '>='):
+            self.pos += 1
+            node = Binary('<>' if value == '!=' else value, node, self.parse_add())
+        return node
+
+    def parse_add(self):
+        node = self.parse_mul()
+        while self.peek() in (('op', '+'), ('op', '-')):
+            node = Binary(self.take()[1], node, self.parse_mul())
+        return node
+
+    def parse_mul(self):
+        node = self.parse_unary()
+        while self.peek() in (('op', '*'), ('op', '/')):
+            node = Binary(self.take()[1], node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        if self.accept('op', '-'):
+            return Unary('-', self.parse_unary())
+        return self.parse_primary()
+
+    def parse_primary(self):
+        kind, value = self.peek()
+        if kind == 'num':
+            self.pos += 1
+            return Num(float(value))
+        if kind == 'str':
+            self.pos += 1
+            return Str(value)
+        if kind == 'field':
+            self.pos += 1
+            return Field(value)
+        if kind == 'op' and value == '(':
+            self.pos += 1
+            node = self.parse_or()
+            self.take('op', ')')
+            return node
+        if kind == 'name':
+            self.pos += 1
+            if self.peek() != ('op', '('):
+                return Field(value)
+            return self.parse_call(value.upper())
+        if kind is None:
+            raise ValueError('Expresión incompleta.')
+        raise ValueError(f'Expresión inválida: símbolo inesperado "{value}"')
+
+    def parse_call(self, name):
+        self.take('op', '(')
+        distinct = self.accept('kw', 'DISTINCT')
+        args = []
+        if self.peek() == ('op', '*') and name == 'COUNT':
+            self.pos += 1
+            args.append(Num(1.0))
+        elif self.peek() != ('op', ')'):
+            args.append(self.parse_or())
+            while self.accept('op', ','):
+                args.append(self.parse_or())
+        self.take('op', ')')
+
+        if name in AGGREGATIONS:
+            if len(args) != 1:
+                raise ValueError(f'{name.title()}() necesita exactamente un argumento.')
+        elif name == 'ABOVE':
+            if not 1 <= len(args) <= 2:
+                raise ValueError('Above() necesita una expresión y un desplazamiento opcional.')
+        elif name in ROW_FUNCTIONS:
+            lo, hi = ROW_FUNCTIONS[name]
+            if not lo <= len(args) <= hi:
+                raise ValueError(f'Número de argumentos incorrecto en {name.title()}().')
+        else:
+            raise ValueError(f'Función desconocida: {name.title()}()')
+        if distinct and name != 'COUNT':
+            raise ValueError('DISTINCT solo se admite dentro de Count().')
+        return Call(name, tuple(args), distinct)
+
+
+@lru_cache(maxsize=512)
+def parse(text):
+    """Parse an expression (with or without the leading "=") into a cached AST."""
+    body = text[1:] if is_expression(text) else text
+    if not body.strip():
+        raise ValueError('Expresión vacía.')
+    return _Parser(_tokenize(body)).parse()
+
+
+def fields(node):
+    """Set of column names referenced by an AST."""
+    if isinstance(node, Field):
+        return {node.name}
+    if isinstance(node, Unary):
+        return fields(node.operand)
+    if isinstance(node, Binary):
+        return fields(node.left) | fields(node.right)
+    if isinstance(node, Call):
+        return set().union(*(fields(a) for a in node.args)) if node.args else set()
+    return set()
+
+
+def has_aggregation(node):
+    if isinstance(node, Call):
+        return node.name in AGGREGATIONS or node.name == 'ABOVE' or any(has_aggregation(a) for a in node.args)
+    if isinstance(node, Unary):
+        return has_aggregation(node.operand)
+    if isinstance(node, Binary):
+        return has_aggregation(node.left) or has_aggregation(node.right)
+    return False
+
+
+# ── Evaluation ──
+
+class _Groups:
+    """Group codes of a dimension: codes[i] ∈ [0, n) for every row, groups sorted by value."""
+
+    def __init__(self, keys):
+        codes, uniques = pd.factorize(keys, sort=True, use_na_sentinel=False)
+        self.codes = codes
+        self.uniques = uniques
+        self.n = len(uniques)
+
+
+def _as_bool(values):
+    arr = np.asarray(values)
+    if arr.dtype == object:
+        return arr.astype(bool) & ~pd.isna(arr)
+    return np.nan_to_num(arr.astype('float64'), nan=0.0) != 0
+
+
+def _as_float(values, what):
+    try:
+        return np.asarray(values, dtype='float64')
+    except (TypeError, ValueError):
+        raise ValueError(f'Operación numérica sobre valores no numéricos en {what}.')
+
+
+def _datetime_part(values, part):
+    dt = pd.to_datetime(pd.Series(np.asarray(values)), errors='coerce')
+    return getattr(dt.dt, part).to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _aggregate(name, distinct, values, groups):
+    values = np.asarray(values)
+    if values.ndim == 0:
+        values = np.full(len(groups.codes), values.item())
+    valid = ~pd.isna(values)
+    codes = groups.codes
+
+    if name == 'COUNT':
+        if distinct:
+            pairs = pd.DataFrame({'g': codes[valid], 'v': values[valid]}).drop_duplicates()
+            return np.bincount(pairs['g'].to_numpy(), minlength=groups.n).astype('float64')
+        return np.bincount(codes[valid], minlength=groups.n).astype('float64')
+
+    if np.issubdtype(values.dtype, np.datetime64):
+        # A measure is a number per group; dates would come out as epoch nanoseconds
+        raise ValueError(f'{name.title()}() no admite campos de fecha; usa Year(), Month() o Day().')
+    nums = _as_float(values, f'{name.title()}()')
+    valid &= ~np.isnan(nums)
+    counts = np.bincount(codes[valid], minlength=groups.n).astype('float64')
+    if name in ('SUM', 'AVG'):
+        sums = np.bincount(codes[valid], weights=nums[valid], minlength=groups.n)
+        if name == 'SUM':
+            return sums
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(counts > 0, sums / counts, np.nan)
+
+    # MIN / MAX — pandas' cython group reducers over integer codes
+    reduced = pd.Series(nums[valid]).groupby(codes[valid]).agg(name.lower())
+    return reduced.reindex(range(groups.n)).to_numpy(dtype='float64')
+
+
+def _evaluate(node, df, groups):
+    """Evaluate a node in row context (groups=None) or group context."""
+    if isinstance(node, Num):
+        return np.float64(node.value)
+    if isinstance(node, Str):
+        return np.array(node.value, dtype=object)
+
+    if isinstance(node, Field):
+        if groups is not None:
+            raise ValueError(f'El campo "{node.name}" debe ir dentro de una agregación (Sum, Count...).')
+        if node.name not in df.columns:
+            raise ValueError(f'Columna no encontrada: "{node.name}"')
+        col = df[node.name]
+        if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+            return col.to_numpy(dtype='float64', na_value=np.nan)
+        if pd.api.types.is_datetime64_any_dtype(col):
+            return col.to_numpy()
+        return col.to_numpy(dtype=object)
+
+    if isinstance(node, Unary):
+        operand = _evaluate(node.operand, df, groups)
+        if node.op == 'NOT':
+            return ~_as_bool(operand)
+        return -_as_float(operand, 'el signo "-"')
+
+    if isinstance(node, Binary):
+        left = _evaluate(node.left, df, groups)
+        right = _evaluate(node.right, df, groups)
+        op = node.op
+        if op == 'AND':
+            return _as_bool(left) & _as_bool(right)
+        if op == 'OR':
+            return _as_bool(left) | _as_bool(right)
+        if op in ('=', '<>', '<', '<=', '>', '>='):
+            try:
+                result = {
+                    '=': np.equal, '<>': np.not_equal, '<': np.less,
+                    '<=': np.less_equal, '>': np.greater, '>=': np.greater_equal,
+                }[op](left, right)
+            except TypeError:
+                raise ValueError(f'No se pueden comparar valores de distinto tipo con "{op}".')
+            return np.asarray(result, dtype=bool)
+        a = _as_float(left, f'"{op}"')
+        b = _as_float(right, f'"{op}"')
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}[op](a, b)
+        return np.where(np.isinf(result), np.nan, result)
+
+    # Call
+    name = node.name
+    if name in AGGREGATIONS:
+        if groups is None:
+            raise ValueError(f'{name.title()}() no puede usarse dentro de otra agregación ni en una dimensión.')
+        return _aggregate(name, node.distinct, _evaluate(node.args[0], df, None), groups)
+
+    if name == 'ABOVE':
+        if groups is None:
+            raise ValueError('Above() solo puede usarse en medidas.')
+        values = _as_float(_evaluate(node.args[0], df, groups), 'Above()')
+        offset = int(_as_float(_evaluate(node.args[1], df, groups), 'Above()')) if len(node.args) > 1 else 1
+        values = np.broadcast_to(values, (groups.n,))
+        return pd.Series(values).shift(offset).to_numpy(dtype='float64')
+
+    args = [_evaluate(a, df, groups) for a in node.args]
+    if name == 'IF':
+        return np.where(_as_bool(args[0]), args[1], args[2])
+    if name in ('YEAR', 'MONTH', 'DAY'):
+        return _datetime_part(args[0], name.lower())
+    if name == 'ABS':
+        return np.abs(_as_float(args[0], 'Abs()'))
+    if name == 'ROUND':
+        digits = int(_as_float(args[1], 'Round()')) if len(args) > 1 else 0
+        return np.round(_as_float(args[0], 'Round()'), digits)
+    raise ValueError(f'Función desconocida: {name.title()}()')
+
+
+def evaluate_dimension(df, text):
+    """Row-level values of a dimension: a column, or a derived "=..." expression."""
+    if not is_expression(text):
+        return df[text]
+    node = parse(text)
+    if has_aggregation(node):
+        raise ValueError('Una dimensión calculada no puede contener agregaciones.')
+    values = _evaluate(node, df, None)
+    return pd.Series(np.broadcast_to(values, (len(df),)), index=df.index, name=text)
+
+
+def evaluate_measure(df, keys, text):
+    """
+    Evaluate a measure expression per group of `keys` (the row-level values
+    of the dimension, see evaluate_dimension()).
+    Returns a pd.Series indexed by the sorted dimension values.
+    """
+    node = parse(text)
+    if not has_aggregation(node):
+        raise ValueError('Una medida calculada debe contener una agregación (Sum, Count, Avg, Min, Max).')
+    groups = _Groups(keys)
+    values = np.broadcast_to(_as_float(_evaluate(node, df, groups), 'la medida'), (groups.n,))
+    return pd.Series(values, index=pd.Index(groups.uniques, name=keys.name), name=text)
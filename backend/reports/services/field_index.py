@@ -0,0 +1,138 @@
+"""
+[AGENTE_DATA_ENGINEER] — FieldIndex: distinct-value index for dimension filters.
+
+Built once per table at load time (right after the table is stored) for every
+non-float column:
+
+    app_<id>/indexes/<slug>.pkl  ← { version, fields: { field: {keys, values, counts} } }
+
+`keys` are the case-folded distinct values in sorted order, so:
+  - prefix search   → two np.searchsorted() calls, O(log n)
+  - substring search → one vectorized str.contains() over the keys
+  - counts per value and paging come for free
+
+Loaded indexes are kept in an in-process LRU, so typing in a filter box never
+re-reads the file or touches the table.
+"""
+import logging
+import os
+import uuid
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from reports.services import app_store
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Sorts after any real character: upper bound of a prefix range
+_PREFIX_END = '\U0010ffff'
+
+
+def _index_path(app_id, name):
+    return app_store.app_dir(app_id) / 'indexes' / f'{app_store.table_slug(name)}.pkl'
+
+
+def _indexable(series):
+    return not pd.api.types.is_float_dtype(series)
+
+
+def _field_index(series):
+    """Sorted distinct values of one column with their row counts."""
+    counts = series.value_counts(dropna=True, sort=False)
+    values = counts.index.astype(str)
+    keys = pd.Index(values.str.casefold())
+    order = np.argsort(keys.to_numpy(dtype=object), kind='stable')
+    return {
+        'keys': keys.to_numpy(dtype=object)[order],
+        'values': values.to_numpy(dtype=object)[order],
+        'counts': counts.to_numpy(dtype='int64')[order],
+    }
+
+
+def _write(path, index):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+    pd.to_pickle(index, tmp)
+    os.replace(tmp, path)
+
+
+def build_index(app_id, name, df, version):
+    """Index every non-float column of a freshly stored table."""
+    fields = {str(c): _field_index(df[c]) for c in df.columns if _indexable(df[c])}
+    _write(_index_path(app_id, name), {'version': version, 'fields': fields})
+    logger.info(f'[FIELD_INDEX] App {app_id}: indexed {len(fields)} fields of "{name}"')
+
+
+@lru_cache(maxsize=32)
+def _load(path, version):
+    index = pd.read_pickle(path)
+    return index if index['version'] == version else None
+
+
+def get_field_index(app_id, name, field):
+    """Index of one field, (re)building it when missing or stale."""
+    info = app_store.table_info(app_id, name)
+    if info is None:
+        raise ValueError(f'La tabla "{name}" no está cargada. Ejecuta la carga de la app primero.')
+    if field not in info['columns']:
+        raise ValueError(f'Columna no encontrada en "{name}": {field}')
+
+    path = _index_path(app_id, name)
+    try:
+        index = _load(str(path), info['version'])
+    except FileNotFoundError:
+        index = None
+    if index is not None and field in index['fields']:
+        return index['fields'][field]
+
+    # Stale, missing or non-indexed (float) field: build on demand and persist
+    df = app_store.load_table(app_id, name)
+    if index is None:
+        fields = {str(c): _field_index(df[c]) for c in df.columns if _indexable(df[c])}
+        index = {'version': info['version'], 'fields': fields}
+    if field not in index['fields']:
+        index['fields'][field] = _field_index(df[field])
+    _write(path, index)
+    _load.cache_clear()
+    return index['fields'][field]
+
+
+def search_values(app_id, name, field, query='', mode='prefix', order='value', offset=0, limit=DEFAULT_PAGE_SIZE):
+    """
+    Distinct values of a field narrowed by `query` (prefix or substring,
+    case-insensitive), ordered by value or by count, one page at a time.
+    """
+    idx = get_field_index(app_id, name, field)
+    keys = idx['keys']
+    limit = min(max(int(limit), 1), MAX_PAGE_SIZE)
+    offset = max(int(offset), 0)
+    query = (query or '').casefold()
+
+    if not query:
+        positions = np.arange(len(keys))
+    elif mode == 'contains':
+        positions = np.flatnonzero(pd.Series(keys, dtype=object).str.contains(query, regex=False).to_numpy())
+    else:
+        lo = np.searchsorted(keys, query, side='left')
+        hi = np.searchsorted(keys, query + _PREFIX_END, side='left')
+        positions = np.arange(lo, hi)
+
+    if order == 'count':
+        positions = positions[np.argsort(-idx['counts'][positions], kind='stable')]
+
+    page = positions[offset:offset + limit]
+    return {
+        'field': field,
+        'total_distinct': len(keys),
+        'matches': len(positions),
+        'offset': offset,
+        'limit': limit,
+        'values': [
+            {'value': v, 'count': int(c)}
+            for v, c in zip(idx['values'][page], idx['counts'][page])
+        ],
+    }
@@ -0,0 +1,212 @@
+"""
+[AGENTE_DATA_ENGINEER] — FileDialect: single-pass CSV dialect & encoding sniffing.
+
+Instead of trying encoding × separator combinations with a fresh pd.read_csv
+each time, ONE byte sample from the start of the file is read and used to
+detect, in a single pass:
+  - encoding        (BOM → strict UTF-8 → cp1252 → latin-1)
+  - delimiter       (the candidate giving the most consistent field count)
+  - quote character
+  - decimal / thousands separators  ("1.234,56" vs "1,234.56")
+  - header row
+
+The result is persisted per file (keyed by path, validated by size + mtime)
+under BI_STORE_ROOT/dialects/, so every later read goes straight to the
+right parser.
+"""
+import codecs
+import csv
+import hashlib
+import logging
+import re
+from pathlib import Path
+
+from django.conf import settings
+
+from reports.services.app_store import read_json, write_json
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever sniffing changes: persisted dialects of older versions are re-sniffed
+DIALECT_VERSION = 2
+SAMPLE_BYTES = 256 * 1024
+SAMPLE_LINES = 200
+DELIMITERS = [',', ';', '\t', '|']
+
+_BOMS = [
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+]
+# Bytes undefined in cp1252: their presence means latin-1
+_CP1252_UNDEFINED = {0x81, 0x8D, 0x8F, 0x90, 0x9D}
+
+_NUM_DOT = re.compile(r'^[-+]?(\d{1,3}(,\d{3})+|\d+)\.\d+$')
+_NUM_COMMA = re.compile(r'^[-+]?(\d{1,3}(\.\d{3})+|\d+),\d+$')
+_NUMBER = re.compile(r'^[-+]?[\d.,]+$')
+_INTEGER = re.compile(r'^[-+]?\d+$')
+
+
+def _cache_path(filepath):
+    key = hashlib.sha1(str(Path(filepath).resolve()).encode('utf-8')).hexdigest()
+    return Path(settings.BI_STORE_ROOT) / 'dialects' / f'{key}.json'
+
+
+def _file_stamp(filepath):
+    st = Path(filepath).stat()
+    return {'size': st.st_size, 'mtime': st.st_mtime}
+
+
+def _detect_encoding(sample, truncated):
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # A truncated sample may cut a multi-byte character at the end
+        sample.decode('utf-8', errors='strict')
+        return 'utf-8'
+    except UnicodeDecodeError as e:
+        if truncated and e.start >= len(sample) - 3:
+            return 'utf-8'
+    if _CP1252_UNDEFINED & set(sample):
+        return 'latin-1'
+    return 'cp1252'
+
+
+def _score_delimiter(lines, delimiter, quotechar):
+    """(consistency, modal field count) of parsing `lines` with a delimiter."""
+    counts = [len(row) for row in csv.reader(lines, delimiter=delimiter, quotechar=quotechar) if row]
+    if not counts:
+        return 0.0, 0
+    modal = max(set(counts), key=counts.count)
+    if modal < 2:
+        return 0.0, modal
+    return counts.count(modal) / len(counts), modal
+
+
+def _detect_quotechar(text):
+    return "'" if text.count("'") > 2 * text.count('"') and re.search(r"(^|[,;\t|])'", text, re.M) else '"'
+
+
+def _detect_numbers(rows):
+    dot = comma = 0
+    for row in rows:
+        for value in row:
+            value = value.strip()
+            if _NUM_COMMA.match(value):
+                comma += 1
+            elif _NUM_DOT.match(value):
+                dot += 1
+    if comma > dot:
+        return ',', '.'
+    return '.', None
+
+
+def _cell_kind(value):
+    """'integer', 'decimal' or the length of a text cell (None if blank)."""
+    value = value.strip()
+    if not value:
+        return None
+    if _INTEGER.match(value):
+        return 'integer'
+    if _NUMBER.match(value) and any(ch.isdigit() for ch in value):
+        return 'decimal'
+    return len(value)
+
+
+def _detect_header(rows):
+    """
+    The first row is data only if it looks like the rows below it, column by
+    column (as csv.Sniffer.has_header): an integer over a column holding
+    integers, a decimal over numbers, a text over texts of exactly its
+    length. Any column where it differs (e.g. "2023" over "5,5", "Producto"
+    over fixed-width codes) makes it a header, and so does a lack of
+    evidence (e.g. only free text).
+    """
+    if len(rows) < 2:
+        return True
+    evidence = False
+    for col, value in enumerate(rows[0]):
+        header = _cell_kind(value)
+        kinds = {_cell_kind(row[col]) for row in rows[1:] if col < len(row)} - {None}
+        if header is None or not kinds:
+            continue
+        texts = {k for k in kinds if isinstance(k, int)}
+        if texts and (len(texts) > 1 or len(texts) < len(kinds)):
+            continue  # free text or mixed text / numbers: no evidence either way
+        if header not in kinds and not (header == 'decimal' and not texts):
+            return True
+        evidence = True
+    return not evidence
+
+
+def sniff(sample, truncated=False):
+    """Detect the dialect of a CSV from a byte sample."""
+    encoding = _detect_encoding(sample, truncated)
+    text = sample.decode(encoding, errors='replace')
+    lines = text.splitlines()
+    if truncated and len(lines) > 1:
+        lines = lines[:-1]  # last line is probably cut
+    lines = lines[:SAMPLE_LINES]
+
+    quotechar = _detect_quotechar('\n'.join(lines))
+    scores = {d: _score_delimiter(lines, d, quotechar) for d in DELIMITERS}
+    best = max(DELIMITERS, key=lambda d: scores[d])
+    if scores[best][0] == 0:
+        best = ','
+
+    rows = [row for row in csv.reader(lines, delimiter=best, quotechar=quotechar) if row]
+    header = _detect_header(rows)
+    decimal, thousands = _detect_numbers(rows[1:] if header else rows)
+    if best == ',':
+        decimal, thousands = '.', None
+    return {
+        'encoding': encoding,
+        'sep': best,
+        'quotechar': quotechar,
+        'decimal': decimal,
+        'thousands': thousands,
+        'header': header,
+    }
+
+
+def detect_dialect(filepath):
+    """Dialect of a CSV file: persisted result if the file is unchanged, else sniffed."""
+    cache = _cache_path(filepath)
+    stamp = _file_stamp(filepath)
+    cached = read_json(cache)
+    if cached and cached.get('stamp') == stamp and cached.get('version') == DIALECT_VERSION:
+        return cached['dialect']
+
+    with open(filepath, 'rb') as f:
+        sample = f.read(SAMPLE_BYTES)
+    dialect = sniff(sample, truncated=len(sample) == SAMPLE_BYTES)
+    write_json(cache, {'stamp': stamp, 'version': DIALECT_VERSION, 'dialect': dialect})
+    logger.info(
+        f'[FILE_DIALECT] {Path(filepath).name}: encoding={dialect["encoding"]}, '
+        f'sep={dialect["sep"]!r}, decimal={dialect["decimal"]!r}, header={dialect["header"]}'
+    )
+    return dialect
+
+
+def csv_read_kwargs(dialect):
+    """pd.read_csv keyword arguments for a detected dialect."""
+    kwargs = {
+        'encoding': dialect['encoding'],
+        'encoding_errors': 'replace',
+        'sep': dialect['sep'],
+        'quotechar': dialect['quotechar'],
+        'decimal': dialect['decimal'],
+        'header': 0 if dialect['header'] else None,
+        'engine': 'c',
+    }
+    if dialect.get('thousands'):
+        kwargs['thousands'] = dialect['thousands']
+    return kwargs
+
+
+def remember_dialect(filepath, dialect):
+    """Persist a dialect sniffed elsewhere (e.g. while uploading) for the file as it is now."""
+    write_json(_cache_path(filepath), {
+        'stamp': _file_stamp(filepath), 'version': DIALECT_VERSION, 'dialect': dialect,
+    })
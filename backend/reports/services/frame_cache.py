@@ -0,0 +1,106 @@
+"""
+[AGENTE_DATA_ENGINEER] — FrameCache: in-process LRU cache of loaded source frames.
+
+parse_cache avoids re-PARSING a file, but every execute_load_script call
+still unpickles each source from disk. Sources shared by many data models
+and re-executed constantly are kept in memory instead:
+
+    key    = (resolved file path, source stamp (file count, newest mtime), reader variant)
+    budget = FRAME_CACHE_MAX_BYTES, measured with memory_usage(deep=True)
+
+The least recently used frames are evicted when the budget is exceeded, and
+a new stamp of a path drops the older frames of that same path. Hits, misses and evictions
+are counted per process and reported in the load log.
+
+Cached frames are shared: callers must not modify them in place.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from django.conf import settings
+
+from reports.services.multi_file import source_stamp
+
+logger = logging.getLogger(__name__)
+
+
+class FrameCache:
+    """Thread-safe LRU of DataFrames bounded by their deep memory usage."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()   # key → (df, bytes)
+        self._lock = threading.Lock()
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        _, size = self._frames.pop(key)
+        self.used_bytes -= size
+
+    def get(self, key, loader):
+        """(frame, hit): the cached frame of `key`, or loader() stored under it."""
+        with self._lock:
+            entry = self._frames.get(key)
+            if entry is not None:
+                self._frames.move_to_end(key)
+                self.hits += 1
+                return entry[0], True
+            self.misses += 1
+
+        df = loader()
+        size = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            path, stamp = key[0], key[1]
+            for old in [k for k in self._frames if k[0] == path and k[1] != stamp]:
+                self._drop(old)
+            if size > self.max_bytes:
+                return df, False
+            if key in self._frames:
+                self._drop(key)
+            self._frames[key] = (df, size)
+            self.used_bytes += size
+            while self.used_bytes > self.max_bytes:
+                self._drop(next(iter(self._frames)))
+                self.evictions += 1
+        return df, False
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+            self.used_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'frames': len(self._frames),
+                'used_bytes': self.used_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide FrameCache (created on first use)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = FrameCache(settings.FRAME_CACHE_MAX_BYTES)
+        return _cache
+
+
+def get_source_frame(filepath, variant, loader):
+    """Frame of a source file, folder or glob; returns (df, hit)."""
+    key = (str(Path(filepath).resolve()), source_stamp(filepath), variant)
+    return get_cache().get(key, loader)
@@ -0,0 +1,302 @@
+"""
+[AGENTE_DATA_ENGINEER] — JoinPlanner: cost-based ordering of load script joins.
+
+Joins are planned BEFORE any merge runs:
+
+  1. Key statistics: value counts of every join key in its source frame.
+  2. Estimates: the rows each join would produce, from those counts (exact
+     for the first join; later joins assume the key distribution of the
+     accumulated result is that of the key's source).
+  3. Ordering: within each run of consecutive 'inner' / 'left' joins (which
+     commute), the cheapest join whose left key is already available goes
+     first, so intermediates stay small. 'right' / 'outer' joins keep their
+     position. Orders that would rename columns differently are not used.
+  4. Budget: a plan whose largest intermediate exceeds JOIN_MAX_ROWS is
+     refused; above JOIN_WARN_RATIO of it, or on many-to-many keys, it runs
+     with a warning.
+  5. Spill: a plan of 'left' / 'inner' joins estimated above
+     SPILL_THRESHOLD_BYTES runs one slice of the base source at a time and
+     writes each joined slice to disk (see spill.py) instead of building the
+     whole result in memory.
+
+Text keys are merged through a shared categorical encoding (same categories
+on both sides → pandas joins on the integer codes) and restored afterwards.
+"""
+import logging
+
+import pandas as pd
+from django.conf import settings
+
+from reports.services.spill import SPILL_CHUNK_ROWS, SpilledFrame
+
+logger = logging.getLogger(__name__)
+
+JOIN_HOWS = ('left', 'right', 'inner', 'outer')
+REORDERABLE = ('left', 'inner')
+JOIN_WARN_RATIO = 0.5
+ROW_BYTES_SAMPLE = 10_000
+
+
+def _how(join):
+    how = join.get('how', 'left')
+    return how if how in JOIN_HOWS else 'left'
+
+
+def _merged_columns(columns, join, right_cols):
+    """Column → (source, column) map after merging a source into `columns`."""
+    merged = dict(columns)
+    source, lkey, rkey = join['right_source'], join['left_key'], join['right_key']
+    for col in right_cols:
+        if col == rkey and lkey == rkey:
+            continue
+        name = f'{col}_{source}' if col in columns else col
+        merged[name] = (source, col)
+    return merged
+
+
+# ── Estimation ──
+
+class _KeyStats:
+    """Value counts of the join keys, computed once per (source, column)."""
+
+    def __init__(self, dataframes):
+        self.dataframes = dataframes
+        self._counts = {}
+
+    def counts(self, source, col):
+        if (source, col) not in self._counts:
+            self._counts[(source, col)] = self.dataframes[source][col].value_counts(dropna=False)
+        return self._counts[(source, col)]
+
+
+def _row_bytes(df):
+    """Average in-memory bytes of a row, from a sample of the frame."""
+    sample = df.head(ROW_BYTES_SAMPLE)
+    return float(sample.memory_usage(deep=True, index=False).sum()) / len(sample) if len(sample) else 0.0
+
+
+def _estimate(rows, left_counts, right_counts, how):
+    """Rows of joining `rows` rows whose key follows `left_counts` with `right_counts`."""
+    left_total = left_counts.sum()
+    share = left_counts / left_total if left_total else left_counts
+    matches = right_counts.reindex(share.index, fill_value=0)
+    estimate = rows * float((share * matches).sum())
+    if how in ('left', 'outer'):
+        estimate += rows * float(share[matches.to_numpy() == 0].sum())
+    if how in ('right', 'outer'):
+        estimate += float(right_counts[~right_counts.index.isin(share.index)].sum())
+    return int(round(estimate))
+
+
+def plan_joins(joins_config, dataframes, max_rows=None):
+    """
+    Order the joins of a load script and estimate their output.
+    Returns {'base', 'listed', 'steps': [{'join', 'how', 'left', 'estimated_rows'}],
+    'estimated_bytes', 'reordered', 'warnings'} where 'left' is the (source,
+    column) the left key comes from and 'estimated_bytes' the size of the
+    largest intermediate.
+    Raises ValueError if the estimated result exceeds the row budget.
+    """
+    max_rows = max_rows or settings.JOIN_MAX_ROWS
+    base = joins_config[0]['left_source']
+    for source in [base] + [j['right_source'] for j in joins_config]:
+        if dataframes.get(source) is None:
+            side = 'izquierda' if source == base else 'derecha'
+            raise ValueError(f'Fuente {side} {source} no encontrada.')
+
+    stats = _KeyStats(dataframes)
+    warnings = []
+
+    def step_estimate(columns, rows, join):
+        lkey, rkey = join['left_key'], join['right_key']
+        if lkey not in columns:
+            return None
+        if rkey not in dataframes[join['right_source']].columns:
+            raise ValueError(f'La clave "{rkey}" no existe en la fuente {join["right_source"]}.')
+        return _estimate(
+            rows, stats.counts(*columns[lkey]), stats.counts(join['right_source'], rkey), _how(join),
+        )
+
+    def walk(order):
+        """Estimated steps of joining in `order`; returns (steps, columns)."""
+        columns = {c: (base, c) for c in dataframes[base].columns}
+        rows = len(dataframes[base])
+        steps = []
+        for join in order:
+            est = step_estimate(columns, rows, join)
+            if est is None:
+                raise ValueError(
+                    f'La clave "{join["left_key"]}" no existe en el resultado de las uniones anteriores.'
+                )
+            steps.append({
+                'join': join, 'how': _how(join),
+                'left': columns[join['left_key']], 'estimated_rows': est,
+            })
+            columns = _merged_columns(columns, join, dataframes[join['right_source']].columns)
+            rows = est
+        return steps, columns
+
+    # Runs of commuting joins are ordered cheapest-first; others stay in place
+    segments, current = [], []
+    for join in joins_config:
+        if _how(join) in REORDERABLE:
+            current.append(join)
+        else:
+            segments += [current, [join]] if current else [[join]]
+            current = []
+    if current:
+        segments.append(current)
+
+    order = []
+    columns = {c: (base, c) for c in dataframes[base].columns}
+    rows = len(dataframes[base])
+    for segment in segments:
+        pending = list(segment)
+        while pending:
+            candidates = [(step_estimate(columns, rows, j), i, j) for i, j in enumerate(pending)]
+            ready = [c for c in candidates if c[0] is not None]
+            est, i, join = min(ready, key=lambda c: (c[0], c[1])) if ready else (None, 0, pending[0])
+            pending.pop(i)
+            order.append(join)
+            if est is None:
+                break
+            columns = _merged_columns(columns, join, dataframes[join['right_source']].columns)
+            rows = est
+        order += pending
+
+    listed_steps, listed_columns = walk(joins_config)
+    steps = listed_steps
+    if order != list(joins_config):
+        planned_steps, planned_columns = walk(order)
+        if planned_columns == listed_columns:
+            steps = planned_steps
+        else:
+            logger.info('[JOIN_PLANNER] Reordering would rename columns; keeping the listed order')
+    reordered = steps is not listed_steps
+
+    peak = max(s['estimated_rows'] for s in steps)
+    if peak > max_rows:
+        raise ValueError(
+            f'Las uniones producirían ~{peak:,} filas (límite {max_rows:,}). '
+            f'Revisa las claves de unión o reduce las fuentes.'
+        )
+    if peak > max_rows * JOIN_WARN_RATIO:
+        warnings.append(f'Las uniones producirán ~{peak:,} filas (límite {max_rows:,}).')
+    for step in steps:
+        join = step['join']
+        left_counts = stats.counts(*step['left'])
+        right_counts = stats.counts(join['right_source'], join['right_key'])
+        if len(left_counts) and len(right_counts) and left_counts.max() > 1 and right_counts.max() > 1:
+            warnings.append(
+                f'Unión muchos a muchos: {join["left_key"]} ↔ {join["right_key"]} '
+                f'(claves repetidas en ambos lados).'
+            )
+
+    # Intermediate sizes: each join widens the rows by the right source's columns
+    row_bytes = _row_bytes(dataframes[base])
+    estimated_bytes = int(row_bytes * len(dataframes[base]))
+    for step in steps:
+        row_bytes += _row_bytes(dataframes[step['join']['right_source']])
+        estimated_bytes = max(estimated_bytes, int(row_bytes * step['estimated_rows']))
+
+    for w in warnings:
+        logger.warning(f'[JOIN_PLANNER] {w}')
+    logger.info(
+        f'[JOIN_PLANNER] {len(steps)} joins{" (reordered)" if reordered else ""}, '
+        f'estimated rows: {[s["estimated_rows"] for s in steps]}, '
+        f'~{estimated_bytes / 1024 / 1024:.0f} MB'
+    )
+    return {
+        'base': base, 'steps': steps, 'listed': list(joins_config),
+        'estimated_bytes': estimated_bytes, 'reordered': reordered, 'warnings': warnings,
+    }
+
+
+def should_spill(plan):
+    """
+    True if the plan's result should be written to disk instead of held in
+    memory. Only 'left' / 'inner' joins can run slice by slice of the base
+    source; 'right' / 'outer' ones stay in memory (bounded by JOIN_MAX_ROWS).
+    """
+    return (
+        plan['estimated_bytes'] > settings.SPILL_THRESHOLD_BYTES
+        and all(step['how'] in REORDERABLE for step in plan['steps'])
+    )
+
+
+# ── Execution ──
+
+def _is_text(series):
+    return not pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_datetime64_any_dtype(series)
+
+
+def _shared_encoding(left, lkey, right, rkey):
+    """Text keys of both sides as categoricals with the same categories."""
+    lvals, rvals = left[lkey], right[rkey]
+    if not (_is_text(lvals) and _is_text(rvals)):
+        return left, right
+    categories = pd.Index(lvals.dropna().unique()).append(pd.Index(rvals.dropna().unique())).unique()
+    dtype = pd.CategoricalDtype(categories)
+    return left.assign(**{lkey: lvals.astype(dtype)}), right.assign(**{rkey: rvals.astype(dtype)})
+
+
+def execute_plan(plan, dataframes):
+    """Run the planned joins; returns the joined DataFrame."""
+    result = dataframes[plan['base']]
+    for step in plan['steps']:
+        join = step['join']
+        source, lkey, rkey = join['right_source'], join['left_key'], join['right_key']
+        right = dataframes[source]
+        dtypes = {lkey: result[lkey].dtype}
+        if rkey != lkey:
+            dtypes[f'{rkey}_{source}' if rkey in result.columns else rkey] = right[rkey].dtype
+
+        left_enc, right_enc = _shared_encoding(result, lkey, right, rkey)
+        result = pd.merge(
+            left_enc, right_enc,
+            left_on=lkey, right_on=rkey, how=step['how'],
+            suffixes=('', f'_{source}'),
+        )
+        # Restore the key dtypes the encoding replaced
+        for col, dtype in dtypes.items():
+            if col in result.columns and result[col].dtype != dtype:
+                result[col] = result[col].astype(dtype)
+        logger.info(
+            f'[JOIN_PLANNER] Join: {lkey} ↔ {rkey} ({step["how"]}) → {len(result)} rows '
+            f'(estimated {step["estimated_rows"]})'
+        )
+
+    # Same column order as joining in the listed order
+    expected = {c: (plan['base'], c) for c in dataframes[plan['base']].columns}
+    for join in plan['listed']:
+        expected = _merged_columns(expected, join, dataframes[join['right_source']].columns)
+    if set(expected) == set(result.columns):
+        result = result[list(expected)]
+    return result
+
+
+def execute_plan_spilled(plan, dataframes):
+    """
+    execute_plan() one slice of the base source at a time, each joined slice
+    appended to a SpilledFrame (same rows, in the same order). Slices are
+    sized so that a joined slice has about SPILL_CHUNK_ROWS rows.
+    """
+    base = dataframes[plan['base']]
+    peak_rows = max([len(base)] + [step['estimated_rows'] for step in plan['steps']])
+    slice_rows = max(1, int(SPILL_CHUNK_ROWS * len(base) / max(peak_rows, 1)))
+
+    spilled = SpilledFrame()
+    try:
+        for start in range(0, len(base), slice_rows):
+            part = {**dataframes, plan['base']: base.iloc[start:start + slice_rows]}
+            spilled.append(execute_plan(plan, part))
+        if not spilled.chunks:
+            spilled.append(execute_plan(plan, dataframes))
+    except BaseException:
+        spilled.cleanup()
+        raise
+    logger.info(
+        f'[JOIN_PLANNER] Spilled {len(spilled)} rows in {len(spilled.chunks)} chunks '
+        f'({spilled.nbytes / 1024 / 1024:.1f} MB on disk) to {spilled.directory.name}'
+    )
+    return spilled
@@ -0,0 +1,188 @@
+"""
+[AGENTE_DATA_ENGINEER] — LoadPlanner: memory-budgeted choice of how to read a source.
+
+Before a file is read, its decoded in-memory size is estimated:
+
+  1. Row width: deep memory usage per row of every column, measured on the
+     first SAMPLE_ROWS rows parsed with the real dtypes.
+  2. Rows: Parquet statistics, the QVD header or the CSV line density
+     (qlik_parser.estimate_rows), capped by the caller's row limit.
+  3. Parse overhead: peak / final memory of the format's reader.
+
+The estimate is memoized by file content (see parse_cache.py). Against
+LOAD_MEMORY_BUDGET_BYTES the planner picks one strategy:
+
+  - full:      the whole (row-capped) file fits
+  - projected: the caller needs some columns only, and those fit
+  - chunked:   the source is streamed in chunks sized to the budget and
+               folded into aggregates (CSV, QVD or a Parquet copy only)
+  - reject:    nothing fits; a clear ValueError instead of an OOM
+"""
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+
+from reports.services import columnar_store, parse_cache
+
+logger = logging.getLogger(__name__)
+
+ESTIMATE_VERSION = 1
+SAMPLE_ROWS = 2_000
+MIN_CHUNK_ROWS = 1_000
+# Peak memory while parsing / memory of the parsed frame
+PARSE_OVERHEAD = {'.csv': 2.0, '.xlsx': 3.0, '.xls': 3.0, '.qvd': 1.5, '.parquet': 1.5}
+STREAMABLE_EXTENSIONS = ('.csv', '.qvd')
+STRATEGIES = ('full', 'projected', 'chunked', 'reject')
+
+
+def _mb(nbytes):
+    return f'{nbytes / 1024 / 1024:,.0f}'
+
+
+def _read_sample(filepath, sheets):
+    from reports.services.excel_reader import read_excel
+    from reports.services.file_dialect import csv_read_kwargs, detect_dialect
+    from reports.services.qvd_native import read_qvd
+
+    if sheets is None:
+        df = columnar_store.read_columnar(filepath, nrows=SAMPLE_ROWS)
+        if df is not None:
+            return df, '.parquet'
+    ext = Path(filepath).suffix.lower()
+    if ext == '.csv':
+        return pd.read_csv(filepath, nrows=SAMPLE_ROWS, **csv_read_kwargs(detect_dialect(filepath))), ext
+    if ext in ('.xlsx', '.xls'):
+        return read_excel(filepath, sheets=sheets, nrows=SAMPLE_ROWS), ext
+    if ext == '.qvd':
+        return read_qvd(filepath, stop=SAMPLE_ROWS), ext
+    raise ValueError(f'Formato no soportado: {ext}')
+
+
+def _estimate_file(filepath, sheets):
+    """{'rows', 'column_bytes': {col: bytes per row}, 'overhead'} of one file."""
+    from reports.services.qlik_parser import estimate_rows
+
+    sample, fmt = _read_sample(filepath, sheets)
+    usage = sample.memory_usage(deep=True, index=False)
+    per_row = usage / max(len(sample), 1)
+    # A sample shorter than requested is the whole file
+    rows = len(sample) if len(sample) < SAMPLE_ROWS else estimate_rows(filepath)
+    return {
+        'rows': rows,
+        'column_bytes': {str(col): float(b) for col, b in per_row.items()},
+        'overhead': PARSE_OVERHEAD.get(fmt, 2.0),
+    }
+
+
+def estimate_source(filepath, sheets=None):
+    """
+    Decoded-size estimate of a file or folder / glob source (memoized per
+    file content). 'rows' is None when the format does not tell it cheaply.
+    """
+    from reports.services.multi_file import source_files
+
+    suffix = ''
+    if sheets is not None:
+        suffix = '_' + hashlib.sha1(json.dumps(sheets, ensure_ascii=False).encode('utf-8')).hexdigest()[:10]
+    kind = f'load_estimate_v{ESTIMATE_VERSION}{suffix}'
+
+    estimates = [
+        parse_cache.get_result(str(f), kind, lambda path: _estimate_file(path, sheets))
+        for f in source_files(filepath)
+    ]
+    column_bytes = {}
+    for e in estimates:
+        for col, b in e['column_bytes'].items():
+            column_bytes[col] = max(column_bytes.get(col, 0.0), b)
+    rows = [e['rows'] for e in estimates]
+    return {
+        'rows': sum(rows) if all(r is not None for r in rows) else None,
+        'column_bytes': column_bytes,
+        'overhead': max(e['overhead'] for e in estimates),
+    }
+
+
+def can_stream(filepath):
+    """True if the source can be read chunk by chunk at bounded memory."""
+    from reports.services.multi_file import source_files
+
+    return all(
+        f.suffix.lower() in STREAMABLE_EXTENSIONS
+        or (columnar_store.is_available() and columnar_store.columnar_path(f).exists())
+        for f in source_files(filepath)
+    )
+
+
+def plan_load(filepath, columns=None, sheets=None, nrows=None, chunk_rows=None, budget=None):
+    """
+    Pick how to read a source within the memory budget.
+    `columns`: the columns the caller needs (None = all); `nrows`: the
+    caller's row cap; `chunk_rows`: preferred chunk size, for callers that
+    can stream (None = a DataFrame is needed, never 'chunked').
+    Returns {'strategy', 'rows', 'estimated_bytes', 'bytes', 'chunk_rows',
+    'budget', 'reason'} where 'bytes' is what the chosen strategy needs.
+    """
+    budget = budget or settings.LOAD_MEMORY_BUDGET_BYTES
+    estimate = estimate_source(filepath, sheets)
+    rows = estimate['rows']
+    if nrows is not None and (rows is None or rows > nrows):
+        rows = nrows
+    row_bytes = sum(estimate['column_bytes'].values()) * estimate['overhead']
+    wanted = [str(c) for c in columns or [] if str(c) in estimate['column_bytes']]
+    projected_row_bytes = sum(estimate['column_bytes'][c] for c in wanted) * estimate['overhead']
+
+    plan = {
+        'strategy': 'reject', 'rows': rows, 'estimated_bytes': None, 'bytes': None,
+        'chunk_rows': None, 'budget': budget, 'reason': None,
+    }
+    if rows is None:
+        # Unknown length and no row cap: only a streamed read is bounded
+        logger.info(f'[LOAD_PLANNER] {Path(filepath).name}: row count unknown')
+    elif wanted and len(wanted) < len(estimate['column_bytes']):
+        # The caller reads only its columns: that is what has to fit
+        plan['estimated_bytes'] = int(rows * projected_row_bytes)
+        if plan['estimated_bytes'] <= budget:
+            plan.update(strategy='projected', bytes=plan['estimated_bytes'])
+    else:
+        plan['estimated_bytes'] = int(rows * row_bytes)
+        if plan['estimated_bytes'] <= budget:
+            plan.update(strategy='full', bytes=plan['estimated_bytes'])
+
+    if chunk_rows and can_stream(filepath):
+        fit = int(budget // row_bytes) if row_bytes else chunk_rows
+        plan['chunk_rows'] = min(chunk_rows, fit)
+        if plan['strategy'] == 'reject' and plan['chunk_rows'] >= MIN_CHUNK_ROWS:
+            plan.update(strategy='chunked', bytes=int(plan['chunk_rows'] * row_bytes))
+        elif plan['chunk_rows'] < MIN_CHUNK_ROWS:
+            plan['chunk_rows'] = None
+
+    if plan['strategy'] == 'reject':
+        needed = f'~{_mb(plan["estimated_bytes"])} MB' if plan['estimated_bytes'] else 'una cantidad desconocida'
+        plan['reason'] = (
+            f'"{Path(filepath).name}" necesitaría {needed} de memoria para cargarse '
+            f'(presupuesto {_mb(budget)} MB). Selecciona menos columnas o divide el archivo.'
+        )
+    logger.info(
+        f'[LOAD_PLANNER] {Path(filepath).name}: {plan["strategy"]} '
+        f'(rows={rows}, estimated={_mb(plan["estimated_bytes"] or 0)} MB, budget={_mb(budget)} MB)'
+    )
+    return plan
+
+
+def check_budget(plans, budget=None):
+    """Raise ValueError if the sources of one request do not fit the budget together."""
+    budget = budget or settings.LOAD_MEMORY_BUDGET_BYTES
+    for plan in plans:
+        if plan['strategy'] == 'reject':
+            raise ValueError(plan['reason'])
+    total = sum(plan['bytes'] or 0 for plan in plans)
+    if total > budget:
+        raise ValueError(
+            f'Las fuentes necesitarían ~{_mb(total)} MB de memoria en conjunto '
+            f'(presupuesto {_mb(budget)} MB). Selecciona menos columnas o fuentes.'
+        )
+    return total
@@ -0,0 +1,162 @@
+"""
+[AGENTE_DATA_ENGINEER] — MultiFile: one logical table from a folder or glob of files.
+
+A source path may name a directory or a glob of same-schema files instead of
+a single file (e.g. monthly exports), relative to the folder of the user's
+uploads (see uploads.user_root) and never resolving outside it:
+
+    <upload id>/               ← every .csv / .xlsx / .xls / .qvd inside
+    */ventas_2024_*.csv        ← the files matching the pattern
+
+Files of uploads still in progress are never read: their folder holds an
+IN_PROGRESS_MARKER until the last byte lands (see uploads.py), so folders and
+globs skip them and a path naming one is refused.
+
+Every file is parsed through parse_cache on its own: when a new month
+arrives only the new file is parsed, the others are cache hits. Large files
+not parsed yet are read in parallel as etl_pool jobs. The frames are
+concatenated in file-name order with a `_file` column naming the origin of
+every row; files whose columns differ from the first one are rejected.
+With a row limit every file still contributes its share of rows, so the
+newest periods are never left out of a preview.
+
+The combined source is content-addressed by the digests of its files (see
+parse_cache.file_digest), so its cached results change when any file does.
+"""
+import glob
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from reports.services import etl_pool, parse_cache
+
+logger = logging.getLogger(__name__)
+
+SOURCE_FILE_COLUMN = '_file'
+MULTI_FILE_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.qvd')
+GLOB_CHARS = ('*', '?', '[')
+# Present in the folder of a file that is still being written
+IN_PROGRESS_MARKER = '.uploading'
+
+
+def is_multi_source(filepath):
+    """True if the path is a directory or a glob pattern (not an existing file)."""
+    path = Path(filepath)
+    if path.is_file():
+        return False
+    return path.is_dir() or any(ch in str(filepath) for ch in GLOB_CHARS)
+
+
+def is_in_progress(filepath):
+    """True while the file is still being uploaded."""
+    return (Path(filepath).parent / IN_PROGRESS_MARKER).exists()
+
+
+def source_files(filepath):
+    """Files of a source, sorted by name ([filepath] for a single file)."""
+    if not is_multi_source(filepath):
+        return [Path(filepath)]
+    path = Path(filepath)
+    candidates = path.iterdir() if path.is_dir() else (Path(p) for p in glob.glob(str(filepath)))
+    files = sorted(
+        (
+            p for p in candidates
+            if p.is_file() and p.suffix.lower() in MULTI_FILE_EXTENSIONS and not is_in_progress(p)
+        ),
+        key=lambda p: p.name,
+    )
+    if not files:
+        raise ValueError(f'No hay archivos de datos que coincidan con "{path.name}".')
+    return files
+
+
+def source_stamp(filepath):
+    """Cheap change marker of a source: file count and newest mtime."""
+    files = source_files(filepath)
+    return len(files), max(f.stat().st_mtime_ns for f in files)
+
+
+def resolve_source_path(relative, root):
+    """
+    Absolute path of a file, folder or glob given relative to `root`.
+    Every file it names must really be inside `root` once symlinks are
+    resolved and completely uploaded; anything else is refused.
+    """
+    path = Path(relative)
+    if path.is_absolute() or '..' in path.parts:
+        raise ValueError(f'Ruta de origen no permitida: "{relative}"')
+    root = Path(root).resolve()
+    absolute = root / path
+    files = source_files(absolute)
+    if any(not f.resolve().is_relative_to(root) for f in files):
+        raise ValueError(f'Ruta de origen no permitida: "{relative}"')
+    if any(is_in_progress(f) for f in files):
+        raise ValueError(f'El archivo "{relative}" todavía se está subiendo.')
+    return str(absolute)
+
+
+# ── Reading ──
+
+def _read_one(filepath, reader, variant):
+    return parse_cache.get_frame(filepath, reader, variant=variant)
+
+
+def _combine(files, frames):
+    columns = list(frames[0].columns)
+    for f, df in zip(files[1:], frames[1:]):
+        if set(df.columns) != set(columns):
+            raise ValueError(f'"{f.name}" no tiene las mismas columnas que "{files[0].name}".')
+    df = pd.concat([frame[columns] for frame in frames], ignore_index=True)
+    codes = np.repeat(np.arange(len(frames)), [len(frame) for frame in frames])
+    df[SOURCE_FILE_COLUMN] = pd.Categorical.from_codes(codes, categories=[f.name for f in files])
+    return df
+
+
+def read_files(filepath, reader, variant, nrows=None):
+    """
+    One DataFrame of every file of a folder / glob source, each parsed by
+    `reader(path)` at most once per content. With `nrows`, every file
+    contributes an equal share of them (files shorter than their share leave
+    the rest to the following ones).
+    """
+    files = source_files(filepath)
+    step = max(1, settings.ETL_POOL_WORKERS)
+    remaining = nrows
+    frames = []
+
+    for start in range(0, len(files), step):
+        batch = [str(f) for f in files[start:start + step]]
+        # Only large files not parsed yet go to the pool
+        missing = [f for f in batch if not parse_cache.has_frame(f, variant)]
+        parsed = {}
+        if len(missing) > 1 and etl_pool.should_offload(source_bytes=sum(Path(f).stat().st_size for f in missing)):
+            results = etl_pool.run_many(
+                'reports.services.multi_file:_read_one', [(f, reader, variant) for f in missing],
+            )
+            parsed = dict(zip(missing, results))
+        for f in batch:
+            df = parsed.pop(f) if f in parsed else _read_one(f, reader, variant)
+            if nrows:
+                df = df.head(remaining // (len(files) - len(frames)))
+                remaining -= len(df)
+            frames.append(df)
+
+    df = _combine(files, frames)
+    logger.info(f'[MULTI_FILE] {Path(filepath).name}: {len(files)} files → {len(df)} rows')
+    return df
+
+
+def iter_files_chunks(filepath, iter_chunks):
+    """Chunks of every file in turn (`iter_chunks(path)`), tagged with their file."""
+    files = source_files(filepath)
+    columns = None
+    for f in files:
+        for chunk in iter_chunks(str(f)):
+            if columns is None:
+                columns = list(chunk.columns)
+            elif set(chunk.columns) != set(columns):
+                raise ValueError(f'"{f.name}" no tiene las mismas columnas que "{files[0].name}".')
+            yield chunk[columns].assign(**{SOURCE_FILE_COLUMN: f.name})
@@ -0,0 +1,189 @@
+"""
+[AGENTE_DATA_ENGINEER] — ParseCache: content-addressed cache of parsed files.
+
+Files are keyed by the SHA-256 of their CONTENT (streamed in 1 MB blocks),
+not by path or upload, so re-uploading or re-opening the same export — by any
+user, after any restart — never parses it twice:
+
+    BI_STORE_ROOT/parse_cache/<digest[:2]>/<digest>/
+        frame_v<READER_VERSION>_<variant>.pkl  ← parsed DataFrame (per reader variant)
+        <kind>.json                            ← computed metadata / chart JSON
+
+READER_VERSION is bumped whenever the readers change what they return for
+the same bytes, so frames parsed by older code are never served.
+
+Entries are touched on every hit. Each process keeps a running total of the
+cache size (a full scan on first use and at every eviction, plus the files
+it writes itself); only when that total passes PARSE_CACHE_MAX_BYTES is the
+directory scanned and the least recently used entries evicted.
+"""
+import hashlib
+import logging
+import os
+import shutil
+import threading
+import uuid
+from functools import lru_cache
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+
+from reports.services.app_store import read_json, write_json
+
+logger = logging.getLogger(__name__)
+
+HASH_BLOCK_BYTES = 1024 * 1024
+READER_VERSION = 1
+# Digests handed over by remember_digest(), keyed like _digest()
+_known_digests = {}
+# Cache root → size on disk as last scanned, plus what this process wrote since
+_tracked_bytes = {}
+_size_lock = threading.Lock()
+
+
+def cache_root():
+    return Path(settings.BI_STORE_ROOT) / 'parse_cache'
+
+
+@lru_cache(maxsize=256)
+def _digest(path, size, mtime_ns):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while block := f.read(HASH_BLOCK_BYTES):
+            h.update(block)
+    return h.hexdigest()
+
+
+def file_digest(filepath):
+    """
+    SHA-256 of a file's content; re-hashed only when size or mtime change.
+    A folder / glob source (see multi_file.py) hashes the digests of its files.
+    """
+    from reports.services.multi_file import is_multi_source, source_files
+    if is_multi_source(filepath):
+        members = '\n'.join(f'{f.name}:{file_digest(f)}' for f in source_files(filepath))
+        return hashlib.sha256(members.encode('utf-8')).hexdigest()
+    path = Path(filepath).resolve()
+    st = path.stat()
+    known = _known_digests.get((str(path), st.st_size, st.st_mtime_ns))
+    return known or _digest(str(path), st.st_size, st.st_mtime_ns)
+
+
+def remember_digest(filepath, digest):
+    """Record a digest computed elsewhere (e.g. while uploading) for the file as it is now."""
+    path = Path(filepath).resolve()
+    st = path.stat()
+    _known_digests[(str(path), st.st_size, st.st_mtime_ns)] = digest
+
+
+def _entry_dir(digest):
+    return cache_root() / digest[:2] / digest
+
+
+def _touch(entry):
+    try:
+        os.utime(entry)
+    except FileNotFoundError:
+        pass
+
+
+def _frame_name(variant):
+    return f'frame_v{READER_VERSION}_{variant}.pkl'
+
+
+def _track(nbytes):
+    """Count a newly written file; evict once the running total passes the limit."""
+    root = str(cache_root())
+    with _size_lock:
+        total = _tracked_bytes.get(root)
+        if total is not None:
+            total = _tracked_bytes[root] = total + nbytes
+    if total is None or total > settings.PARSE_CACHE_MAX_BYTES:
+        evict()
+
+
+def has_frame(filepath, variant='default'):
+    """True if get_frame() would be a cache hit."""
+    return (_entry_dir(file_digest(filepath)) / _frame_name(variant)).exists()
+
+
+def get_frame(filepath, reader, variant='default'):
+    """DataFrame of `reader(filepath)`, parsed at most once per file content."""
+    entry = _entry_dir(file_digest(filepath))
+    path = entry / _frame_name(variant)
+    try:
+        df = pd.read_pickle(path)
+        _touch(entry)
+        logger.info(f'[PARSE_CACHE] Frame hit: {Path(filepath).name} ({variant})')
+        return df
+    except (FileNotFoundError, EOFError):
+        pass
+
+    df = reader(filepath)
+    entry.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(f'.{uuid.uuid4().hex}.tmp')
+    df.to_pickle(tmp)
+    os.replace(tmp, path)
+    _track(path.stat().st_size)
+    return df
+
+
+def get_result(filepath, kind, compute):
+    """JSON-serializable `compute(filepath)`, computed at most once per file content."""
+    entry = _entry_dir(file_digest(filepath))
+    path = entry / f'{kind}.json'
+    cached = read_json(path)
+    if cached is not None:
+        _touch(entry)
+        logger.info(f'[PARSE_CACHE] Result hit: {Path(filepath).name} ({kind})')
+        return cached['result']
+
+    result = compute(filepath)
+    write_json(path, {'result': result})
+    _track(path.stat().st_size)
+    # Return what a later hit returns (JSON round-trip), so callers see one shape
+    return read_json(path, default={'result': result})['result']
+
+
+def _entry_size(entry):
+    return sum(f.stat().st_size for f in entry.iterdir() if f.is_file())
+
+
+def evict(max_bytes=None):
+    """Remove least recently used entries until the cache fits in max_bytes."""
+    max_bytes = settings.PARSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    root = cache_root()
+    if not root.exists():
+        with _size_lock:
+            _tracked_bytes[str(root)] = 0
+        return 0
+
+    entries = []
+    for entry in root.glob('*/*'):
+        try:
+            entries.append((entry.stat().st_mtime, _entry_size(entry), entry))
+        except FileNotFoundError:
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        removed += 1
+    with _size_lock:
+        _tracked_bytes[str(root)] = total
+    if removed:
+        logger.info(f'[PARSE_CACHE] Evicted {removed} entries ({total / 1024 / 1024:.1f} MB kept)')
+    return removed
+
+
+def clear():
+    """Drop the whole cache."""
+    shutil.rmtree(cache_root(), ignore_errors=True)
+    _digest.cache_clear()
+    with _size_lock:
+        _tracked_bytes.pop(str(cache_root()), None)
@@ -0,0 +1,235 @@
+"""
+[AGENTE_DATA_ENGINEER] — PivotEngine: server-side pivot tables over app tables.
+
+rows × columns × measures with subtotals and grand totals:
+  1. ONE vectorized group-by at the finest grain (rows + columns) computes the
+     additive components of every measure (sum, count, min, max)
+  2. Subtotals (each prefix of `rows`) and grand totals are re-aggregated from
+     that small base frame — the fact table is never scanned again
+     (except count_distinct, which is not re-aggregable)
+  3. Results are paged over top-level row groups: only the requested page is
+     serialized, so huge pivots never reach JSON in full
+
+Request:
+{
+    "source": "Ventas",
+    "rows": ["Region", "Vendedor"],
+    "columns": ["Año"],
+    "measures": [{"field": "Importe", "aggregation": "sum"}],
+    "page": 1, "page_size": 50
+}
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+
+from reports.services import app_store
+
+logger = logging.getLogger(__name__)
+
+PIVOT_AGGREGATIONS = ('sum', 'count', 'avg', 'min', 'max', 'count_distinct')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Maximum distinct column combinations (width of the pivot)
+MAX_PIVOT_COLUMNS = 200
+# Maximum output rows (leaves + subtotals) in a single page
+MAX_PIVOT_PAGE_ROWS = 5_000
+
+# Components needed to (re)build each aggregation, and how they re-aggregate
+_COMPONENTS = {
+    'sum': ('sum',),
+    'count': ('count',),
+    'avg': ('sum', 'count'),
+    'min': ('min',),
+    'max': ('max',),
+    'count_distinct': (),
+}
+_REAGGREGATE = {'sum': 'sum', 'count': 'sum', 'min': 'min', 'max': 'max'}
+
+
+def _validate(df, spec):
+    rows = list(spec.get('rows') or [])
+    columns = list(spec.get('columns') or [])
+    measures = [
+        {'field': m.get('field'), 'aggregation': m.get('aggregation') or 'sum'}
+        for m in spec.get('measures') or [] if isinstance(m, dict)
+    ]
+    if not rows:
+        raise ValueError('El pivot necesita al menos un campo en filas.')
+    if not measures:
+        raise ValueError('El pivot necesita al menos una medida.')
+    if set(rows) & set(columns):
+        raise ValueError('Un campo no puede estar en filas y columnas a la vez.')
+    for field in rows + columns + [m['field'] for m in measures]:
+        if field not in df.columns:
+            raise ValueError(f'Columna no encontrada: "{field}"')
+    for m in measures:
+        if m['aggregation'] not in PIVOT_AGGREGATIONS:
+            raise ValueError(f'Agregación no soportada: "{m["aggregation"]}"')
+        if m['aggregation'] not in ('count', 'count_distinct') and not pd.api.types.is_numeric_dtype(df[m['field']]):
+            raise ValueError(f'La medida "{m["field"]}" no es numérica.')
+    return rows, columns, measures
+
+
+def _base_frame(df, keys, measures):
+    """Single group-by pass computing every additive component at the finest grain."""
+    named = {}
+    for m in measures:
+        for comp in _COMPONENTS[m['aggregation']]:
+            named[f'{m["field"]}|{comp}'] = pd.NamedAgg(column=m['field'], aggfunc=comp)
+    grouped = df.groupby(keys, dropna=False, sort=False, observed=True)
+    base = grouped.agg(**named) if named else grouped.size().to_frame('__size__')
+    return base
+
+
+def _reaggregate(base, keys):
+    """Aggregate the base frame up to a coarser grain (keys may be empty)."""
+    funcs = {c: _REAGGREGATE[c.rsplit('|', 1)[1]] for c in base.columns if '|' in c}
+    if not funcs:
+        funcs = {'__size__': 'sum'}
+    if not keys:
+        return base.agg(funcs).to_frame().T
+    return base.groupby(level=keys, dropna=False, sort=False).agg(funcs)
+
+
+def _measure_values(df, agg, keys, measures):
+    """Final measure columns (m0, m1, ...) for one grain."""
+    out = pd.DataFrame(index=agg.index)
+    for i, m in enumerate(measures):
+        field, aggregation = m['field'], m['aggregation']
+        if aggregation == 'avg':
+            counts = agg[f'{field}|count']
+            out[f'm{i}'] = agg[f'{field}|sum'] / counts.where(counts != 0)
+        elif aggregation == 'count_distinct':
+            if keys:
+                out[f'm{i}'] = df.groupby(keys, dropna=False, sort=False, observed=True)[field].nunique()
+            else:
+                out[f'm{i}'] = df[field].nunique()
+        else:
+            out[f'm{i}'] = agg[f'{field}|{aggregation}']
+    return out
+
+
+def _to_json_values(values):
+    arr = np.asarray(values, dtype='float64')
+    return [None if np.isnan(v) else round(float(v), 2) for v in arr]
+
+
+def _label(value):
+    return None if pd.isna(value) else str(value)
+
+
+def _sorted_unique(values):
+    uniques = pd.Index(values).unique()
+    try:
+        return uniques.sort_values(na_position='last')
+    except TypeError:
+        return pd.Index(sorted(uniques, key=lambda v: (pd.isna(v), str(v))))
+
+
+def build_pivot(df, spec):
+    """Compute one page of a pivot table over a DataFrame."""
+    rows, columns, measures = _validate(df, spec)
+    page = max(int(spec.get('page') or 1), 1)
+    page_size = min(max(int(spec.get('page_size') or DEFAULT_PAGE_SIZE), 1), MAX_PAGE_SIZE)
+
+    df = df[list(dict.fromkeys(rows + columns + [m['field'] for m in measures]))]
+    base = _base_frame(df, rows + columns, measures)
+
+    # Column axis
+    if columns:
+        col_totals = _measure_values(df, _reaggregate(base, columns), columns, measures)
+        column_keys = _sorted_unique(col_totals.index)
+        if len(column_keys) > MAX_PIVOT_COLUMNS:
+            raise ValueError(
+                f'El pivot tiene {len(column_keys)} combinaciones de columnas '
+                f'(máximo {MAX_PIVOT_COLUMNS}). Reduce los campos de columna.'
+            )
+    else:
+        col_totals, column_keys = None, pd.Index([])
+
+    # Page over top-level row groups
+    top_keys = _sorted_unique(_reaggregate(base, rows[:1]).index)
+    total_groups = len(top_keys)
+    page_keys = top_keys[(page - 1) * page_size: page * page_size]
+    in_page = base.index.get_level_values(0).isin(page_keys)
+    page_base = base[in_page]
+    page_df = df[df[rows[0]].isin(page_keys)] if any(m['aggregation'] == 'count_distinct' for m in measures) else df
+
+    # Every row level: subtotal levels 1..n-1 plus the leaves
+    ck_tuples = [ck if isinstance(ck, tuple) else (ck,) for ck in column_keys]
+    ranks = [_sorted_unique(page_base.index.get_level_values(i)) for i in range(len(rows))]
+    emitted = []
+    for level in range(1, len(rows) + 1):
+        keys = rows[:level]
+        totals = _measure_values(page_df, _reaggregate(page_base, keys), keys, measures)
+        if totals.index.nlevels == 1:
+            totals.index = pd.MultiIndex.from_arrays([totals.index])
+        order = np.column_stack([
+            ranks[i].get_indexer(totals.index.get_level_values(i)) for i in range(level)
+        ])
+
+        matrix = None
+        if columns:
+            cells = _measure_values(page_df, _reaggregate(page_base, keys + columns), keys + columns, measures)
+            wide = cells.unstack(list(range(level, level + len(columns))))
+            target = pd.MultiIndex.from_tuples(
+                [(f'm{i}',) + ck for ck in ck_tuples for i in range(len(measures))]
+            )
+            if wide.index.nlevels == 1:
+                wide.index = pd.MultiIndex.from_arrays([wide.index])
+            matrix = wide.reindex(index=totals.index, columns=target).to_numpy(dtype='float64').reshape(
+                len(totals), len(ck_tuples), len(measures)
+            )
+
+        total_values = totals.to_numpy(dtype='float64')
+        for r, idx in enumerate(totals.index):
+            emitted.append((tuple(order[r]), {
+                'keys': [_label(v) for v in idx],
+                'level': level,
+                'is_subtotal': level < len(rows),
+                'cells': [_to_json_values(c) for c in matrix[r]] if matrix is not None else [],
+                'total': _to_json_values(total_values[r]),
+            }))
+
+    # Depth-first order: each subtotal right before its children
+    emitted.sort(key=lambda e: e[0])
+    truncated = len(emitted) > MAX_PIVOT_PAGE_ROWS
+    page_rows = [e[1] for e in emitted[:MAX_PIVOT_PAGE_ROWS]]
+
+    grand = _measure_values(df, _reaggregate(base, []), [], measures).iloc[0]
+    grand_cells = []
+    if columns:
+        for ck in column_keys:
+            grand_cells.append(_to_json_values(col_totals.loc[ck].values))
+
+    logger.info(
+        f'[PIVOT] {len(df)} rows → {len(base)} base groups, '
+        f'page {page}: {len(page_rows)} rows × {len(column_keys)} column keys'
+    )
+
+    return {
+        'row_fields': rows,
+        'column_fields': columns,
+        'measures': measures,
+        'column_keys': [
+            [_label(v) for v in (ck if isinstance(ck, tuple) else (ck,))] for ck in column_keys
+        ],
+        'rows': page_rows,
+        'grand_total': {'cells': grand_cells, 'total': _to_json_values(grand.values)},
+        'page': page,
+        'page_size': page_size,
+        'total_groups': total_groups,
+        'total_pages': (total_groups + page_size - 1) // page_size,
+        'truncated': truncated,
+    }
+
+
+def pivot_app_table(app_id, spec):
+    """Build a pivot page over a stored table of a ReportApp."""
+    source = spec.get('source')
+    if not source:
+        raise ValueError('Indica la tabla de origen ("source").')
+    df = app_store.load_table(app_id, source)
+    return build_pivot(df, spec)
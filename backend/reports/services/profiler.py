@@ -0,0 +1,240 @@
+"""
+[AGENTE_DATA_ENGINEER] — Profiler: full-column profile of a table.
+
+Every column is profiled, with one vectorized call per statistic across ALL
+columns (isna().sum(), nunique(), min(), max(), quantile()) instead of a
+loop of per-column passes:
+
+  - null count, distinct count (exact; HyperLogLog for very large sources)
+  - min / max / mean and quantiles of numeric and datetime columns
+  - histogram with automatic bins (numpy 'auto', capped at MAX_HISTOGRAM_BINS)
+  - top-k values of categorical columns
+  - detected datetime format of text columns
+
+Datetime formats are detected for all text columns at once: the samples of
+every column are stacked into one Series and each candidate format is tried
+with a single pd.to_datetime call.
+
+Profiles are stored with their source so the UI shows them instantly:
+  - app tables → app_<id>/profiles/<slug>.json, built at load time and
+    rebuilt on demand when stale (same versioning as indexes)
+  - files      → part of the source metadata, memoized by file content
+                 (see QlikEngine.extract_metadata)
+"""
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from reports.services import app_store
+from reports.services.sketches import SUMMARY_QUANTILES
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VERSION = 1
+TOP_K = 10
+MAX_HISTOGRAM_BINS = 50
+DATETIME_SAMPLE = 200
+DATETIME_MATCH_RATIO = 0.95
+# Tried in order; formats without separators (e.g. %Y%m%d) are left out on purpose
+DATETIME_FORMATS = [
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M',
+    '%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d-%m-%Y', '%d.%m.%Y',
+    '%m/%d/%Y', '%m/%d/%Y %H:%M:%S', '%Y/%m/%d',
+    'ISO8601',
+]
+
+
+# ── Datetime format detection ──
+
+def _text_columns(df):
+    return [
+        c for c in df.columns
+        if not pd.api.types.is_numeric_dtype(df[c])
+        and not pd.api.types.is_datetime64_any_dtype(df[c])
+        and not pd.api.types.is_bool_dtype(df[c])
+    ]
+
+
+def detect_datetime_formats(df, sample=DATETIME_SAMPLE):
+    """{column: format} of the text columns whose values parse as datetimes."""
+    columns = _text_columns(df)
+    parts = {c: df[c].dropna().head(sample).astype(str) for c in columns}
+    parts = {c: s for c, s in parts.items() if len(s)}
+    if not parts:
+        return {}
+    samples = pd.concat(parts, names=['column', 'row'])
+    labels = samples.index.get_level_values('column')
+
+    found = {}
+    for fmt in DATETIME_FORMATS:
+        pending = ~labels.isin(list(found))
+        if not pending.any():
+            break
+        sub = samples[pending]
+        parsed = pd.to_datetime(sub, format=fmt, errors='coerce')
+        ratio = parsed.notna().groupby(level='column', sort=False).mean()
+        for col, r in ratio.items():
+            if r >= DATETIME_MATCH_RATIO:
+                found[col] = fmt
+    return {c: found[c] for c in columns if c in found}
+
+
+# ── Profiling ──
+
+def _histogram(values, weights=None):
+    values = np.asarray(values, dtype='float64')
+    finite = np.isfinite(values)
+    values = values[finite]
+    if weights is not None:
+        weights = np.asarray(weights)[finite]
+    if not len(values):
+        return None
+    if values.min() == values.max():
+        count = int(weights.sum()) if weights is not None else len(values)
+        return {'edges': [float(values.min()), float(values.max())], 'counts': [count]}
+    edges = np.histogram_bin_edges(values, bins='auto' if weights is None else 'sturges')
+    if len(edges) - 1 > MAX_HISTOGRAM_BINS:
+        edges = np.linspace(values.min(), values.max(), MAX_HISTOGRAM_BINS + 1)
+    counts, edges = np.histogram(values, bins=edges, weights=weights)
+    return {'edges': [round(float(e), 6) for e in edges], 'counts': [int(c) for c in counts]}
+
+
+def _json_value(v):
+    if v is None or (not isinstance(v, str) and pd.isna(v)):
+        return None
+    if isinstance(v, (pd.Timestamp, datetime)):
+        return v.isoformat()
+    if isinstance(v, (np.integer, np.floating)):
+        return v.item()
+    return v
+
+
+def profile_frame(df):
+    """Profile of every column of an in-memory DataFrame."""
+    rows = len(df)
+    nulls = df.isna().sum()
+    distinct = df.nunique(dropna=True)
+    formats = detect_datetime_formats(df)
+
+    numeric = [c for c in df.columns if pd.api.types.is_numeric_dtype(df[c]) and not pd.api.types.is_bool_dtype(df[c])]
+    dates = {c: df[c] for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c])}
+    dates.update({c: pd.to_datetime(df[c], format=f, errors='coerce') for c, f in formats.items()})
+
+    num_frame = df[numeric]
+    mins, maxs, means = num_frame.min(), num_frame.max(), num_frame.mean()
+    quantiles = num_frame.quantile(list(SUMMARY_QUANTILES)) if numeric else None
+
+    columns = {}
+    for col in df.columns:
+        info = {
+            'dtype': str(df[col].dtype),
+            'null_count': int(nulls[col]),
+            'distinct_count': int(distinct[col]),
+        }
+        if col in numeric:
+            info.update({
+                'kind': 'numeric',
+                'min': _json_value(mins[col]),
+                'max': _json_value(maxs[col]),
+                'mean': _json_value(round(means[col], 4)) if pd.notna(means[col]) else None,
+                'quantiles': {f'p{int(q * 100)}': _json_value(quantiles.at[q, col]) for q in SUMMARY_QUANTILES},
+                'histogram': _histogram(df[col].to_numpy(dtype='float64', na_value=np.nan)),
+            })
+        elif col in dates:
+            parsed = dates[col].dropna()
+            info.update({
+                'kind': 'datetime',
+                'format': formats.get(col),
+                'min': _json_value(parsed.min()) if len(parsed) else None,
+                'max': _json_value(parsed.max()) if len(parsed) else None,
+            })
+            hist = _histogram(parsed.astype('int64').to_numpy()) if len(parsed) else None
+            if hist:
+                unit = str(parsed.dtype).split('[')[-1].rstrip(']') if '[' in str(parsed.dtype) else 'ns'
+                hist['edges'] = [pd.Timestamp(int(e), unit=unit).isoformat() for e in hist['edges']]
+            info['histogram'] = hist
+        else:
+            top = df[col].value_counts(dropna=True).head(TOP_K)
+            info.update({
+                'kind': 'categorical',
+                'top_values': [{'value': str(v), 'count': int(c)} for v, c in top.items()],
+            })
+        columns[str(col)] = info
+
+    return {
+        'version': PROFILE_VERSION,
+        'rows': rows,
+        'approximate': False,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'columns': columns,
+    }
+
+
+def profile_sketch(sketch, first):
+    """
+    Approximate profile of a source too large for memory, from the TableSketch
+    of a streaming pass and its first chunk (dtypes and datetime formats).
+    """
+    formats = detect_datetime_formats(first)
+    summary = sketch.summary()
+
+    columns = {}
+    for col in first.columns:
+        stats = summary['columns'][str(col)]
+        sk = sketch.columns[col]
+        info = {
+            'dtype': str(first[col].dtype),
+            'null_count': stats['null_count'],
+            'distinct_count': stats['distinct_count'],
+        }
+        if sk.numeric:
+            values, weights = sk.quantiles.buckets()
+            info.update({
+                'kind': 'numeric',
+                'min': stats['min'], 'max': stats['max'], 'mean': stats['mean'],
+                'quantiles': stats['quantiles'],
+                'histogram': _histogram(values, weights) if len(values) else None,
+            })
+        else:
+            info.update({
+                'kind': 'datetime' if col in formats else 'categorical',
+                'format': formats.get(col),
+                'top_values': stats['top_values'],
+            })
+        columns[str(col)] = info
+
+    return {
+        'version': PROFILE_VERSION,
+        'rows': summary['row_count'],
+        'approximate': True,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'columns': columns,
+    }
+
+
+# ── Stored profiles ──
+
+def _profile_path(app_id, name):
+    return app_store.app_dir(app_id) / 'profiles' / f'{app_store.table_slug(name)}.json'
+
+
+def store_table_profile(app_id, name, df, version):
+    """Profile a freshly stored app table and keep it next to the table."""
+    profile = profile_frame(df)
+    app_store.write_json(_profile_path(app_id, name), {'table_version': version, 'profile': profile})
+    logger.info(f'[PROFILER] App {app_id}: profiled {len(df.columns)} columns of "{name}"')
+    return profile
+
+
+def get_table_profile(app_id, name):
+    """Stored profile of an app table, rebuilt when missing or stale."""
+    info = app_store.table_info(app_id, name)
+    if info is None:
+        raise ValueError(f'La tabla "{name}" no está cargada. Ejecuta la carga de la app primero.')
+    stored = app_store.read_json(_profile_path(app_id, name))
+    if stored and stored.get('table_version') == info['version'] and stored['profile'].get('version') == PROFILE_VERSION:
+        return stored['profile']
+    return store_table_profile(app_id, name, app_store.load_table(app_id, name), info['version'])
+
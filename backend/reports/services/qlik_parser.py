@@ -7,19 +7,43 @@ Core ETL service that:
   3. Generates Chart.js-ready JSON (labels + datasets)
   4. Memory-safe: limits output to aggregated summaries
 
+Sources of more than MAX_RAW_ROWS rows are processed out-of-core: read in
+chunks and folded into mergeable partial aggregates (see
+chunked_aggregates.py), so charts and the summary cover the entire file at
+constant memory instead of its first MAX_RAW_ROWS rows.
+
 Supports: .csv, .xlsx, .qvd (Qlik native)
 """
+import hashlib
+import json
 import logging
+from functools import partial
 from pathlib import Path
 
 import pandas as pd
 
+from reports.services import columnar_store, etl_pool, load_planner, parse_cache
+from reports.services.chunked_aggregates import PartialAggregates
+from reports.services.downsampling import downsample
+from reports.services.excel_reader import iter_excel, read_excel
+from reports.services.file_dialect import SAMPLE_BYTES, detect_dialect, csv_read_kwargs
+from reports.services.multi_file import is_multi_source, iter_files_chunks, read_files, source_files
+from reports.services.profiler import detect_datetime_formats
+from reports.services.qvd_native import read_header as read_qvd_header, read_qvd
+from reports.services.sketches import TableSketch
+
 logger = logging.getLogger(__name__)
 
 # Maximum rows to process before aggregating
 MAX_RAW_ROWS = 50_000
 # Maximum rows to return to frontend
 MAX_DISPLAY_ROWS = 100
+# CSVs above this size are streamed in chunks instead of truncated
+STREAMING_THRESHOLD_BYTES = 64 * 1024 * 1024
+# Rows per chunk in streaming mode
+CHUNK_ROWS = 200_000
+# Bump when the process_file() output changes, to invalidate cached results
+RESULT_VERSION = 4
 
 # Color palette for Chart.js datasets
 CHART_COLORS = [
@@ -38,50 +62,56 @@ CHART_COLORS = [
 CHART_BORDERS = [c.replace('0.8', '1') for c in CHART_COLORS]
 
 
-def read_file_to_dataframe(filepath):
+def read_file_to_dataframe(filepath, sheets=None):
     """
     Read a data file into a Pandas DataFrame.
-    Supports: .csv, .xlsx, .qvd
+    Supports: .csv, .xlsx, .qvd, and folders / globs of them (see multi_file.py)
+    `sheets` selects the Excel sheets (see excel_reader.read_excel).
+    The Parquet copy of the file is preferred when it exists.
+    Raises ValueError if the read would not fit the memory budget (see load_planner.py).
     """
+    plan = load_planner.plan_load(filepath, sheets=sheets, nrows=MAX_RAW_ROWS)
+    if plan['strategy'] == 'reject':
+        raise ValueError(plan['reason'])
+
+    if is_multi_source(filepath):
+        return read_files(
+            filepath, partial(read_file_to_dataframe, sheets=sheets),
+            variant=f'raw_{MAX_RAW_ROWS}{_sheets_suffix(sheets)}', nrows=MAX_RAW_ROWS,
+        )
+
     path = Path(filepath)
     ext = path.suffix.lower()
 
     logger.info(f'[DATA_ENGINEER] Reading file: {path.name} ({ext})')
 
+    if sheets is None:
+        df = columnar_store.read_columnar(filepath, nrows=MAX_RAW_ROWS)
+        if df is not None:
+            logger.info(f'[DATA_ENGINEER] Columnar copy read: {len(df)} rows')
+            return df
+        columnar_store.convert_async(filepath)
+
     if ext == '.csv':
-        # Try different encodings and delimiters
-        for encoding in ['utf-8', 'latin-1', 'cp1252']:
-            for sep in [',', ';', '\t', '|']:
-                try:
-                    df = pd.read_csv(filepath, encoding=encoding, sep=sep, nrows=5)
-                    if len(df.columns) > 1:
-                        df = pd.read_csv(filepath, encoding=encoding, sep=sep, nrows=MAX_RAW_ROWS)
-                        logger.info(f'[DATA_ENGINEER] CSV parsed: {len(df)} rows, encoding={encoding}, sep=repr({sep})')
-                        return df
-                except Exception:
-                    continue
-        # Fallback: basic read
-        df = pd.read_csv(filepath, nrows=MAX_RAW_ROWS)
+        # Sniff encoding / delimiter / decimal / header once, then parse directly
+        dialect = detect_dialect(filepath)
+        df = pd.read_csv(filepath, nrows=MAX_RAW_ROWS, **csv_read_kwargs(dialect))
+        logger.info(
+            f'[DATA_ENGINEER] CSV parsed: {len(df)} rows, '
+            f'encoding={dialect["encoding"]}, sep={dialect["sep"]!r}'
+        )
         return df
 
     elif ext in ('.xlsx', '.xls'):
-        df = pd.read_excel(filepath, nrows=MAX_RAW_ROWS)
+        df = read_excel(filepath, sheets=sheets, nrows=MAX_RAW_ROWS)
         logger.info(f'[DATA_ENGINEER] Excel parsed: {len(df)} rows')
         return df
 
     elif ext == '.qvd':
-        try:
-            from qvd import qvd_reader
-            df = qvd_reader.read(str(filepath))
-            if len(df) > MAX_RAW_ROWS:
-                logger.warning(f'[DATA_ENGINEER] QVD too large ({len(df)} rows), truncating to {MAX_RAW_ROWS}')
-                df = df.head(MAX_RAW_ROWS)
-            logger.info(f'[DATA_ENGINEER] QVD parsed: {len(df)} rows')
-            return df
-        except ImportError:
-            raise ImportError(
-                'Librería "qvd" no instalada. Ejecuta: pip install qvd'
-            )
+        # Native reader: only the first MAX_RAW_ROWS records are decoded
+        df = read_qvd(filepath, stop=MAX_RAW_ROWS)
+        logger.info(f'[DATA_ENGINEER] QVD parsed: {len(df)} rows')
+        return df
 
     else:
         raise ValueError(f'Formato de archivo no soportado: "{ext}"')
@@ -90,29 +120,28 @@ def read_file_to_dataframe(filepath):
 def classify_columns(df):
     """
     Auto-classify DataFrame columns into categorical and numeric.
-    Returns { 'categorical': [...], 'numeric': [...], 'datetime': [...], 'all': [...] }
+    Returns { 'categorical': [...], 'numeric': [...], 'datetime': [...], 'formats': {...}, 'all': [...] }
+    where 'formats' maps text datetime columns to their detected format.
     """
     categorical = []
     numeric = []
     datetime_cols = []
+    # Text columns holding dates, detected for all columns in one pass
+    date_formats = detect_datetime_formats(df)
 
     for col in df.columns:
         if pd.api.types.is_numeric_dtype(df[col]):
             numeric.append(col)
-        elif pd.api.types.is_datetime64_any_dtype(df[col]):
+        elif pd.api.types.is_datetime64_any_dtype(df[col]) or col in date_formats:
             datetime_cols.append(col)
         else:
-            # Try to parse as datetime
-            try:
-                pd.to_datetime(df[col].dropna().head(10))
-                datetime_cols.append(col)
-            except (ValueError, TypeError):
-                categorical.append(col)
+            categorical.append(col)
 
     return {
         'categorical': categorical,
         'numeric': numeric,
         'datetime': datetime_cols,
+        'formats': date_formats,
         'all': [
             {'name': c, 'type': 'numeric' if c in numeric else 'datetime' if c in datetime_cols else 'categorical'}
             for c in df.columns
@@ -120,6 +149,96 @@ def classify_columns(df):
     }
 
 
+# ── Chart builders (shared by the in-memory and the streaming path) ──
+
+def _round_values(values):
+    return [round(float(v), 2) if pd.notna(v) else 0 for v in values]
+
+
+def _bar_chart(cat_col, num_col, grouped):
+    """Bar chart of the 15 largest groups of a Series of sums indexed by category."""
+    grouped = grouped.nlargest(15)
+    if grouped.empty:
+        return None
+    values = _round_values(grouped.values)
+    return {
+        'id': f'bar_{cat_col}_{num_col}',
+        'type': 'bar',
+        'title': f'{num_col} por {cat_col}',
+        'data': {
+            'labels': [str(l) for l in grouped.index.tolist()],
+            'datasets': [{
+                'label': num_col,
+                'data': values,
+                'backgroundColor': CHART_COLORS[:len(values)],
+                'borderColor': CHART_BORDERS[:len(values)],
+                'borderWidth': 1,
+            }],
+        },
+    }
+
+
+def _pie_chart(cat_col, counts):
+    """Doughnut chart of the 10 most frequent values of a Series of counts."""
+    counts = counts.nlargest(10)
+    if counts.empty:
+        return None
+    values = [int(v) for v in counts.values]
+    return {
+        'id': f'pie_{cat_col}',
+        'type': 'doughnut',
+        'title': f'Distribución: {cat_col}',
+        'data': {
+            'labels': [str(l) for l in counts.index.tolist()],
+            'datasets': [{
+                'data': values,
+                'backgroundColor': CHART_COLORS[:len(values)],
+                'borderColor': 'rgba(15, 23, 42, 1)',
+                'borderWidth': 2,
+            }],
+        },
+    }
+
+
+def _line_chart(dt_col, series):
+    """Line chart of a DataFrame indexed by sorted datetimes, one dataset per column."""
+    return {
+        'id': f'line_{dt_col}',
+        'type': 'line',
+        'title': f'Tendencia temporal: {dt_col}',
+        'data': {
+            'labels': [d.strftime('%Y-%m-%d') for d in series.index],
+            'datasets': [
+                {
+                    'label': num_col,
+                    'data': _round_values(series[num_col]),
+                    'borderColor': CHART_COLORS[i],
+                    'backgroundColor': CHART_COLORS[i].replace('0.8', '0.1'),
+                    'tension': 0.3,
+                    'fill': True,
+                }
+                for i, num_col in enumerate(series.columns)
+            ],
+        },
+    }
+
+
+def plan_charts(columns_info):
+    """
+    Which aggregates each categorical column needs:
+    { cat_col: {'sums': [num_cols], 'counts': bool} }.
+    Every categorical column is grouped ONCE for all of its bar and pie charts.
+    """
+    cat_cols = columns_info['categorical']
+    num_cols = columns_info['numeric']
+    plan = {}
+    for cat_col in cat_cols[:3]:  # Max 3 categorical columns, 3 numeric each
+        plan[cat_col] = {'sums': num_cols[:3], 'counts': False}
+    for cat_col in cat_cols[:2]:  # Max 2 pie charts
+        plan.setdefault(cat_col, {'sums': [], 'counts': False})['counts'] = True
+    return plan
+
+
 def generate_chart_data(df, columns_info):
     """
     Generate Chart.js-ready JSON from a DataFrame.
@@ -129,102 +248,55 @@ def generate_chart_data(df, columns_info):
       - pie_charts: value distribution of categorical columns
       - table_preview: first N rows
     """
-    charts = []
-    cat_cols = columns_info['categorical']
+    bar_charts = []
+    pie_charts = []
     num_cols = columns_info['numeric']
 
-    # ── Bar Charts: categorical × numeric aggregations ──
-    for cat_col in cat_cols[:3]:  # Max 3 categorical columns
-        for num_col in num_cols[:3]:  # Max 3 numeric per category
+    # ── Bar + Pie Charts: one group-by per categorical column ──
+    for cat_col, needs in plan_charts(columns_info).items():
+        try:
+            grouped = df.groupby(cat_col, observed=True, sort=False)
+            # Sorted like a plain groupby, so ties in the top 15 keep the category order
+            sums = grouped[needs['sums']].sum().sort_index() if needs['sums'] else None
+            counts = grouped.size() if needs['counts'] else None
+        except Exception as e:
+            logger.warning(f'[DATA_ENGINEER] Error grouping by {cat_col}: {e}')
+            continue
+
+        for num_col in needs['sums']:
             try:
-                grouped = df.groupby(cat_col)[num_col].sum().nlargest(15)
-                if grouped.empty:
-                    continue
-
-                labels = [str(l) for l in grouped.index.tolist()]
-                values = [round(float(v), 2) if pd.notna(v) else 0 for v in grouped.values]
-
-                charts.append({
-                    'id': f'bar_{cat_col}_{num_col}',
-                    'type': 'bar',
-                    'title': f'{num_col} por {cat_col}',
-                    'data': {
-                        'labels': labels,
-                        'datasets': [{
-                            'label': num_col,
-                            'data': values,
-                            'backgroundColor': CHART_COLORS[:len(values)],
-                            'borderColor': CHART_BORDERS[:len(values)],
-                            'borderWidth': 1,
-                        }],
-                    },
-                })
+                chart = _bar_chart(cat_col, num_col, sums[num_col])
+                if chart:
+                    bar_charts.append(chart)
             except Exception as e:
                 logger.warning(f'[DATA_ENGINEER] Error generating bar chart for {cat_col}/{num_col}: {e}')
 
-    # ── Pie/Doughnut Charts: categorical value distribution ──
-    for cat_col in cat_cols[:2]:  # Max 2 pie charts
-        try:
-            counts = df[cat_col].value_counts().nlargest(10)
-            if counts.empty:
-                continue
-
-            labels = [str(l) for l in counts.index.tolist()]
-            values = [int(v) for v in counts.values]
-
-            charts.append({
-                'id': f'pie_{cat_col}',
-                'type': 'doughnut',
-                'title': f'Distribución: {cat_col}',
-                'data': {
-                    'labels': labels,
-                    'datasets': [{
-                        'data': values,
-                        'backgroundColor': CHART_COLORS[:len(values)],
-                        'borderColor': 'rgba(15, 23, 42, 1)',
-                        'borderWidth': 2,
-                    }],
-                },
-            })
-        except Exception as e:
-            logger.warning(f'[DATA_ENGINEER] Error generating pie chart for {cat_col}: {e}')
+        if counts is not None:
+            try:
+                chart = _pie_chart(cat_col, counts.sort_values(ascending=False, kind='stable'))
+                if chart:
+                    pie_charts.append(chart)
+            except Exception as e:
+                logger.warning(f'[DATA_ENGINEER] Error generating pie chart for {cat_col}: {e}')
+
+    charts = bar_charts + pie_charts
 
     # ── Line Charts: numeric trends (if datetime present) ──
     dt_cols = columns_info['datetime']
     if dt_cols and num_cols:
         dt_col = dt_cols[0]
         try:
-            df_copy = df.copy()
-            df_copy[dt_col] = pd.to_datetime(df_copy[dt_col], errors='coerce')
-            df_copy = df_copy.dropna(subset=[dt_col]).sort_values(dt_col)
-
-            if len(df_copy) > MAX_DISPLAY_ROWS:
-                # Resample by grouping
-                df_copy = df_copy.set_index(dt_col)
-                freq = 'ME' if len(df_copy) > 365 else 'W' if len(df_copy) > 60 else 'D'
-                df_copy = df_copy[num_cols[:2]].resample(freq).sum().reset_index()
-
-            labels = [d.strftime('%Y-%m-%d') for d in df_copy[dt_col]]
-            datasets = []
-            for i, num_col in enumerate(num_cols[:2]):
-                datasets.append({
-                    'label': num_col,
-                    'data': [round(float(v), 2) if pd.notna(v) else 0 for v in df_copy[num_col]],
-                    'borderColor': CHART_COLORS[i],
-                    'backgroundColor': CHART_COLORS[i].replace('0.8', '0.1'),
-                    'tension': 0.3,
-                    'fill': True,
-                })
-
-            charts.append({
-                'id': f'line_{dt_col}',
-                'type': 'line',
-                'title': f'Tendencia temporal: {dt_col}',
-                'data': {
-                    'labels': labels,
-                    'datasets': datasets,
-                },
-            })
+            # Projected view: only the plotted columns, indexed by the parsed dates
+            dates = pd.to_datetime(df[dt_col], format=columns_info.get('formats', {}).get(dt_col), errors='coerce')
+            valid = dates.notna().to_numpy()
+            series = df.loc[valid, num_cols[:2]].set_axis(dates[valid], axis=0)
+            series = series.sort_index(kind='stable')
+
+            if len(series) > MAX_DISPLAY_ROWS:
+                # Daily sums (as the streaming path builds them), then visual downsampling
+                series = downsample(series.groupby(series.index.floor('D')).sum())
+
+            charts.append(_line_chart(dt_col, series))
         except Exception as e:
             logger.warning(f'[DATA_ENGINEER] Error generating line chart: {e}')
 
@@ -254,7 +326,7 @@ def generate_summary(df):
     return summary
 
 
-def generate_table_preview(df, max_rows=50):
+def generate_table_preview(df, max_rows=50, total_rows=None):
     """Generate a table preview (first N rows) for the frontend."""
     preview_df = df.head(max_rows)
     columns = list(preview_df.columns)
@@ -269,17 +341,241 @@ def generate_table_preview(df, max_rows=50):
     return {
         'columns': columns,
         'rows': rows,
-        'total_rows': len(df),
+        'total_rows': len(df) if total_rows is None else total_rows,
         'showing': len(rows),
     }
 
 
-def process_file(filepath):
+# ── Streaming (out-of-core) path ──
+
+def iter_file_chunks(filepath, chunk_rows=CHUNK_ROWS, sheets=None):
+    """
+    Yield the whole file as DataFrames of at most `chunk_rows` rows: from
+    the Parquet copy if there is one, else CSV chunks, QVD row ranges or
+    rows streamed out of the selected Excel sheets (.xls cannot be streamed).
+    """
+    if is_multi_source(filepath):
+        yield from iter_files_chunks(filepath, partial(iter_file_chunks, chunk_rows=chunk_rows, sheets=sheets))
+        return
+
+    columnar = columnar_store.iter_columnar(filepath, chunk_rows) if sheets is None else None
+    if columnar is not None:
+        yield from columnar
+        return
+
+    ext = Path(filepath).suffix.lower()
+    if ext == '.csv':
+        dialect = detect_dialect(filepath)
+        yield from pd.read_csv(filepath, chunksize=chunk_rows, **csv_read_kwargs(dialect))
+    elif ext == '.qvd':
+        total = read_qvd_header(filepath)['records']
+        for start in range(0, total, chunk_rows):
+            yield read_qvd(filepath, start=start, stop=start + chunk_rows)
+    elif ext in ('.xlsx', '.xls'):
+        yield from iter_excel(filepath, chunk_rows, sheets)
+    else:
+        raise ValueError(f'Formato de archivo no soportado: "{ext}"')
+
+
+def estimate_rows(filepath):
+    """
+    Cheap row-count estimate of a source file (None if unknown): Parquet
+    statistics, the QVD header, or the line density of a CSV sample.
+    """
+    if is_multi_source(filepath):
+        estimates = [estimate_rows(f) for f in source_files(filepath)]
+        return sum(e or 0 for e in estimates) if any(e is not None for e in estimates) else None
+
+    stats = columnar_store.column_stats(filepath) if columnar_store.is_available() else None
+    if stats:
+        return stats['rows']
+    ext = Path(filepath).suffix.lower()
+    if ext == '.qvd':
+        return read_qvd_header(filepath)['records']
+    if ext == '.csv':
+        size = Path(filepath).stat().st_size
+        with open(filepath, 'rb') as f:
+            sample = f.read(SAMPLE_BYTES)
+        lines = sample.count(b'\n')
+        if not lines:
+            return 0
+        return int(lines * size / len(sample)) if len(sample) == SAMPLE_BYTES else lines
+    return None
+
+
+def _streaming_charts(agg, columns_info):
+    """Same charts as generate_chart_data(), built from folded partials."""
+    charts = []
+    cat_cols = columns_info['categorical']
+    num_cols = columns_info['numeric']
+
+    for cat_col in cat_cols[:3]:
+        for num_col in num_cols[:3]:
+            try:
+                chart = _bar_chart(cat_col, num_col, agg.group_sums[cat_col][num_col])
+                if chart:
+                    charts.append(chart)
+            except Exception as e:
+                logger.warning(f'[DATA_ENGINEER] Error generating bar chart for {cat_col}/{num_col}: {e}')
+
+    for cat_col in cat_cols[:2]:
+        try:
+            chart = _pie_chart(cat_col, agg.value_counts[cat_col])
+            if chart:
+                charts.append(chart)
+        except Exception as e:
+            logger.warning(f'[DATA_ENGINEER] Error generating pie chart for {cat_col}: {e}')
+
+    if agg.time_buckets is not None:
+        try:
+            series = agg.time_buckets.sort_index()
+            if agg.dated_rows > MAX_DISPLAY_ROWS:
+                series = downsample(series)
+            charts.append(_line_chart(agg.dt_col, series))
+        except Exception as e:
+            logger.warning(f'[DATA_ENGINEER] Error generating line chart: {e}')
+
+    return charts
+
+
+def process_file_streaming(filepath, chunk_rows=CHUNK_ROWS, sheets=None):
+    """
+    Out-of-core variant of process_file(): columns are classified on the
+    first chunk, every chunk is folded into a PartialAggregates and a
+    TableSketch, and only those (plus the preview rows) are kept in memory.
+    Totals, sums and chart values are exact; `column_stats` (distinct
+    counts, quantiles, top values) are approximate. `sheets` selects the
+    Excel sheets (default: the first one).
+    """
+    chunks = iter_file_chunks(filepath, chunk_rows, sheets)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError('El archivo está vacío.')
+
+    columns_info = classify_columns(first)
+    cat_cols = columns_info['categorical']
+    num_cols = columns_info['numeric']
+    dt_col = columns_info['datetime'][0] if columns_info['datetime'] and num_cols else None
+    agg = PartialAggregates(
+        cat_cols=cat_cols[:3],
+        num_cols=num_cols,
+        dt_col=dt_col,
+        dt_format=columns_info['formats'].get(dt_col),
+        count_cols=cat_cols[:2],
+        trend_cols=num_cols[:2],
+    )
+
+    # Distinct counts, quantiles and top values of every column: mergeable sketches
+    sketch = TableSketch()
+
+    preview = first.head(50)
+    agg.update(first)
+    sketch.update(first)
+    n_chunks = 1
+    del first
+    for chunk in chunks:
+        agg.update(chunk)
+        sketch.update(chunk)
+        n_chunks += 1
+
+    summary = {
+        'total_rows': agg.rows,
+        'total_columns': len(preview.columns),
+        'memory_usage_mb': round(agg.memory_bytes / 1024 / 1024, 2),
+        'numeric_stats': {},
+        'streamed': True,
+        'chunks': n_chunks,
+        'approximate': True,
+        'column_stats': sketch.summary()['columns'],
+    }
+    for col in num_cols[:5]:
+        try:
+            summary['numeric_stats'][col] = agg.numeric_summary(col)
+        except Exception:
+            pass
+
+    logger.info(
+        f'[DATA_ENGINEER] Streamed {Path(filepath).name}: {agg.rows} rows in {n_chunks} chunks'
+    )
+    return {
+        'summary': summary,
+        'columns': columns_info['all'],
+        'charts': _streaming_charts(agg, columns_info),
+        'table_preview': generate_table_preview(preview, total_rows=agg.rows),
+    }, agg.rows, len(preview.columns), columns_info['all']
+
+
+def _sheets_suffix(sheets):
+    """Cache-key suffix of an Excel sheet selection ('' for the default sheet)."""
+    if sheets is None:
+        return ''
+    key = json.dumps(sheets, ensure_ascii=False)
+    return '_' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:10]
+
+
+def process_file(filepath, streaming=None, use_cache=True, sheets=None):
     """
     Full ETL pipeline: read → classify → generate charts + summary + preview.
     Returns a complete JSON structure ready for the frontend.
+
+    streaming=None streams CSVs larger than STREAMING_THRESHOLD_BYTES and
+    any source estimated above MAX_RAW_ROWS rows, so the totals and charts
+    always cover the whole file. True forces streaming; False reads in
+    memory unless the source turns out to exceed MAX_RAW_ROWS rows.
+    Results are memoized by file content (see parse_cache.py) unless
+    use_cache=False. `sheets` selects the Excel sheets to read (default:
+    the first one).
+
+    The memory budget overrides the choice: a source whose rows do not fit
+    is streamed in chunks sized to the budget, or rejected with a
+    ValueError if it cannot be streamed (see load_planner.py).
     """
-    df = read_file_to_dataframe(filepath)
+    plan = load_planner.plan_load(filepath, sheets=sheets, nrows=MAX_RAW_ROWS, chunk_rows=CHUNK_ROWS)
+    if plan['strategy'] == 'reject':
+        raise ValueError(plan['reason'])
+    if streaming is None:
+        csv_bytes = sum(f.stat().st_size for f in source_files(filepath) if f.suffix.lower() == '.csv')
+        streaming = (
+            csv_bytes > STREAMING_THRESHOLD_BYTES
+            or (estimate_rows(filepath) or 0) > MAX_RAW_ROWS
+        )
+    streaming = streaming or plan['strategy'] == 'chunked'
+    chunk_rows = plan['chunk_rows'] or CHUNK_ROWS
+    if not use_cache:
+        return _process_file(filepath, streaming, False, sheets, chunk_rows)
+
+    kind = f'process_file_v{RESULT_VERSION}_{"stream" if streaming else MAX_RAW_ROWS}{_sheets_suffix(sheets)}'
+    result = parse_cache.get_result(
+        filepath, kind, lambda path: list(_run_process_file(path, streaming, sheets, chunk_rows)),
+    )
+    return tuple(result)
+
+
+def _run_process_file(filepath, streaming, sheets, chunk_rows):
+    """_process_file(), in the ETL process pool for large sources (see etl_pool.py)."""
+    size = sum(f.stat().st_size for f in source_files(filepath))
+    if etl_pool.should_offload(source_bytes=size):
+        return etl_pool.run(
+            'reports.services.qlik_parser:_process_file', str(filepath), streaming, True, sheets, chunk_rows,
+        )
+    return _process_file(filepath, streaming, True, sheets, chunk_rows)
+
+
+def _process_file(filepath, streaming, use_cache, sheets, chunk_rows=CHUNK_ROWS):
+    if streaming:
+        return process_file_streaming(filepath, chunk_rows, sheets)
+
+    if use_cache:
+        df = parse_cache.get_frame(
+            filepath,
+            lambda path: read_file_to_dataframe(path, sheets),
+            variant=f'raw_{MAX_RAW_ROWS}{_sheets_suffix(sheets)}',
+        )
+    else:
+        df = read_file_to_dataframe(filepath, sheets)
+    if len(df) >= MAX_RAW_ROWS:
+        # Truncated: the source had no row estimate (e.g. Excel) or a low one
+        return process_file_streaming(filepath, chunk_rows, sheets)
     columns_info = classify_columns(df)
     charts = generate_chart_data(df, columns_info)
     summary = generate_summary(df)
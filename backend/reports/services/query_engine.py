@@ -11,6 +11,7 @@ from datetime import datetime
 import pandas as pd
 
 from reports.models import ReportApp
+from reports.services import app_store, field_index, profiler, rollups
 
 logger = logging.getLogger(__name__)
 
@@ -119,6 +120,11 @@ def execute_single_script(script):
 
         elapsed = int((datetime.now() - start).total_seconds() * 1000)
 
+        # Persist the full result for sheets / rollups / filter indexes / profiles
+        stored = app_store.save_table(script.app_id, script.name, df)
+        field_index.build_index(script.app_id, script.name, df, stored['version'])
+        profiler.store_table_profile(script.app_id, script.name, df, stored['version'])
+
         # Update cached metadata
         script.last_row_count = len(df)
         script.last_executed_at = datetime.now()
@@ -155,7 +161,8 @@ def execute_app_data_load(app_id):
             {"script": "name", "status": "ok|error", "rows": N, "time_ms": T, "message": "..."}
         ],
         "total_scripts": N,
-        "success_count": N
+        "success_count": N,
+        "rollups_built": N
     }
     """
     try:
@@ -195,9 +202,14 @@ def execute_app_data_load(app_id):
             })
             logger.error(f'[QUERY_ENGINE] Script "{script.name}" failed: {e}')
 
+    # Rebuild the pre-aggregated cubes of every sheet from the fresh data
+    app_store.prune_tables(app.id, keep={s.name for s in scripts})
+    rollup_count = rollups.sync_rollups(app) if success_count else 0
+
     return {
         'tables': tables,
         'log': log,
         'total_scripts': len(scripts),
         'success_count': success_count,
+        'rollups_built': rollup_count,
     }
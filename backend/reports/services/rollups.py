@@ -0,0 +1,206 @@
+"""
+[AGENTE_DATA_ENGINEER] — Rollups: pre-aggregated cubes built at reload time.
+
+Every chart of a ReportSheet.layout_json asks for the same thing: aggregate
+`metric` by `dimension` over the table of `source`. The set of
+(source, dimension, metric, aggregation) combinations is derived from ALL
+sheets of the app and precomputed right after each reload, so rendering a
+sheet becomes a lookup of a few hundred rows instead of a fact-table scan.
+
+Storage (next to the tables, see app_store.py):
+    app_<id>/rollups/manifest.json   ← { key: {file, table_version} }
+    app_<id>/rollups/<hash>.pkl      ← pd.Series indexed by dimension value
+
+A rollup is valid only while its `table_version` matches the current version
+of its table, so a reload invalidates everything built from the old data.
+Layout edits call sync_rollups(): new combinations are built, unused ones
+are dropped.
+"""
+import hashlib
+import json
+import logging
+from collections import defaultdict
+
+import pandas as pd
+
+from reports.services import app_store, expressions
+
+logger = logging.getLogger(__name__)
+
+# layout_json "aggregation" → pandas reducer
+ROLLUP_AGGREGATIONS = {
+    'sum': 'sum',
+    'count': 'count',
+    'avg': 'mean',
+    'min': 'min',
+    'max': 'max',
+    'count_distinct': 'nunique',
+}
+DEFAULT_AGGREGATION = 'sum'
+# Aggregation marker of "=..." metrics (the expression aggregates itself)
+EXPRESSION_AGGREGATION = 'expr'
+
+
+def chart_rollup_key(chart):
+    """(source, dimension, metric, aggregation) of a layout chart, or None if incomplete."""
+    source = chart.get('source')
+    dimension = chart.get('dimension')
+    metric = chart.get('metric')
+    if not (source and dimension and metric):
+        return None
+    if expressions.is_expression(metric):
+        return (source, dimension, metric, EXPRESSION_AGGREGATION)
+    aggregation = chart.get('aggregation') or DEFAULT_AGGREGATION
+    if aggregation not in ROLLUP_AGGREGATIONS:
+        return None
+    return (source, dimension, metric, aggregation)
+
+
+def app_rollup_keys(app):
+    """All rollup keys referenced by any sheet of the app."""
+    keys = set()
+    for sheet in app.sheets.all():
+        for chart in sheet.layout_json or []:
+            key = chart_rollup_key(chart) if isinstance(chart, dict) else None
+            if key:
+                keys.add(key)
+    return keys
+
+
+def _rollups_dir(app_id):
+    return app_store.app_dir(app_id) / 'rollups'
+
+
+def _key_id(key):
+    return json.dumps(list(key), ensure_ascii=False)
+
+
+def _key_file(key):
+    return hashlib.sha1(_key_id(key).encode('utf-8')).hexdigest()[:16] + '.pkl'
+
+
+def key_columns(key):
+    """Columns of the source table a rollup key depends on (expressions included)."""
+    _, dimension, metric, _ = key
+    columns = set()
+    for text in (dimension, metric):
+        columns |= expressions.fields(expressions.parse(text)) if expressions.is_expression(text) else {text}
+    return columns
+
+
+def _check_metric(df, metric, aggregation):
+    if aggregation in ('count', 'count_distinct', EXPRESSION_AGGREGATION):
+        return
+    if not pd.api.types.is_numeric_dtype(df[metric]):
+        raise ValueError(f'La métrica "{metric}" no es numérica (agregación "{aggregation}").')
+
+
+def aggregate_by_dimension(df, dimension, pairs):
+    """
+    Compute several (metric, aggregation) pairs over one dimension in a
+    single group-by pass. Pairs that cannot be computed are reported apart.
+    `dimension` may be a derived "=..." expression; "expr" pairs are
+    evaluated by the expression engine over the same group keys.
+    Returns ({ (metric, aggregation): pd.Series }, { (metric, aggregation): error }).
+    """
+    keys = expressions.evaluate_dimension(df, dimension)
+    results, errors = {}, {}
+    plain = []
+    for pair in dict.fromkeys(pairs):
+        try:
+            _check_metric(df, *pair)
+            if pair[1] == EXPRESSION_AGGREGATION:
+                results[pair] = expressions.evaluate_measure(df, keys, pair[0])
+            else:
+                plain.append(pair)
+        except ValueError as e:
+            errors[pair] = str(e)
+    if not plain:
+        return results, errors
+
+    named = {
+        f'm{i}': pd.NamedAgg(column=metric, aggfunc=ROLLUP_AGGREGATIONS[aggregation])
+        for i, (metric, aggregation) in enumerate(plain)
+    }
+    grouped = df.groupby(keys, dropna=False, sort=False).agg(**named)
+    results.update({pair: grouped[f'm{i}'] for i, pair in enumerate(plain)})
+    return results, errors
+
+
+def sync_rollups(app):
+    """
+    Bring the app's rollups in line with its sheets and stored tables:
+    build missing or stale combinations, drop the ones no sheet uses.
+    Returns the number of rollups built.
+    """
+    root = _rollups_dir(app.id)
+    manifest_path = root / app_store.MANIFEST_NAME
+    tables = app_store.read_manifest(app.id)
+    entries = app_store.read_json(manifest_path, default={})
+
+    wanted = app_rollup_keys(app)
+    wanted_ids = {_key_id(k) for k in wanted}
+
+    # Drop rollups no sheet references anymore
+    for key_id in [k for k in entries if k not in wanted_ids]:
+        (root / entries.pop(key_id)['file']).unlink(missing_ok=True)
+
+    # Group pending keys by source so each table is loaded once
+    pending = defaultdict(list)
+    for key in wanted:
+        info = tables.get(key[0])
+        entry = entries.get(_key_id(key))
+        if info is None:
+            continue
+        if entry is None or entry['table_version'] != info['version']:
+            pending[key[0]].append(key)
+
+    built = 0
+    for source, keys in pending.items():
+        df = app_store.load_table(app.id, source)
+        root.mkdir(parents=True, exist_ok=True)
+
+        # One multi-aggregation pass per dimension
+        by_dimension = defaultdict(list)
+        for key in keys:
+            try:
+                usable = key_columns(key) <= set(df.columns)
+            except ValueError:
+                usable = False
+            if usable:
+                by_dimension[key[1]].append(key)
+            else:
+                entries.pop(_key_id(key), None)
+
+        for dimension, dim_keys in by_dimension.items():
+            try:
+                results, errors = aggregate_by_dimension(df, dimension, [(k[2], k[3]) for k in dim_keys])
+            except Exception as e:
+                logger.warning(f'[ROLLUPS] App {app.id}: cannot build rollups of {source}/{dimension}: {e}')
+                continue
+            for key in dim_keys:
+                if (key[2], key[3]) not in results:
+                    logger.warning(f'[ROLLUPS] App {app.id}: {errors[(key[2], key[3])]}')
+                    entries.pop(_key_id(key), None)
+                    continue
+                results[(key[2], key[3])].to_pickle(root / _key_file(key))
+                entries[_key_id(key)] = {'file': _key_file(key), 'table_version': tables[source]['version']}
+                built += 1
+
+    app_store.write_json(manifest_path, entries)
+    if built:
+        logger.info(f'[ROLLUPS] App {app.id}: built {built} rollups ({len(entries)} total)')
+    return built
+
+
+def lookup(app_id, key):
+    """Return the precomputed rollup Series for a key, or None if missing or stale."""
+    root = _rollups_dir(app_id)
+    entry = app_store.read_json(root / app_store.MANIFEST_NAME, default={}).get(_key_id(key))
+    info = app_store.table_info(app_id, key[0])
+    if entry is None or info is None or entry['table_version'] != info['version']:
+        return None
+    try:
+        return pd.read_pickle(root / entry['file'])
+    except FileNotFoundError:
+        return None
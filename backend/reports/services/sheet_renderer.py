@@ -0,0 +1,154 @@
+"""
+[AGENTE_DATA_ENGINEER] — SheetRenderer: batched server-side rendering of a ReportSheet.
+
+All charts of a sheet are planned together:
+  1. Each chart is first served from its precomputed rollup (rollups.py)
+  2. The remaining charts are grouped by (source, dimension)
+  3. Each group is computed with ONE multi-aggregation pass over the table
+  4. Every chart payload (Chart.js labels + datasets) returns in one response
+"""
+import logging
+from collections import defaultdict
+
+import pandas as pd
+
+from reports.services import app_store, rollups
+from reports.services.downsampling import METHODS as DOWNSAMPLE_METHODS, downsample
+from reports.services.qlik_parser import CHART_COLORS, CHART_BORDERS
+
+logger = logging.getLogger(__name__)
+
+# Maximum categories per bar / pie chart (largest values first)
+MAX_CHART_POINTS = 15
+
+
+def plan_sheet(layout):
+    """
+    Group the charts of a layout by (source, dimension).
+    Returns (plan, invalid) where plan = { (source, dimension): [(chart, key), ...] }
+    and invalid = charts missing source/dimension/metric.
+    """
+    plan = defaultdict(list)
+    invalid = []
+    for chart in layout:
+        key = rollups.chart_rollup_key(chart)
+        if key is None:
+            invalid.append(chart)
+        else:
+            plan[(key[0], key[1])].append((chart, key))
+    return plan, invalid
+
+
+def _label(value):
+    if pd.isna(value):
+        return 'N/A'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def chart_payload(chart, series):
+    """Build the Chart.js payload of a chart from its aggregated Series."""
+    series = series.dropna()
+    if chart.get('type') == 'line':
+        # Every point of the series, visually downsampled (optional 'max_points' / 'downsample')
+        max_points = chart.get('max_points')
+        method = chart.get('downsample')
+        series = downsample(
+            series.sort_index(),
+            max_points if isinstance(max_points, int) and max_points > 0 else None,
+            method if method in DOWNSAMPLE_METHODS else None,
+        )
+    else:
+        series = series.sort_values(ascending=False).head(MAX_CHART_POINTS)
+
+    values = [round(float(v), 2) for v in series.values]
+    return {
+        'labels': [_label(l) for l in series.index],
+        'datasets': [{
+            'label': chart.get('metric'),
+            'data': values,
+            'backgroundColor': CHART_COLORS[:len(values)],
+            'borderColor': CHART_BORDERS[:len(values)],
+            'borderWidth': 1,
+        }],
+    }
+
+
+def render_sheet(sheet, layout=None):
+    """
+    Render every chart of a sheet (or of an unsaved `layout`) in one call.
+    Returns { sheet, charts: [...], stats: {rollup_hits, scans, tables_loaded} }.
+    """
+    layout = [c for c in (sheet.layout_json if layout is None else layout) if isinstance(c, dict)]
+    app_id = sheet.app_id
+    plan, invalid = plan_sheet(layout)
+
+    payloads = {}
+    for chart in invalid:
+        payloads[id(chart)] = {'data': None, 'error': 'Configura origen, dimensión y métrica.'}
+
+    # 1. Rollup lookups
+    pending = defaultdict(list)
+    hits = 0
+    for group, items in plan.items():
+        for chart, key in items:
+            series = rollups.lookup(app_id, key)
+            if series is None:
+                pending[group].append((chart, key))
+            else:
+                payloads[id(chart)] = {'data': chart_payload(chart, series), 'served_from': 'rollup'}
+                hits += 1
+
+    # 2. One scan per (source, dimension) for everything else
+    tables = {}
+    scans = 0
+    for (source, dimension), items in pending.items():
+        try:
+            if source not in tables:
+                tables[source] = app_store.load_table(app_id, source)
+        except ValueError as e:
+            for chart, _ in items:
+                payloads[id(chart)] = {'data': None, 'error': str(e)}
+            continue
+
+        df = tables[source]
+        valid = []
+        for chart, key in items:
+            try:
+                missing = sorted(rollups.key_columns(key) - set(df.columns))
+            except ValueError as e:
+                payloads[id(chart)] = {'data': None, 'error': str(e)}
+                continue
+            if missing:
+                payloads[id(chart)] = {'data': None, 'error': f'Columna no encontrada en "{source}": {missing[0]}'}
+            else:
+                valid.append((chart, key))
+        if not valid:
+            continue
+
+        try:
+            results, errors = rollups.aggregate_by_dimension(df, dimension, [(k[2], k[3]) for _, k in valid])
+        except Exception as e:
+            results, errors = {}, {(k[2], k[3]): str(e) for _, k in valid}
+        scans += 1
+        for chart, key in valid:
+            pair = (key[2], key[3])
+            if pair in errors:
+                payloads[id(chart)] = {'data': None, 'error': errors[pair]}
+            else:
+                payloads[id(chart)] = {'data': chart_payload(chart, results[pair]), 'served_from': 'scan'}
+
+    logger.info(
+        f'[SHEET_RENDER] Sheet {sheet.id}: {len(layout)} charts, '
+        f'{hits} rollup hits, {scans} scans over {len(tables)} tables'
+    )
+
+    return {
+        'sheet': sheet.id,
+        'charts': [
+            {'id': c.get('id'), 'type': c.get('type', 'bar'), 'title': c.get('title', ''), **payloads[id(c)]}
+            for c in layout
+        ],
+        'stats': {'rollup_hits': hits, 'scans': scans, 'tables_loaded': len(tables)},
+    }
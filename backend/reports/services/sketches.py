@@ -0,0 +1,261 @@
+"""
+[AGENTE_DATA_ENGINEER] — Sketches: mergeable approximate statistics.
+
+Exact distinct counts, percentiles and top values need memory proportional to
+the data. For very large sources these small, mergeable sketches are updated
+chunk by chunk in ONE streaming pass (every update is vectorized numpy):
+
+  - HyperLogLog   → distinct count, ~0.8% standard error (p=14, 16 KB)
+  - DDSketch      → quantiles with 1% relative error
+  - MisraGries    → heavy hitters; counts under-estimated by at most n/(k+1)
+
+TableSketch keeps one of each per column plus exact rows / nulls / sum /
+min / max, and its summary is flagged `approximate: True`.
+"""
+import math
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Sources with more rows than this are profiled with sketches
+APPROX_ROW_THRESHOLD = 1_000_000
+
+HLL_PRECISION = 14
+DDSKETCH_ALPHA = 0.01
+HEAVY_HITTERS_K = 50
+SUMMARY_QUANTILES = (0.01, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+def _hash(series):
+    return pd.util.hash_pandas_object(series, index=False).to_numpy(dtype='uint64')
+
+
+class HyperLogLog:
+    """Distinct-count estimator (Flajolet et al. with linear counting for small ranges)."""
+
+    def __init__(self, p=HLL_PRECISION):
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype='uint8')
+
+    def update(self, series):
+        series = series.dropna()
+        if series.empty:
+            return self
+        h = _hash(series)
+        idx = (h >> np.uint64(64 - self.p)).astype('int64')
+        rest = h & np.uint64((1 << (64 - self.p)) - 1)
+        # bit length of the remaining (64 - p) bits; exact in float64 (< 2**53)
+        _, bitlen = np.frexp(rest.astype('float64'))
+        rank = (64 - self.p - bitlen + 1).astype('uint8')
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other):
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype('float64')))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+class DDSketch:
+    """Quantile sketch with relative accuracy `alpha` (Masson et al.)."""
+
+    def __init__(self, alpha=DDSKETCH_ALPHA):
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = Counter()
+        self.negative = Counter()
+        self.zeros = 0
+        self.count = 0
+
+    def _add(self, counter, values):
+        keys, counts = np.unique(np.ceil(np.log(values) / self.log_gamma).astype('int64'), return_counts=True)
+        counter.update(dict(zip(keys.tolist(), counts.tolist())))
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64')
+        values = values[np.isfinite(values)]
+        if not len(values):
+            return self
+        pos, neg = values[values > 0], values[values < 0]
+        if len(pos):
+            self._add(self.positive, pos)
+        if len(neg):
+            self._add(self.negative, -neg)
+        self.zeros += int(len(values) - len(pos) - len(neg))
+        self.count += int(len(values))
+        return self
+
+    def merge(self, other):
+        self.positive.update(other.positive)
+        self.negative.update(other.negative)
+        self.zeros += other.zeros
+        self.count += other.count
+        return self
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def buckets(self):
+        """Representative value and count of every non-empty bucket, ascending."""
+        neg = sorted(self.negative, reverse=True)
+        pos = sorted(self.positive)
+        values = [-self._value(k) for k in neg] + ([0.0] if self.zeros else []) + [self._value(k) for k in pos]
+        counts = [self.negative[k] for k in neg] + ([self.zeros] if self.zeros else []) + [self.positive[k] for k in pos]
+        return np.asarray(values, dtype='float64'), np.asarray(counts, dtype='int64')
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -self._value(key)
+        seen += self.zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return self._value(key)
+        return self._value(max(self.positive)) if self.positive else 0.0
+
+
+class MisraGries:
+    """Top-k heavy hitters; a chunk is folded in with one value_counts()."""
+
+    def __init__(self, k=HEAVY_HITTERS_K):
+        self.k = k
+        self.counts = pd.Series(dtype='int64')
+
+    def _prune(self, counts):
+        if len(counts) > self.k:
+            counts = counts.sort_values(ascending=False, kind='stable')
+            counts = counts.iloc[:self.k] - counts.iloc[self.k]
+            counts = counts[counts > 0]
+        return counts
+
+    def update(self, series):
+        part = series.dropna().astype(str).value_counts()
+        self.counts = self._prune(self.counts.add(part, fill_value=0).astype('int64'))
+        return self
+
+    def merge(self, other):
+        self.counts = self._prune(self.counts.add(other.counts, fill_value=0).astype('int64'))
+        return self
+
+    def top(self, n=10):
+        top = self.counts.sort_values(ascending=False, kind='stable').head(n)
+        return [{'value': v, 'count': int(c)} for v, c in top.items()]
+
+
+class ColumnSketch:
+    """Exact counters + sketches of one column."""
+
+    def __init__(self, numeric):
+        self.numeric = numeric
+        self.rows = 0
+        self.nulls = 0
+        self.hll = HyperLogLog()
+        if numeric:
+            self.total = 0.0
+            self.min = None
+            self.max = None
+            self.quantiles = DDSketch()
+        else:
+            self.heavy = MisraGries()
+
+    def update(self, series):
+        self.rows += len(series)
+        self.nulls += int(series.isna().sum())
+        self.hll.update(series)
+        if self.numeric:
+            values = pd.to_numeric(series, errors='coerce').dropna()
+            if len(values):
+                self.total += float(values.sum())
+                lo, hi = float(values.min()), float(values.max())
+                self.min = lo if self.min is None else min(self.min, lo)
+                self.max = hi if self.max is None else max(self.max, hi)
+                self.quantiles.update(values.to_numpy())
+        else:
+            self.heavy.update(series)
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        self.nulls += other.nulls
+        self.hll.merge(other.hll)
+        if self.numeric:
+            self.total += other.total
+            for attr, pick in (('min', min), ('max', max)):
+                mine, theirs = getattr(self, attr), getattr(other, attr)
+                setattr(self, attr, theirs if mine is None else mine if theirs is None else pick(mine, theirs))
+            self.quantiles.merge(other.quantiles)
+        else:
+            self.heavy.merge(other.heavy)
+        return self
+
+    def summary(self):
+        result = {
+            'null_count': self.nulls,
+            'distinct_count': self.hll.estimate(),
+        }
+        if self.numeric:
+            count = self.quantiles.count
+            result.update({
+                'mean': round(self.total / count, 2) if count else None,
+                'sum': round(self.total, 2),
+                'min': self.min,
+                'max': self.max,
+                'quantiles': {
+                    f'p{int(q * 100)}': (round(v, 4) if v is not None else None)
+                    for q in SUMMARY_QUANTILES
+                    for v in [self.quantiles.quantile(q)]
+                },
+            })
+        else:
+            result['top_values'] = self.heavy.top()
+        return result
+
+
+class TableSketch:
+    """One ColumnSketch per column, updated chunk by chunk."""
+
+    def __init__(self):
+        self.rows = 0
+        self.columns = {}
+
+    def update(self, chunk):
+        self.rows += len(chunk)
+        for col in chunk.columns:
+            sketch = self.columns.get(col)
+            if sketch is None:
+                sketch = self.columns[col] = ColumnSketch(pd.api.types.is_numeric_dtype(chunk[col]))
+            sketch.update(chunk[col])
+        return self
+
+    def merge(self, other):
+        self.rows += other.rows
+        for col, sketch in other.columns.items():
+            if col in self.columns:
+                self.columns[col].merge(sketch)
+            else:
+                self.columns[col] = sketch
+        return self
+
+    def summary(self):
+        return {
+            'approximate': True,
+            'row_count': self.rows,
+            'columns': {str(col): sketch.summary() for col, sketch in self.columns.items()},
+        }
@@ -0,0 +1,151 @@
+"""
+[AGENTE_DATA_ENGINEER] — Spill: oversized intermediate results kept on disk.
+
+A join can produce far more rows than its inputs. Above SPILL_THRESHOLD_BYTES
+(estimated before running, see join_planner.py) the join RESULT is not
+materialized: it is produced chunk by chunk and every chunk is written to a
+scratch directory
+
+    BI_STORE_ROOT/spill/<id>/chunk_00000.feather   ← Arrow IPC (pickle if Arrow cannot store it)
+
+as a SpilledFrame. The source frames being joined are still fully in memory
+before the spill; only the result is kept out of it. Today the only readers
+of a SpilledFrame are the load-script response (QlikEngine._build_response):
+the preview comes from the first chunks and the column types from the
+per-chunk dtypes recorded while writing. iter_chunks() is there for callers
+that need every row, one chunk at a time.
+
+Scratch space is removed automatically: when the SpilledFrame is cleaned up
+or garbage-collected, and — for workers that died mid-write — directories
+older than STALE_SECONDS are swept whenever a new spill starts.
+"""
+import logging
+import shutil
+import time
+import uuid
+import weakref
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+
+from reports.services.etl_pool import FRAME_KEY, save_frame
+
+logger = logging.getLogger(__name__)
+
+SPILL_CHUNK_ROWS = 500_000
+STALE_SECONDS = 6 * 3600
+
+
+def spill_root():
+    return Path(settings.BI_STORE_ROOT) / 'spill'
+
+
+def _sweep_stale(root):
+    """Remove scratch directories left behind by crashed workers."""
+    cutoff = time.time() - STALE_SECONDS
+    for entry in root.iterdir():
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+                logger.info(f'[SPILL] Removed stale scratch directory {entry.name}')
+        except OSError:
+            pass
+
+
+def _is_numeric(dtype_name):
+    try:
+        return pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype_name))
+    except TypeError:
+        return False
+
+
+class SpilledFrame:
+    """A DataFrame stored as columnar chunk files, read back chunk by chunk."""
+
+    def __init__(self):
+        root = spill_root()
+        root.mkdir(parents=True, exist_ok=True)
+        _sweep_stale(root)
+        self.directory = root / uuid.uuid4().hex
+        self.directory.mkdir()
+        self.chunks = []  # [{'ref', 'rows', 'dtypes': {col: dtype name}}]
+        self.columns = None
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.directory), True)
+
+    # ── Writing ──
+
+    def append(self, df):
+        if self.columns is None:
+            self.columns = list(df.columns)
+        if not len(df) and self.chunks:
+            return self
+        ref = save_frame(df[self.columns], self.directory / f'chunk_{len(self.chunks):05d}')
+        self.chunks.append({
+            'ref': ref, 'rows': len(df),
+            'dtypes': {str(col): str(dtype) for col, dtype in df.dtypes.items()},
+        })
+        return self
+
+    # ── Reading ──
+
+    def __len__(self):
+        return sum(chunk['rows'] for chunk in self.chunks)
+
+    @property
+    def nbytes(self):
+        return sum(Path(chunk['ref'][FRAME_KEY]).stat().st_size for chunk in self.chunks)
+
+    def iter_chunks(self, columns=None):
+        """The chunks in order, optionally projected to `columns`."""
+        for chunk in self.chunks:
+            path = Path(chunk['ref'][FRAME_KEY])
+            if path.suffix == '.feather':
+                yield pd.read_feather(path, columns=columns)
+            else:
+                df = pd.read_pickle(path)
+                yield df[columns] if columns else df
+
+    def head(self, n):
+        """First `n` rows, reading only the chunks they are in."""
+        parts, rows = [], 0
+        for chunk in self.iter_chunks():
+            parts.append(chunk.head(n - rows))
+            rows += len(parts[-1])
+            if rows >= n:
+                break
+        if not parts:
+            return pd.DataFrame(columns=self.columns or [])
+        return pd.concat(parts, ignore_index=True)
+
+    def numeric_columns(self):
+        """Columns numeric in every chunk (from the dtypes recorded while writing)."""
+        # The recorded dtypes are keyed by str(col); labels may be ints (headerless files)
+        numeric = {str(col) for col in self.columns or []}
+        for chunk in self.chunks:
+            numeric &= {col for col, dtype in chunk['dtypes'].items() if _is_numeric(dtype)}
+        return {col for col in self.columns or [] if str(col) in numeric}
+
+    # ── Lifetime ──
+
+    def cleanup(self):
+        """Delete the scratch directory now (also done on garbage collection)."""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cleanup()
+
+    def __getstate__(self):
+        # Pickling hands the directory over (e.g. from an ETL pool worker to the
+        # web worker): the sending side must not delete it when it drops the object
+        self._finalizer.detach()
+        return {'directory': str(self.directory), 'chunks': self.chunks, 'columns': self.columns}
+
+    def __setstate__(self, state):
+        self.directory = Path(state['directory'])
+        self.chunks = state['chunks']
+        self.columns = state['columns']
+        self._finalizer = weakref.finalize(self, shutil.rmtree, str(self.directory), True)
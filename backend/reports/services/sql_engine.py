@@ -0,0 +1,168 @@
+"""
+[AGENTE_DATA_ENGINEER] — SqlEngine: load scripts as SQL over the source files.
+
+Alternative to the pandas engine of QlikEngine.execute_load_script: the
+script is ONE SELECT statement run by DuckDB (embedded, vectorized,
+out-of-core) directly over the uploaded files:
+
+    {
+        "engine": "sql",
+        "sources": [{"source_id": 1, "upload": "<uuid>", "alias": "ventas"},
+                    {"source_id": 2, "upload": "<uuid>", "alias": "clientes"}],
+        "sql": "SELECT c.Region, SUM(v.Importe) AS total FROM ventas v JOIN clientes c ON ... GROUP BY 1"
+    }
+
+Each source is a view over its file — the Parquet copy when it exists (see
+columnar_store.py), else the CSV read natively by DuckDB. Sources DuckDB cannot
+read as they are (Excel, QVD, CSVs with thousands separators or non UTF-8
+text) are converted to Parquet first. DuckDB pushes filters and projections
+down into the scans (Parquet row groups are skipped on their min/max stats),
+scans with SQL_ENGINE_THREADS threads and spills to BI_STORE_ROOT/sql_tmp
+above SQL_ENGINE_MEMORY_LIMIT, so WHERE / GROUP BY / window functions work
+on files larger than RAM. Only the preview rows are fetched into Python.
+
+The connection can only read the source files: external access is disabled
+(no read_csv('/etc/...')) and the configuration is locked before user SQL runs.
+duckdb is imported lazily.
+"""
+import logging
+import numbers
+import re
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+from reports.services import columnar_store
+
+logger = logging.getLogger(__name__)
+
+MAX_RESULT_ROWS = 100
+ALIAS_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+# CSV encodings DuckDB decodes itself
+NATIVE_ENCODINGS = ('utf-8', 'utf-8-sig')
+NUMERIC_TYPES = (
+    'TINYINT', 'SMALLINT', 'INTEGER', 'BIGINT', 'HUGEINT',
+    'UTINYINT', 'USMALLINT', 'UINTEGER', 'UBIGINT', 'FLOAT', 'DOUBLE', 'DECIMAL',
+)
+
+
+def _duckdb():
+    try:
+        import duckdb
+        return duckdb
+    except ImportError:
+        raise ImportError('Librería "duckdb" no instalada. Ejecuta: pip install duckdb')
+
+
+def _quote(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def _scan(filepath):
+    """DuckDB table function reading a source file."""
+    parquet = columnar_store.columnar_path(filepath) if columnar_store.is_available() else None
+    if parquet is not None and parquet.exists():
+        return f'read_parquet({_quote(parquet)})', parquet
+
+    if Path(filepath).suffix.lower() == '.csv':
+        from reports.services.file_dialect import detect_dialect
+        d = detect_dialect(filepath)
+        if d['encoding'] in NATIVE_ENCODINGS and not d.get('thousands'):
+            return (
+                f'read_csv({_quote(filepath)}, delim={_quote(d["sep"])}, quote={_quote(d["quotechar"])}, '
+                f'decimal_separator={_quote(d["decimal"])}, header={"true" if d["header"] else "false"})'
+            ), Path(filepath)
+
+    # Not readable by DuckDB as is → typed Parquet copy
+    parquet = columnar_store.convert(filepath)
+    return f'read_parquet({_quote(parquet)})', parquet
+
+
+def _connect(paths):
+    duckdb = _duckdb()
+    tmp = Path(settings.BI_STORE_ROOT) / 'sql_tmp'
+    tmp.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(':memory:')
+    con.execute(f'SET threads = {int(settings.SQL_ENGINE_THREADS)}')
+    con.execute(f'SET memory_limit = {_quote(settings.SQL_ENGINE_MEMORY_LIMIT)}')
+    con.execute(f'SET temp_directory = {_quote(tmp)}')
+    con.execute(f'SET allowed_paths = [{", ".join(_quote(p) for p in paths)}]')
+    con.execute(f'SET allowed_directories = [{_quote(tmp)}]')
+    con.execute('SET enable_external_access = false')
+    return con
+
+
+def _check_statement(con, sql):
+    duckdb = _duckdb()
+    try:
+        statements = con.extract_statements(sql)
+    except duckdb.Error as e:
+        raise ValueError(f'SQL inválido: {e}')
+    if len(statements) != 1:
+        raise ValueError('El script SQL debe contener exactamente una sentencia.')
+    if statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError('El script SQL solo puede ser una consulta SELECT.')
+
+
+def _json_value(v):
+    if v is None:
+        return None
+    if isinstance(v, bool):
+        return str(v)
+    if isinstance(v, numbers.Number):
+        return float(v)
+    return str(v)
+
+
+def execute_sql(sql, sources):
+    """
+    Run a SELECT over `sources` ({alias: file path}).
+    Returns the same shape as QlikEngine.execute_load_script.
+    """
+    if not sql or not sql.strip():
+        raise ValueError('El script de carga no tiene consulta SQL.')
+    for alias in sources:
+        if not ALIAS_RE.match(alias):
+            raise ValueError(f'Alias de fuente inválido: "{alias}"')
+
+    scans = {alias: _scan(path) for alias, path in sources.items()}
+    con = _connect([str(path) for _, path in scans.values()])
+    start = datetime.now()
+    try:
+        for alias, (scan, _) in scans.items():
+            con.execute(f'CREATE VIEW "{alias}" AS SELECT * FROM {scan}')
+        con.execute('SET lock_configuration = true')
+        _check_statement(con, sql)
+
+        result = f'result_{uuid.uuid4().hex[:8]}'
+        duckdb = _duckdb()
+        try:
+            con.execute(f'CREATE TEMP TABLE {result} AS {sql.strip().rstrip(";")}')
+        except duckdb.Error as e:
+            raise ValueError(f'Error en la consulta SQL: {e}')
+
+        row_count = con.execute(f'SELECT COUNT(*) FROM {result}').fetchone()[0]
+        cursor = con.execute(f'SELECT * FROM {result} LIMIT {MAX_RESULT_ROWS}')
+        names = [d[0] for d in cursor.description]
+        types = [str(d[1]).upper() for d in cursor.description]
+        rows = cursor.fetchall()
+    finally:
+        con.close()
+
+    col_info = [
+        {'name': name, 'type': 'numeric' if t.split('(')[0] in NUMERIC_TYPES else 'categorical'}
+        for name, t in zip(names, types)
+    ]
+    records = [{name: _json_value(v) for name, v in zip(names, row)} for row in rows]
+
+    elapsed = int((datetime.now() - start).total_seconds() * 1000)
+    logger.info(f'[SQL_ENGINE] {len(sources)} sources → {row_count} rows in {elapsed}ms')
+    return {
+        'columns': col_info,
+        'rows': records,
+        'row_count': row_count,
+        'showing': len(records),
+        'warnings': [],
+    }
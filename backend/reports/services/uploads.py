@@ -0,0 +1,280 @@
+"""
+[AGENTE_DATA_ENGINEER] — Uploads: resumable chunked uploads (tus 1.0 core protocol).
+
+A multipart upload of a 1 GB file is buffered to a temporary file, copied to
+its final location, and lost entirely if the connection drops at 900 MB.
+With a resumable upload the client sends the file in PATCH chunks:
+
+    POST   /uploads/        Upload-Length, Upload-Metadata → Location
+    HEAD   /uploads/<id>/   → Upload-Offset (where to resume)
+    PATCH  /uploads/<id>/   Upload-Offset + raw bytes → new Upload-Offset
+
+Every chunk is streamed straight into the final file
+(MEDIA_ROOT/uploads/<user id>/<id>/<filename>) and into an incremental
+SHA-256, so there is no copy at the end and the content hash is known the
+moment the last byte lands (parse_cache reuses it instead of re-reading the
+file, as file_dialect does with the dialect sniffed during the upload).
+Until then the folder also holds multi_file.IN_PROGRESS_MARKER, so load
+scripts reading sources by path never see a partial file.
+
+Work starts before the upload ends: the CSV dialect is sniffed as soon as
+SAMPLE_BYTES have arrived, and a first column profile is computed from the
+first EARLY_PROFILE_BYTES of complete lines. On completion the file is
+converted to its Parquet copy in the background (see columnar_store.py),
+whatever COLUMNAR_AUTO_CONVERT says: an upload is about to be read. Files
+without an early profile (Excel, QVD) are profiled by that same job, from
+the Parquet copy, never inside the request carrying the last chunk.
+
+PATCH requests of one upload are serialized by an exclusive lock on its
+file; a concurrent one gets a conflict.
+"""
+import fcntl
+import hashlib
+import io
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.text import get_valid_filename
+
+from reports.models import UploadSession
+from reports.services import columnar_store, parse_cache
+from reports.services.file_dialect import SAMPLE_BYTES, csv_read_kwargs, remember_dialect, sniff
+from reports.services.multi_file import IN_PROGRESS_MARKER
+from reports.services.profiler import profile_frame
+
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = '1.0.0'
+TUS_EXTENSIONS = 'creation,termination'
+UPLOAD_DIR = 'uploads'
+ALLOWED_EXTENSIONS = ('.csv', '.xlsx', '.xls', '.qvd')
+STREAM_BLOCK_BYTES = 1024 * 1024
+EARLY_PROFILE_BYTES = 8 * 1024 * 1024
+EARLY_PROFILE_ROWS = 50_000
+# Running hashes kept for uploads that may still get chunks
+MAX_HASHERS = 64
+HASHER_IDLE_SECONDS = 3600
+
+# Upload id → (offset, running SHA-256, last use), least recently used first.
+# Lost on restart, in another worker process or when evicted (idle uploads,
+# over MAX_HASHERS): the hash is then caught up from the bytes on disk.
+_hashers = OrderedDict()
+_lock = threading.Lock()
+_background = ThreadPoolExecutor(max_workers=1, thread_name_prefix='uploads')
+
+
+class UploadConflict(ValueError):
+    """The client's offset does not match the stored one (HTTP 409)."""
+
+
+def user_root(user):
+    """Folder of every upload of `user`: the only files its load scripts may read by path."""
+    return Path(settings.MEDIA_ROOT) / UPLOAD_DIR / str(user.pk)
+
+
+def create_upload(user, filename, size):
+    """Register a new upload and create its (empty) final file."""
+    name = get_valid_filename(Path(filename or '').name)
+    if not name:
+        raise ValueError('Falta el nombre del archivo.')
+    if Path(name).suffix.lower() not in ALLOWED_EXTENSIONS:
+        raise ValueError(f'Formato no soportado: {Path(name).suffix or name}')
+    if size <= 0:
+        raise ValueError('El tamaño del archivo debe ser mayor que cero.')
+    if size > settings.RESUMABLE_UPLOAD_MAX_BYTES:
+        raise ValueError(
+            f'El archivo supera el tamaño máximo ({settings.RESUMABLE_UPLOAD_MAX_BYTES // 1024 ** 2} MB).'
+        )
+
+    session = UploadSession(created_by=user, filename=name, size=size)
+    session.file.name = f'{UPLOAD_DIR}/{user.pk}/{session.id}/{name}'
+    path = Path(session.file.path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    # Path sources of load scripts skip the file until it is complete
+    (path.parent / IN_PROGRESS_MARKER).touch()
+    session.save()
+    logger.info(f'[UPLOADS] {session.id}: {name} ({size / 1024 / 1024:.1f} MB) created')
+    return session
+
+
+def _hasher(session):
+    """Running SHA-256 of the first `offset` bytes of the upload."""
+    with _lock:
+        entry = _hashers.pop(session.id, None)
+    if entry is not None and entry[0] == session.offset:
+        return entry[1]
+    h = hashlib.sha256()
+    remaining = session.offset
+    with open(session.file.path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(STREAM_BLOCK_BYTES, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h
+
+
+def _remember_hasher(upload_id, offset, h):
+    """Keep the running hash for the next chunk; drop abandoned uploads' hashes."""
+    now = time.monotonic()
+    with _lock:
+        _hashers[upload_id] = (offset, h, now)
+        _hashers.move_to_end(upload_id)
+        while len(_hashers) > 1:  # never the one just stored
+            oldest_id, (_, _, used) = next(iter(_hashers.items()))
+            if len(_hashers) <= MAX_HASHERS and now - used < HASHER_IDLE_SECONDS:
+                break
+            del _hashers[oldest_id]
+
+
+def append_chunk(session, stream, offset):
+    """Append the bytes of `stream` at `offset`; returns the updated session."""
+    with open(session.file.path, 'r+b') as f:
+        # One writer per upload, across threads and worker processes
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            raise UploadConflict('Otra petición está enviando datos de esta subida.')
+        # Checked under the lock: another request may have appended meanwhile
+        session.refresh_from_db(fields=['offset', 'status'])
+        if session.status == 'complete':
+            raise UploadConflict('La subida ya está completa.')
+        if offset != session.offset:
+            raise UploadConflict(f'Upload-Offset {offset} no coincide con el actual ({session.offset}).')
+
+        h = _hasher(session)
+        remaining = session.size - session.offset
+        written = 0
+        try:
+            # Bytes past the acknowledged offset belong to an interrupted chunk
+            f.seek(session.offset)
+            f.truncate()
+            while written < remaining:
+                block = stream.read(min(STREAM_BLOCK_BYTES, remaining - written))
+                if not block:
+                    break
+                f.write(block)
+                h.update(block)
+                written += len(block)
+            f.flush()
+        finally:
+            # A dropped connection keeps what arrived: the client resumes from here
+            session.offset += written
+            _remember_hasher(session.id, session.offset, h)
+            session.save(update_fields=['offset', 'updated_at'])
+
+        _analyze_early(session)
+        if session.offset == session.size:
+            _finalize(session, h)
+    return session
+
+
+# ── Early analysis ──
+
+def _is_csv(session):
+    return Path(session.filename).suffix.lower() == '.csv'
+
+
+def _prefix(session, nbytes):
+    with open(session.file.path, 'rb') as f:
+        return f.read(nbytes)
+
+
+def _analyze_early(session):
+    """Sniff / profile from the bytes received so far, once enough have arrived."""
+    complete = session.offset == session.size
+    fields = []
+    try:
+        if _is_csv(session) and session.dialect is None and (session.offset >= SAMPLE_BYTES or complete):
+            session.dialect = sniff(_prefix(session, SAMPLE_BYTES), truncated=not complete)
+            fields.append('dialect')
+            logger.info(f'[UPLOADS] {session.id}: dialect sniffed at {session.offset} bytes')
+
+        if _is_csv(session) and session.profile is None and session.dialect is not None and (
+            session.offset >= EARLY_PROFILE_BYTES or complete
+        ):
+            data = _prefix(session, EARLY_PROFILE_BYTES)
+            if len(data) < session.size:
+                data = data[:data.rfind(b'\n') + 1]  # complete lines only
+            df = pd.read_csv(io.BytesIO(data), nrows=EARLY_PROFILE_ROWS, **csv_read_kwargs(session.dialect))
+            sampled = len(data) < session.size or len(df) >= EARLY_PROFILE_ROWS
+            session.profile = {**profile_frame(df), 'sampled': sampled}
+            fields.append('profile')
+            logger.info(f'[UPLOADS] {session.id}: profiled {len(df)} rows at {session.offset} bytes')
+    except Exception as e:
+        # Early analysis is best effort: the upload itself must never fail
+        logger.warning(f'[UPLOADS] {session.id}: early analysis failed: {e}')
+    if fields:
+        session.save(update_fields=fields + ['updated_at'])
+
+
+def _finalize(session, h):
+    session.sha256 = h.hexdigest()
+    session.status = 'complete'
+    with _lock:
+        _hashers.pop(session.id, None)
+    parse_cache.remember_digest(session.file.path, session.sha256)
+    if session.dialect is not None:
+        remember_dialect(session.file.path, session.dialect)
+    session.save(update_fields=['sha256', 'status', 'updated_at'])
+    (Path(session.file.path).parent / IN_PROGRESS_MARKER).unlink(missing_ok=True)
+    _run_in_background(_process_upload, session.id)
+    logger.info(f'[UPLOADS] {session.id}: complete, sha256={session.sha256[:12]}…')
+
+
+# ── Background work of a completed upload ──
+
+def _run_in_background(func, *args):
+    return _background.submit(func, *args)
+
+
+def _process_upload(session_id):
+    """
+    Parquet copy of a completed upload (no-op without pyarrow), then its
+    column profile if the early analysis did not compute one.
+    """
+    try:
+        session = UploadSession.objects.filter(pk=session_id, status='complete').first()
+        if session is None:
+            return
+        path = session.file.path
+        if columnar_store.is_available():
+            try:
+                columnar_store.convert(path)
+            except Exception as e:
+                logger.warning(f'[UPLOADS] Conversion of {Path(path).name} failed: {e}')
+
+        if session.profile is None:
+            try:
+                from reports.services.qlik_parser import MAX_RAW_ROWS, read_file_to_dataframe
+                df = read_file_to_dataframe(path)
+                session.profile = {**profile_frame(df), 'sampled': len(df) >= MAX_RAW_ROWS}
+                session.save(update_fields=['profile', 'updated_at'])
+                logger.info(f'[UPLOADS] {session_id}: profiled {len(df)} rows')
+            except Exception as e:
+                logger.warning(f'[UPLOADS] {session_id}: profiling failed: {e}')
+    finally:
+        close_old_connections()
+
+
+def delete_upload(session):
+    """Terminate an upload: remove its file and record."""
+    with _lock:
+        _hashers.pop(session.id, None)
+    path = Path(session.file.path)
+    path.unlink(missing_ok=True)
+    (path.parent / IN_PROGRESS_MARKER).unlink(missing_ok=True)
+    try:
+        path.parent.rmdir()
+    except OSError:
+        pass
+    session.delete()
@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def bi_store(settings, tmp_path, monkeypatch):
+    """Every test gets an empty BI store and media root, with no background work."""
+    from reports.services import uploads
+    from reports.services.frame_cache import get_cache
+
+    settings.BI_STORE_ROOT = tmp_path / 'bi_store'
+    settings.MEDIA_ROOT = tmp_path / 'media'
+    settings.MEDIA_ROOT.mkdir()
+    settings.COLUMNAR_AUTO_CONVERT = False
+    settings.ETL_POOL_WORKERS = 0
+    monkeypatch.setattr(uploads, '_run_in_background', lambda func, *args: func(*args))
+    get_cache().clear()
+    yield settings.BI_STORE_ROOT
+    get_cache().clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(
+        empleado_id='EMP001', username='ana', email='ana@example.com', password='x',
+    )
+
+
+@pytest.fixture
+def api(user):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@pytest.fixture
+def upload(user):
+    """Complete upload of `user` holding `data`, sent in one chunk."""
+    import io
+
+    from reports.services import uploads
+
+    def make(name, data, owner=None):
+        session = uploads.create_upload(owner or user, name, len(data))
+        return uploads.append_chunk(session, io.BytesIO(data), 0)
+    return make
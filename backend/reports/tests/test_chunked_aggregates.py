@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services.chunked_aggregates import PartialAggregates
+
+
+@pytest.fixture
+def ventas():
+    rng = np.random.default_rng(0)
+    n = 6_000
+    df = pd.DataFrame({
+        'familia': rng.choice(['PVC', 'Aluminio', 'Vidrio'], n),
+        'region': rng.choice(['Norte', 'Sur'], n),
+        'importe': rng.uniform(-20, 100, n).round(2),
+        'unidades': rng.integers(1, 9, n).astype('float64'),
+        'fecha': (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 90 * 24, n), unit='h')).astype(str),
+    })
+    df.loc[rng.random(n) < 0.05, 'importe'] = np.nan
+    df.loc[n - 10:, 'familia'] = 'Persiana'  # only in the last chunk
+    return df
+
+
+def _partial():
+    return PartialAggregates(['familia', 'region'], ['importe', 'unidades'], dt_col='fecha')
+
+
+def _fold(chunks):
+    agg = _partial()
+    for chunk in chunks:
+        agg.update(chunk.copy())
+    return agg
+
+
+def _split(df, size):
+    return [df.iloc[i:i + size] for i in range(0, len(df), size)]
+
+
+def _check(agg, df):
+    assert agg.rows == len(df)
+    for cat in ('familia', 'region'):
+        expected = df.groupby(cat)[['importe', 'unidades']].sum()
+        pd.testing.assert_frame_equal(agg.group_sums[cat].sort_index(), expected, check_names=False)
+        assert agg.value_counts[cat].sort_index().tolist() == df[cat].value_counts().sort_index().tolist()
+    for col in ('importe', 'unidades'):
+        s = df[col]
+        assert agg.numeric_summary(col) == {
+            'mean': round(s.mean(), 2), 'sum': round(s.sum(), 2), 'min': round(s.min(), 2), 'max': round(s.max(), 2),
+        }
+    daily = df.groupby(pd.to_datetime(df['fecha']).dt.floor('D'))[['importe', 'unidades']].sum()
+    pd.testing.assert_frame_equal(agg.time_buckets.sort_index(), daily, check_names=False, check_freq=False)
+    assert agg.dated_rows == len(df)
+
+
+@pytest.mark.parametrize('size', [6_000, 1_000, 777])
+def test_folded_chunks_equal_the_whole_file(ventas, size):
+    _check(_fold(_split(ventas, size)), ventas)
+
+
+def test_merged_partials_equal_the_whole_file(ventas):
+    # e.g. two files (or two workers) folded apart and merged afterwards
+    halves = _split(ventas, 2_500)
+    merged = _fold(halves[:1]).merge(_fold(halves[1:]))
+    _check(merged, ventas)
+
+
+def test_merge_into_an_empty_partial(ventas):
+    _check(_partial().merge(_fold(_split(ventas, 1_000))), ventas)
+
+
+def test_junk_in_a_numeric_column_is_coerced(ventas):
+    late = ventas.iloc[3_000:].copy()
+    late['importe'] = late['importe'].astype(object)
+    late.iloc[0, late.columns.get_loc('importe')] = 'n/d'
+    agg = _fold([ventas.iloc[:3_000], late])
+    expected = ventas.copy()
+    expected.iloc[3_000, expected.columns.get_loc('importe')] = np.nan
+    assert agg.numeric_summary('importe')['sum'] == round(expected['importe'].sum(), 2)
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from reports.benchmarks.datasets import write_qvd
+from reports.services import columnar_store
+from reports.services.qlik_parser import read_file_to_dataframe
+from reports.services.qvd_native import read_qvd
+
+pytest.importorskip('pyarrow')
+
+
+def test_headerless_csv_keeps_its_column_names(tmp_path):
+    path = tmp_path / 'sin_cabecera.csv'
+    path.write_text('1;A001;5,5\n2;A002;7\n3;B001;1,25\n', encoding='utf-8')
+    original = read_file_to_dataframe(str(path))
+    assert list(original.columns) == [0, 1, 2]
+
+    columnar_store.convert(str(path))
+    pd.testing.assert_frame_equal(columnar_store.read_columnar(str(path)), original)
+    assert list(columnar_store.read_columnar(str(path), columns=[2]).columns) == [2]
+    assert list(next(columnar_store.iter_columnar(str(path), 2)).columns) == [0, 1, 2]
+
+
+def test_mixed_columns_are_text_with_their_original_dtype(tmp_path):
+    wb = Workbook()
+    wb.active.append(['Código', 'Importe'])
+    for code, amount in ((101, 5.5), ('A-7', 2.0), (102, 1.25)):
+        wb.active.append([code, amount])
+    path = tmp_path / 'codigos.xlsx'
+    wb.save(path)
+
+    columnar_store.convert(str(path))
+    df = columnar_store.read_columnar(str(path))
+    assert df['Código'].dtype == object
+    assert df['Código'].tolist() == ['101', 'A-7', '102']
+    assert df['Importe'].tolist() == [5.5, 2.0, 1.25]
+
+
+def test_qvd_is_converted_in_chunks(tmp_path, monkeypatch):
+    frame = pd.DataFrame({'id': np.arange(10, dtype='int64'), 'familia': list('ABCDEABCDE')})
+    path = tmp_path / 'ventas.qvd'
+    write_qvd(frame, path)
+    reads = []
+    monkeypatch.setattr(columnar_store, 'CHUNK_ROWS', 4)
+    monkeypatch.setattr('reports.services.qvd_native.read_qvd', lambda *a, **kw: reads.append(kw) or read_qvd(*a, **kw))
+
+    columnar_store.convert(str(path))
+    assert [(r['start'], r['stop']) for r in reads] == [(0, 4), (4, 8), (8, 12)]
+    pd.testing.assert_frame_equal(columnar_store.read_columnar(str(path)), read_qvd(str(path)))
+
+
+def test_later_chunks_widen_the_column_types(tmp_path, monkeypatch):
+    # 'nota' is empty in the first chunk, 'codigo' numeric, 'importe' whole numbers
+    rows = ['id;nota;codigo;importe'] + [f'{i};;{i};{i}' for i in range(4)] + ['4;revisar;A-7;2,5', '5;;8;3']
+    path = tmp_path / 'ventas.csv'
+    path.write_text('\n'.join(rows) + '\n', encoding='utf-8')
+    monkeypatch.setattr(columnar_store, 'CHUNK_ROWS', 4)
+
+    columnar_store.convert(str(path))
+    df = columnar_store.read_columnar(str(path))
+    assert df['id'].tolist() == list(range(6))
+    assert df['nota'].tolist()[4] == 'revisar' and df['nota'].isna().sum() == 5
+    assert df['codigo'].dtype == object
+    assert df['codigo'].tolist() == ['0', '1', '2', '3', 'A-7', '8']
+    assert df['importe'].tolist() == [0.0, 1.0, 2.0, 3.0, 2.5, 3.0]
+    assert list(columnar_store._root().glob('*.tmp')) == []
+
+
+def test_workbooks_over_the_memory_budget_are_not_converted(tmp_path, settings):
+    wb = Workbook()
+    wb.active.append(['a', 'b'])
+    for i in range(100):
+        wb.active.append([i, f'fila {i}'])
+    path = tmp_path / 'grande.xlsx'
+    wb.save(path)
+
+    settings.LOAD_MEMORY_BUDGET_BYTES = 1024
+    with pytest.raises(ValueError):
+        columnar_store.convert(str(path))
+    assert not columnar_store.columnar_path(str(path)).exists()
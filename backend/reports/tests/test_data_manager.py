@@ -0,0 +1,147 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from reports.services.data_manager import QlikEngine
+
+pytestmark = pytest.mark.django_db
+
+VENTAS = pd.DataFrame({
+    'pedido': range(1, 301),
+    'cod_cliente': [f'C{i % 12}' for i in range(300)],
+    'importe': [round(i * 1.25, 2) for i in range(300)],
+    'comentario': ['sin comentario'] * 300,
+})
+CLIENTES = pd.DataFrame({'cod_cliente': [f'C{i}' for i in range(10)], 'provincia': ['La Rioja', 'Navarra'] * 5})
+
+
+def _csv(df, sep=';', decimal=','):
+    return df.to_csv(index=False, sep=sep, decimal=decimal).encode('utf-8')
+
+
+def _script(**script):
+    return SimpleNamespace(load_script_json=script)
+
+
+@pytest.fixture
+def sources(upload):
+    return upload('ventas.csv', _csv(VENTAS)), upload('clientes.csv', _csv(CLIENTES, sep=','))
+
+
+def _expected():
+    return VENTAS.merge(CLIENTES, on='cod_cliente', how='left')
+
+
+def test_join_of_two_uploads(sources, user):
+    ventas, clientes = sources
+    result = QlikEngine.execute_load_script(_script(
+        sources=[
+            {'source_id': 1, 'upload': str(ventas.id), 'columns': ['pedido', 'importe']},
+            {'source_id': 2, 'upload': str(clientes.id)},
+        ],
+        joins=[{'left_source': 1, 'right_source': 2, 'left_key': 'cod_cliente', 'right_key': 'cod_cliente'}],
+    ), user)
+    expected = _expected()
+    assert result['row_count'] == len(expected)
+    assert [c['name'] for c in result['columns']] == ['pedido', 'importe', 'cod_cliente', 'provincia']
+    assert {c['name']: c['type'] for c in result['columns']}['importe'] == 'numeric'
+    assert [r['importe'] for r in result['rows']] == expected['importe'].head(len(result['rows'])).tolist()
+    assert result['rows'][0]['provincia'] == expected['provincia'].iloc[0]
+
+
+def test_spilled_join_gives_the_same_response(sources, user, settings):
+    ventas, clientes = sources
+    script = _script(
+        sources=[{'source_id': 1, 'upload': str(ventas.id)}, {'source_id': 2, 'upload': str(clientes.id)}],
+        joins=[{'left_source': 1, 'right_source': 2, 'left_key': 'cod_cliente', 'right_key': 'cod_cliente'}],
+    )
+    in_memory = QlikEngine.execute_load_script(script, user)
+    settings.SPILL_THRESHOLD_BYTES = 1
+    spilled = QlikEngine.execute_load_script(script, user)
+    assert spilled == in_memory
+    spill_root = settings.BI_STORE_ROOT / 'spill'
+    assert not spill_root.exists() or not any(spill_root.iterdir())
+
+
+def test_uploads_of_other_users_are_not_found(sources, django_user_model):
+    other = django_user_model.objects.create_user(
+        empleado_id='EMP002', username='luis', email='luis@example.com', password='x',
+    )
+    script = _script(sources=[{'source_id': 1, 'upload': str(sources[0].id)}])
+    with pytest.raises(ValueError):
+        QlikEngine.execute_load_script(script, other)
+
+
+def test_source_without_file(user):
+    with pytest.raises(ValueError):
+        QlikEngine.execute_load_script(_script(sources=[{'source_id': 1}]), user)
+
+
+def test_extract_metadata(sources):
+    metadata = QlikEngine.extract_metadata(sources[0])
+    assert metadata['row_count'] == len(VENTAS)
+    assert [c['name'] for c in metadata['columns']] == list(VENTAS.columns)
+    assert metadata['columns'][1]['unique_count'] == VENTAS['cod_cliente'].nunique()
+    assert metadata['profile']['rows'] == len(VENTAS)
+
+
+def test_path_sources_are_limited_to_the_users_uploads(sources, user, django_user_model, upload):
+    other = django_user_model.objects.create_user(
+        empleado_id='EMP002', username='luis', email='luis@example.com', password='x',
+    )
+    foreign = upload('ventas_2.csv', _csv(VENTAS), owner=other)
+
+    own = QlikEngine.execute_load_script(_script(sources=[{'source_id': 1, 'path': '*/ventas*.csv'}]), user)
+    assert own['row_count'] == len(VENTAS)  # the other user's ventas_2.csv is not matched
+
+    for path in (f'../{other.pk}/{foreign.id}/ventas_2.csv', foreign.file.path):
+        with pytest.raises(ValueError):
+            QlikEngine.execute_load_script(_script(sources=[{'source_id': 1, 'path': path}]), user)
+
+
+def test_path_sources_skip_uploads_in_progress(sources, user, upload):
+    import io
+
+    from reports.services import uploads
+
+    partial = uploads.create_upload(user, 'ventas_2.csv', len(_csv(VENTAS)))
+    uploads.append_chunk(partial, io.BytesIO(_csv(VENTAS)[:500]), 0)
+
+    # The half-written ventas_2.csv is not matched (nor rejected for its missing rows)
+    result = QlikEngine.execute_load_script(_script(sources=[{'source_id': 1, 'path': '*/ventas*.csv'}]), user)
+    assert result['row_count'] == len(VENTAS)
+    for path in (f'{partial.id}/ventas_2.csv', f'{partial.id}'):
+        with pytest.raises(ValueError):
+            QlikEngine.execute_load_script(_script(sources=[{'source_id': 1, 'path': path}]), user)
+
+    uploads.append_chunk(partial, io.BytesIO(_csv(VENTAS)[500:]), 500)
+    result = QlikEngine.execute_load_script(_script(sources=[{'source_id': 1, 'path': '*/ventas*.csv'}]), user)
+    assert result['row_count'] == 2 * len(VENTAS)
+
+
+def test_symlinks_out_of_the_users_folder_are_refused(sources, user, django_user_model, upload):
+    from reports.services.uploads import user_root
+
+    other = django_user_model.objects.create_user(
+        empleado_id='EMP002', username='luis', email='luis@example.com', password='x',
+    )
+    foreign = upload('secreto.csv', _csv(VENTAS), owner=other)
+    (user_root(user) / 'enlace.csv').symlink_to(foreign.file.path)
+    (user_root(user) / 'carpeta').symlink_to(user_root(other), target_is_directory=True)
+    for path in ('enlace.csv', 'carpeta', 'carpeta/*/secreto.csv', '*.csv'):
+        with pytest.raises(ValueError):
+            QlikEngine.execute_load_script(_script(sources=[{'source_id': 1, 'path': path}]), user)
+
+
+def test_row_limit_keeps_rows_of_every_file(user, upload, monkeypatch):
+    from reports.services import data_manager
+    from reports.services.uploads import user_root
+
+    monkeypatch.setattr(data_manager, 'MAX_LOAD_ROWS', 60)
+    for month in ('01', '02', '03'):
+        upload(f'ventas_2024_{month}.csv', _csv(VENTAS.head(50)))
+
+    df = QlikEngine._read_file(str(user_root(user) / '*' / 'ventas_2024_*.csv'))
+    assert len(df) == 60
+    assert df['_file'].value_counts().to_dict() == {f'ventas_2024_{m}.csv': 20 for m in ('01', '02', '03')}
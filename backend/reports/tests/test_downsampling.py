@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services.downsampling import downsample, lttb, minmax
+
+
+def _reference_lttb(x, y, n_out):
+    """Straight transcription of Steinarsson's LTTB (point by point)."""
+    n = len(x)
+    every = (n - 2) / (n_out - 2)
+    keep, a = [0], 0
+    for i in range(n_out - 2):
+        start, end = math.floor(i * every) + 1, math.floor((i + 1) * every) + 1
+        avg_start, avg_end = end, min(math.floor((i + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        keep.append(best)
+        a = best
+    return keep + [n - 1]
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(0)
+    y = np.cumsum(rng.normal(0, 1, 5_000))
+    y[1234] += 80  # a spike daily resampling would average away
+    return pd.Series(y, index=pd.date_range('2020-01-01', periods=len(y), freq='h'))
+
+
+def test_lttb_matches_reference_implementation(series):
+    x = series.index.asi8.astype('float64')
+    y = series.to_numpy()
+    assert lttb(x, y, 300).tolist() == _reference_lttb(x, y, 300)
+
+
+def test_lttb_keeps_spikes_and_endpoints(series):
+    reduced = downsample(series, max_points=200, method='lttb')
+    assert len(reduced) == 200
+    assert reduced.index[0] == series.index[0] and reduced.index[-1] == series.index[-1]
+    assert series.index[1234] in reduced.index
+    assert reduced.index.is_monotonic_increasing
+
+
+def test_minmax_keeps_every_bucket_extreme(series):
+    reduced = downsample(series, max_points=100, method='minmax')
+    assert len(reduced) <= 100
+    assert reduced.max() == series.max() and reduced.min() == series.min()
+    idx = minmax(series.to_numpy(), 100)
+    assert idx[0] == 0 and idx[-1] == len(series) - 1
+
+
+def test_short_series_are_returned_unchanged(series):
+    short = series.head(50)
+    assert downsample(short, max_points=100) is short
+
+
+def test_several_columns_share_their_points(series):
+    frame = pd.DataFrame({'a': series, 'b': -series.to_numpy()[::-1]}, index=series.index)
+    reduced = downsample(frame, max_points=100, method='lttb')
+    assert set(downsample(frame['a'], 100, 'lttb').index) <= set(reduced.index)
+
+
+def test_nan_values_are_skipped(series):
+    with_nans = series.copy()
+    with_nans.iloc[::3] = np.nan
+    reduced = downsample(with_nans, max_points=100)
+    assert reduced.notna().all()
+
+
+def test_unknown_method():
+    with pytest.raises(ValueError):
+        downsample(pd.Series(range(10)), max_points=5, method='mean')
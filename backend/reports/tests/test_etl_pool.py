@@ -0,0 +1,46 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from reports.services import etl_pool
+
+
+def test_save_frame_keeps_the_index(tmp_path):
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']}, index=pd.Index([5, 7], name='id'))
+    pd.testing.assert_frame_equal(etl_pool.load_frame(etl_pool.save_frame(df, tmp_path / 'f')), df)
+
+    mixed = pd.DataFrame({'a': [1, 'x']}, index=[3, 4])  # Arrow refuses it: pickle fallback
+    ref = etl_pool.save_frame(mixed, tmp_path / 'm')
+    assert ref[etl_pool.FRAME_KEY].endswith('.pkl')
+    pd.testing.assert_frame_equal(etl_pool.load_frame(ref), mixed)
+
+
+def test_run_returns_frames_and_raises_job_errors():
+    df = pd.DataFrame({'a': [1, 2]}, index=[5, 7])
+    pd.testing.assert_frame_equal(etl_pool.run('pandas:concat', [df, df]), pd.concat([df, df]))
+    with pytest.raises(ValueError):
+        etl_pool.run('json:loads', '{')
+
+
+def test_job_over_its_memory_limit_fails_alone(settings):
+    settings.ETL_POOL_WORKERS = 2
+    settings.ETL_JOB_MEMORY_BYTES = 2 * 1024 ** 3
+    results = {}
+
+    def job(name, *args):
+        try:
+            results[name] = etl_pool.run(*args)
+        except ValueError as e:
+            results[name] = str(e)
+
+    threads = [
+        threading.Thread(target=job, args=('ok', 'time:sleep', 1)),
+        threading.Thread(target=job, args=('big', 'numpy:ones', 10 ** 10)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results['ok'] is None
+    assert 'límite de memoria' in results['big']
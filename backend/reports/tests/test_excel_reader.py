@@ -0,0 +1,115 @@
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from reports.services.excel_reader import SHEET_COLUMN, read_excel, sheet_names
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    wb = Workbook()
+    ventas = wb.active
+    ventas.title = 'Ventas'
+    ventas.append(['Fecha', 'Cliente', 'Importe', 'Cobrado', 'Unidades'])
+    for i in range(1, 41):
+        ventas.append([datetime(2024, 1, i % 28 + 1), f'Cliente {i % 7}', i * 1.5, i % 2 == 0, i])
+        if i == 20:
+            ventas.append([])  # blank row inside the data
+    compras = wb.create_sheet('Compras')
+    compras.append(['Fecha', 'Cliente', 'Importe', 'Cobrado', 'Unidades'])
+    for i in range(1, 6):
+        compras.append([datetime(2023, 6, i), f'Proveedor {i}', -i * 2.0, False, i])
+    texto = wb.create_sheet('Sin datos')
+    texto.append(['Solo cabecera'])
+    path = tmp_path / 'libro.xlsx'
+    wb.save(path)
+    return path
+
+
+def test_first_sheet_matches_pandas(workbook):
+    df = read_excel(str(workbook))
+    expected = pd.read_excel(workbook, engine='openpyxl').dropna(how='all').reset_index(drop=True)
+    assert list(df.columns) == list(expected.columns)
+    assert len(df) == 40
+    assert (df['Fecha'] == expected['Fecha']).all()
+    assert df['Cliente'].tolist() == expected['Cliente'].tolist()
+    assert df['Importe'].tolist() == expected['Importe'].tolist()
+    assert df['Cobrado'].astype(bool).tolist() == expected['Cobrado'].astype(bool).tolist()
+    assert df['Unidades'].astype('int64').tolist() == expected['Unidades'].astype('int64').tolist()
+
+
+def test_sheet_names(workbook):
+    assert sheet_names(str(workbook)) == ['Ventas', 'Compras', 'Sin datos']
+
+
+def test_sheet_selection_by_name_and_index(workbook):
+    assert read_excel(str(workbook), sheets='Compras')['Cliente'].tolist() == [f'Proveedor {i}' for i in range(1, 6)]
+    assert len(read_excel(str(workbook), sheets=1)) == 5
+
+
+def test_several_sheets_are_tagged(workbook):
+    df = read_excel(str(workbook), sheets=['Ventas', 'Compras'])
+    assert len(df) == 45
+    assert df[SHEET_COLUMN].value_counts().to_dict() == {'Ventas': 40, 'Compras': 5}
+
+
+def test_projection_and_nrows(workbook):
+    df = read_excel(str(workbook), columns={'Importe', 'Cliente'}, nrows=10)
+    assert list(df.columns) == ['Cliente', 'Importe']
+    assert df['Importe'].tolist() == [i * 1.5 for i in range(1, 11)]
+
+
+def test_unknown_sheet_raises(workbook):
+    with pytest.raises(ValueError):
+        read_excel(str(workbook), sheets='No existe')
+    with pytest.raises(ValueError):
+        read_excel(str(workbook), sheets=7)
+
+
+def test_header_only_sheet(workbook):
+    df = read_excel(str(workbook), sheets='Sin datos')
+    assert list(df.columns) == ['Solo cabecera'] and len(df) == 0
+
+
+def test_nrows_stops_before_the_remaining_sheets(workbook):
+    df = read_excel(str(workbook), sheets=['Ventas', 'Compras'], nrows=42)
+    assert df[SHEET_COLUMN].value_counts().to_dict() == {'Ventas': 40, 'Compras': 2}
+    assert set(read_excel(str(workbook), sheets='*', nrows=10)[SHEET_COLUMN]) == {'Ventas'}
+
+
+def test_xls_honours_the_sheet_selection(tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    sheets = {'Ventas': pd.DataFrame({'a': [1, 2]}), 'Compras': pd.DataFrame({'a': [3]})}
+    monkeypatch.setattr(pd, 'ExcelFile', lambda path: SimpleNamespace(sheet_names=list(sheets)))
+    monkeypatch.setattr(pd, 'read_excel', lambda book, sheet_name, nrows, usecols: sheets[sheet_name].head(nrows))
+    path = str(tmp_path / 'antiguo.xls')
+
+    assert read_excel(path, sheets='Compras')['a'].tolist() == [3]
+    assert read_excel(path, sheets='*')[SHEET_COLUMN].tolist() == ['Ventas', 'Ventas', 'Compras']
+    with pytest.raises(ValueError):
+        read_excel(path, sheets='No existe')
+
+
+def test_iter_excel_streams_the_selected_sheets(workbook):
+    from reports.services.excel_reader import iter_excel
+
+    chunks = list(iter_excel(str(workbook), 15))
+    assert [len(c) for c in chunks] == [15, 15, 10]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), read_excel(str(workbook)))
+
+    chunks = list(iter_excel(str(workbook), 15, sheets=['Ventas', 'Compras']))
+    assert [len(c) for c in chunks] == [15, 15, 10, 5]
+    assert chunks[-1][SHEET_COLUMN].unique().tolist() == ['Compras']
+
+    with pytest.raises(ValueError):
+        next(iter_excel(str(workbook.with_suffix('.xls')), 15))
+
+
+def test_streaming_process_file_reads_the_selected_sheet(workbook):
+    from reports.services.qlik_parser import process_file
+
+    _, rows, _, _ = process_file(str(workbook), streaming=True, use_cache=False, sheets='Compras')
+    assert rows == 5
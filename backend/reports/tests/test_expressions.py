@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services.expressions import evaluate_dimension, evaluate_measure, is_expression, parse
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        'Region': ['Norte', 'Sur', 'Norte', 'Este', 'Sur', 'Norte'],
+        'Cliente': ['a', 'b', 'a', 'c', 'd', 'e'],
+        'Importe': [10.0, 20.0, 30.0, np.nan, 50.0, 60.0],
+        'Estado': ['Cobrado', 'Pendiente', 'Cobrado', 'Cobrado', 'Cobrado', 'Pendiente'],
+        'Fecha': pd.to_datetime(['2023-01-05', '2023-02-10', '2024-03-15', '2024-03-20', '2024-12-31', '2023-07-01']),
+        'Precio Unidad': [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+    })
+
+
+def test_is_expression():
+    assert is_expression('=Sum(Importe)')
+    assert not is_expression('Importe')
+
+
+def test_sum_over_count_distinct_matches_pandas(df):
+    result = evaluate_measure(df, df['Region'], '=Sum(Importe) / Count(DISTINCT Cliente)')
+    grouped = df.groupby('Region')
+    expected = grouped['Importe'].sum() / grouped['Cliente'].nunique()
+    pd.testing.assert_series_equal(result, expected, check_names=False)
+
+
+def test_conditional_ratio(df):
+    result = evaluate_measure(df, df['Region'], "=Sum(If(Estado = 'Cobrado', Importe, 0)) / Sum(Importe)")
+    paid = df['Importe'].where(df['Estado'] == 'Cobrado', 0)
+    expected = paid.groupby(df['Region']).sum() / df.groupby('Region')['Importe'].sum()
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+
+
+def test_above_compares_with_previous_group(df):
+    years = evaluate_dimension(df, '=Year(Fecha)')
+    result = evaluate_measure(df, years, '=Sum(Importe) / Above(Sum(Importe)) - 1')
+    totals = df.groupby(df['Fecha'].dt.year)['Importe'].sum()
+    assert np.isnan(result.iloc[0])
+    assert result.iloc[1] == pytest.approx(totals.iloc[1] / totals.iloc[0] - 1)
+
+
+def test_bracketed_field_names_and_precedence(df):
+    result = evaluate_measure(df, df['Region'], '=Sum([Precio Unidad] * 2 + 1)')
+    expected = (df['Precio Unidad'] * 2 + 1).groupby(df['Region']).sum()
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+
+
+def test_derived_dimension(df):
+    months = evaluate_dimension(df, '=Month(Fecha)')
+    assert list(months) == list(df['Fecha'].dt.month)
+    assert evaluate_dimension(df, 'Region').equals(df['Region'])
+
+
+@pytest.mark.parametrize('text', ['=Sum(Importe', '=Sum(Importe))', "=Sum('a)", '=Foo(Importe)'])
+def test_invalid_expressions_raise_value_error(df, text):
+    with pytest.raises(ValueError):
+        evaluate_measure(df, df['Region'], text)
+
+
+def test_aggregation_rules(df):
+    with pytest.raises(ValueError):
+        evaluate_measure(df, df['Region'], '=Importe * 2')
+    with pytest.raises(ValueError):
+        evaluate_dimension(df, '=Sum(Importe)')
+
+
+@pytest.mark.parametrize('func', ['Min', 'Max', 'Sum', 'Avg'])
+def test_date_fields_are_not_aggregated_as_numbers(df, func):
+    with pytest.raises(ValueError, match='fecha'):
+        evaluate_measure(df, df['Region'], f'={func}(Fecha)')
+    result = evaluate_measure(df, df['Region'], f'={func}(Year(Fecha))')
+    expected = df['Fecha'].dt.year.groupby(df['Region']).agg(func.lower().replace('avg', 'mean'))
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+    assert evaluate_measure(df, df['Region'], '=Count(Fecha)').tolist() == [1.0, 3.0, 2.0]
+
+
+def test_parse_is_cached():
+    assert parse('=Sum(Importe)') is parse('=Sum(Importe)')
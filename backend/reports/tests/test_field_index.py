@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services import app_store
+from reports.services.field_index import MAX_PAGE_SIZE, build_index, search_values
+
+APP_ID = 1
+
+
+@pytest.fixture
+def clientes():
+    rng = np.random.default_rng(0)
+    names = [
+        'Aluminios Rioja', 'aluminios Navarra', 'ALUMINIO Sur', 'Vidrios Álava', 'PVC Norte', 'Persianas Ebro',
+    ]
+    n = 2_000
+    return pd.DataFrame({
+        'cliente': rng.choice(names, n, p=[0.3, 0.2, 0.1, 0.2, 0.15, 0.05]),
+        'cod_postal': rng.integers(26000, 26010, n),
+        'importe': rng.uniform(0, 100, n),
+    })
+
+
+@pytest.fixture
+def table(clientes):
+    info = app_store.save_table(APP_ID, 'clientes', clientes)
+    build_index(APP_ID, 'clientes', clientes, info['version'])
+    return 'clientes'
+
+
+def _values(result):
+    return [v['value'] for v in result['values']]
+
+
+def test_prefix_search_is_case_insensitive(table, clientes):
+    result = search_values(APP_ID, table, 'cliente', 'alum')
+    expected = sorted({c for c in clientes['cliente'] if c.casefold().startswith('alum')}, key=str.casefold)
+    assert _values(result) == expected
+    assert result['matches'] == 3
+    assert result['total_distinct'] == clientes['cliente'].nunique()
+    counts = clientes['cliente'].value_counts()
+    assert all(v['count'] == counts[v['value']] for v in result['values'])
+
+
+def test_substring_search(table):
+    result = search_values(APP_ID, table, 'cliente', 'RIO', mode='contains')
+    assert _values(result) == ['Aluminios Rioja', 'Vidrios Álava']
+    assert _values(search_values(APP_ID, table, 'cliente', 'zz')) == []
+
+
+def test_order_by_count_and_paging(table, clientes):
+    by_count = clientes['cliente'].value_counts().index.tolist()
+    first = search_values(APP_ID, table, 'cliente', order='count', limit=4)
+    rest = search_values(APP_ID, table, 'cliente', order='count', offset=4, limit=4)
+    assert _values(first) + _values(rest) == by_count
+    assert search_values(APP_ID, table, 'cliente', limit=10_000)['limit'] == MAX_PAGE_SIZE
+
+
+def test_numbers_are_indexed_as_text(table, clientes):
+    result = search_values(APP_ID, table, 'cod_postal', '2600')
+    codes = sorted(clientes['cod_postal'].unique())
+    assert _values(result) == [str(c) for c in codes if str(c).startswith('2600')]
+
+
+def test_float_fields_are_indexed_on_demand(table, clientes):
+    result = search_values(APP_ID, table, 'importe', limit=5)
+    assert result['total_distinct'] == clientes['importe'].nunique()
+
+
+def test_reload_rebuilds_a_stale_index(table):
+    reloaded = pd.DataFrame({'cliente': ['Nuevo'], 'cod_postal': [1], 'importe': [1.0]})
+    app_store.save_table(APP_ID, 'clientes', reloaded)
+    assert _values(search_values(APP_ID, table, 'cliente')) == ['Nuevo']
+
+
+def test_unknown_table_or_field(table):
+    with pytest.raises(ValueError):
+        search_values(APP_ID, 'no_cargada', 'cliente')
+    with pytest.raises(ValueError):
+        search_values(APP_ID, table, 'no_existe')
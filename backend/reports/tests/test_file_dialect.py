@@ -0,0 +1,94 @@
+import io
+
+import pandas as pd
+import pytest
+
+from reports.services.file_dialect import csv_read_kwargs, detect_dialect, sniff
+
+
+def _read(data, dialect):
+    return pd.read_csv(io.BytesIO(data), **csv_read_kwargs(dialect))
+
+
+@pytest.mark.parametrize('encoding, expected', [
+    ('utf-8', 'utf-8'), ('utf-8-sig', 'utf-8-sig'), ('cp1252', 'cp1252'),
+])
+def test_encoding(encoding, expected):
+    data = 'Cliente;Población\nAcristalia;Logroño\nVidrios €;Cádiz\n'.encode(encoding)
+    dialect = sniff(data)
+    assert dialect['encoding'] == expected
+    assert _read(data, dialect)['Población'].tolist() == ['Logroño', 'Cádiz']
+
+
+@pytest.mark.parametrize('sep', [',', ';', '\t', '|'])
+def test_delimiter(sep):
+    data = sep.join(['a', 'b', 'c']).encode() + b'\n' + b'\n'.join(
+        sep.join(['x', str(i), 'y']).encode() for i in range(20)
+    )
+    dialect = sniff(data)
+    assert dialect['sep'] == sep
+    assert list(_read(data, dialect).columns) == ['a', 'b', 'c']
+
+
+def test_decimal_comma_and_thousands_dot():
+    data = b'Producto;Importe\nA;1.234,56\nB;7,5\nC;12.000,00\n'
+    dialect = sniff(data)
+    assert (dialect['decimal'], dialect['thousands']) == (',', '.')
+    assert _read(data, dialect)['Importe'].tolist() == [1234.56, 7.5, 12000.0]
+
+
+def test_quoted_fields_with_separator_inside():
+    data = b'nombre,descripcion,importe\n"Ventana","PVC, doble vidrio",10.5\n"Puerta","Aluminio, lacada",20\n'
+    dialect = sniff(data)
+    df = _read(data, dialect)
+    assert dialect['sep'] == ','
+    assert df['descripcion'].tolist() == ['PVC, doble vidrio', 'Aluminio, lacada']
+
+
+def test_headerless_numeric_file():
+    data = b'1;2,5;3\n4;5,5;6\n7;8,5;9\n'
+    dialect = sniff(data)
+    assert dialect['header'] is False
+    df = _read(data, dialect)
+    assert list(df.columns) == [0, 1, 2] and len(df) == 3
+
+
+@pytest.mark.parametrize('data', [
+    b'Producto;2023;2024\nA;5,5;6\n',
+    b'Producto;2023;2024\nPVC;5,5;6,25\nAluminio;7;8,5\n',
+    b'cod;2024\nC001;17\nC002;25\n',
+    b'nombre,ciudad\nAna,Logro\xc3\xb1o\nLuis Mar\xc3\xada,Vitoria\n',
+])
+def test_year_and_text_headers_are_headers(data):
+    assert sniff(data)['header'] is True
+
+
+@pytest.mark.parametrize('data', [
+    b'A;5,5;6\nB;7,5;8\n',
+    b'C001;2024-01-05;12,5\nC002;2024-02-11;7\n',
+])
+def test_first_row_like_the_data_is_data(data):
+    assert sniff(data)['header'] is False
+
+
+def test_year_header_file_reads_like_pandas(tmp_path):
+    from reports.services.qlik_parser import read_file_to_dataframe
+
+    path = tmp_path / 'anual.csv'
+    path.write_bytes(b'Producto;2023;2024\nA;5,5;6\n')
+    df = read_file_to_dataframe(str(path))
+    assert list(df.columns) == list(pd.read_csv(path, sep=';').columns) == ['Producto', '2023', '2024']
+    assert df.iloc[0].tolist() == ['A', 5.5, 6]
+
+
+def test_truncated_sample_cut_inside_multibyte_character():
+    data = ('a,b\n' + 'ñ,1\n' * 50).encode('utf-8')
+    assert sniff(data[:-3] + 'ñ'.encode('utf-8')[:1], truncated=True)['encoding'] == 'utf-8'
+
+
+def test_detect_dialect_is_persisted_until_the_file_changes(tmp_path):
+    path = tmp_path / 'datos.csv'
+    path.write_bytes(b'a;b\n1,5;2\n')
+    assert detect_dialect(str(path))['sep'] == ';'
+    path.write_bytes(b'a,b,c\n1,2,3\n4,5,6\n')
+    assert detect_dialect(str(path))['sep'] == ','
@@ -0,0 +1,32 @@
+import os
+
+import pandas as pd
+
+from reports.services.frame_cache import get_cache, get_source_frame
+
+
+def _write(path, rows):
+    pd.DataFrame({'a': range(rows)}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_frames_are_keyed_by_file(tmp_path):
+    first, second = _write(tmp_path / 'a.csv', 3), _write(tmp_path / 'b.csv', 5)
+
+    df, hit = get_source_frame(first, 'all', lambda: pd.read_csv(first))
+    assert (len(df), hit) == (3, False)
+    df, hit = get_source_frame(second, 'all', lambda: pd.read_csv(second))
+    assert (len(df), hit) == (5, False)  # not the frame of a.csv
+    df, hit = get_source_frame(first, 'all', lambda: pd.read_csv(first))
+    assert (len(df), hit) == (3, True)  # not evicted by b.csv
+    assert get_cache().stats()['frames'] == 2
+
+
+def test_new_stamp_replaces_the_frames_of_that_file(tmp_path):
+    path = _write(tmp_path / 'a.csv', 3)
+    get_source_frame(path, 'all', lambda: pd.read_csv(path))
+    _write(tmp_path / 'a.csv', 4)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    df, hit = get_source_frame(path, 'all', lambda: pd.read_csv(path))
+    assert (len(df), hit) == (4, False)
+    assert get_cache().stats()['frames'] == 1
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services.join_planner import execute_plan, execute_plan_spilled, plan_joins, should_spill
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    n = 5_000
+    ventas = pd.DataFrame({
+        'pedido': np.arange(n),
+        'cod_cliente': rng.choice([f'C{i:03d}' for i in range(300)], n),
+        'cod_articulo': rng.integers(0, 40, n),
+        'importe': rng.uniform(0, 100, n),
+    })
+    clientes = pd.DataFrame({
+        'cod_cliente': [f'C{i:03d}' for i in range(0, 350)],
+        'provincia': rng.choice(['La Rioja', 'Navarra', 'Álava'], 350),
+    })
+    articulos = pd.DataFrame({'cod_articulo': np.arange(0, 30), 'familia': rng.choice(['PVC', 'Aluminio'], 30)})
+    return {1: ventas, 2: clientes, 3: articulos}
+
+
+def _join(right, key, how='left'):
+    return {'left_source': 1, 'right_source': right, 'left_key': key, 'right_key': key, 'how': how}
+
+
+def _reference(frames, joins):
+    result = frames[1]
+    for j in joins:
+        result = result.merge(frames[j['right_source']], left_on=j['left_key'], right_on=j['right_key'],
+                              how=j['how'], suffixes=('', f'_{j["right_source"]}'))
+    return result
+
+
+@pytest.mark.parametrize('how', ['left', 'inner', 'right', 'outer'])
+def test_first_join_estimate_is_exact(frames, how):
+    joins = [_join(2, 'cod_cliente', how)]
+    plan = plan_joins(joins, frames)
+    assert plan['steps'][0]['estimated_rows'] == len(_reference(frames, joins))
+
+
+def test_reordered_plan_gives_the_listed_result(frames):
+    joins = [_join(2, 'cod_cliente'), _join(3, 'cod_articulo', 'inner')]
+    plan = plan_joins(joins, frames)
+    assert plan['reordered']  # the selective inner join goes first
+    result = execute_plan(plan, frames)
+    expected = _reference(frames, joins)
+    assert list(result.columns) == list(expected.columns)
+    pd.testing.assert_frame_equal(
+        result.sort_values('pedido').reset_index(drop=True),
+        expected.sort_values('pedido').reset_index(drop=True),
+        check_dtype=False, check_categorical=False,
+    )
+
+
+def test_text_keys_keep_their_dtype(frames):
+    result = execute_plan(plan_joins([_join(2, 'cod_cliente')], frames), frames)
+    assert result['cod_cliente'].dtype == frames[1]['cod_cliente'].dtype
+
+
+def test_row_budget_and_many_to_many_warning(frames):
+    dup = {1: frames[1], 2: pd.concat([frames[2]] * 3, ignore_index=True)}
+    joins = [_join(2, 'cod_cliente')]
+    plan = plan_joins(joins, dup)
+    assert any('muchos a muchos' in w for w in plan['warnings'])
+    with pytest.raises(ValueError):
+        plan_joins(joins, dup, max_rows=1_000)
+
+
+def test_missing_key_or_source(frames):
+    with pytest.raises(ValueError):
+        plan_joins([_join(2, 'no_existe')], frames)
+    with pytest.raises(ValueError):
+        plan_joins([_join(9, 'cod_cliente')], frames)
+
+
+def test_spilled_result_equals_in_memory_result(frames, settings, monkeypatch):
+    from reports.services import join_planner
+
+    settings.SPILL_THRESHOLD_BYTES = 1
+    monkeypatch.setattr(join_planner, 'SPILL_CHUNK_ROWS', 700)
+    joins = [_join(2, 'cod_cliente'), _join(3, 'cod_articulo', 'inner')]
+    plan = plan_joins(joins, frames)
+    assert should_spill(plan)
+
+    spilled = execute_plan_spilled(plan, frames)
+    try:
+        assert len(spilled.chunks) > 1
+        whole = pd.concat(list(spilled.iter_chunks()), ignore_index=True)
+        expected = execute_plan(plan, frames).reset_index(drop=True)
+        pd.testing.assert_frame_equal(whole, expected, check_dtype=False)
+        assert spilled.numeric_columns() == {c for c in expected if pd.api.types.is_numeric_dtype(expected[c])}
+    finally:
+        spilled.cleanup()
+    assert not spilled.directory.exists()
+
+
+def test_outer_joins_are_not_spilled(frames, settings):
+    settings.SPILL_THRESHOLD_BYTES = 1
+    assert not should_spill(plan_joins([_join(2, 'cod_cliente', 'outer')], frames))
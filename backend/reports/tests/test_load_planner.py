@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services.load_planner import check_budget, estimate_source, plan_load
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame({
+        'id': np.arange(n),
+        'importe': rng.uniform(0, 1000, n).round(2),
+        'descripcion': [f'Ventana PVC modelo {i % 500} con doble acristalamiento' for i in range(n)],
+    })
+    path = tmp_path / 'ventas.csv'
+    df.to_csv(path, index=False)
+    return path, df
+
+
+def test_estimate_is_close_to_the_parsed_size(csv_file):
+    path, _ = csv_file
+    estimate = estimate_source(str(path))
+    actual = pd.read_csv(path).memory_usage(deep=True, index=False)
+    assert estimate['rows'] == pytest.approx(len(pd.read_csv(path)), rel=0.05)
+    for col, per_row in estimate['column_bytes'].items():
+        assert per_row * estimate['rows'] == pytest.approx(actual[col], rel=0.15)
+
+
+def test_strategies_by_budget(csv_file):
+    path, _ = csv_file
+    full = plan_load(str(path), budget=1024 ** 3)
+    assert full['strategy'] == 'full' and full['bytes'] <= full['budget']
+
+    small = full['estimated_bytes'] // 4
+    projected = plan_load(str(path), columns=['id', 'importe'], budget=small)
+    assert projected['strategy'] == 'projected'
+
+    assert plan_load(str(path), budget=small)['strategy'] == 'reject'
+    chunked = plan_load(str(path), budget=small, chunk_rows=50_000)
+    assert chunked['strategy'] == 'chunked'
+    assert 1_000 <= chunked['chunk_rows'] < 20_000
+    assert chunked['bytes'] <= small
+
+
+def test_row_cap(csv_file):
+    path, _ = csv_file
+    assert plan_load(str(path), nrows=100)['rows'] == 100
+
+
+def test_rejection_explains_itself(csv_file):
+    path, _ = csv_file
+    plan = plan_load(str(path), budget=1024)
+    assert plan['strategy'] == 'reject' and 'ventas.csv' in plan['reason']
+    with pytest.raises(ValueError):
+        check_budget([plan])
+
+
+def test_sources_must_fit_together(csv_file):
+    path, _ = csv_file
+    plan = plan_load(str(path), budget=1024 ** 3)
+    assert check_budget([plan, plan], budget=plan['bytes'] * 2) == plan['bytes'] * 2
+    with pytest.raises(ValueError):
+        check_budget([plan, plan], budget=plan['bytes'] * 2 - 1)
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from reports.services import parse_cache
+
+
+def _files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / f'f{i}.csv'
+        pd.DataFrame({'a': range(i, i + 50)}).to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
+
+
+def test_directory_is_scanned_only_when_the_tracked_size_passes_the_limit(tmp_path, settings, monkeypatch):
+    scans = []
+    evict = parse_cache.evict
+    monkeypatch.setattr(parse_cache, 'evict', lambda: scans.append(1) or evict())
+    paths = _files(tmp_path, 6)
+
+    for path in paths[:3]:
+        parse_cache.get_frame(path, pd.read_csv)
+    assert len(scans) == 1  # first write of the process: size unknown yet
+
+    settings.PARSE_CACHE_MAX_BYTES = parse_cache._tracked_bytes[str(parse_cache.cache_root())]
+    parse_cache.get_frame(paths[3], pd.read_csv)
+    assert len(scans) == 2
+    assert len(list(parse_cache.cache_root().glob('*/*'))) == 3  # the oldest entry is gone
+
+
+def test_frames_of_another_reader_version_are_not_served(tmp_path, monkeypatch):
+    path = _files(tmp_path, 1)[0]
+    parse_cache.get_frame(path, pd.read_csv)
+    assert parse_cache.has_frame(path)
+    monkeypatch.setattr(parse_cache, 'READER_VERSION', parse_cache.READER_VERSION + 1)
+    assert not parse_cache.has_frame(path)
+    assert len(parse_cache.get_frame(path, lambda p: pd.read_csv(p).head(3))) == 3
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services.pivot_engine import build_pivot
+
+
+@pytest.fixture
+def sales():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    return pd.DataFrame({
+        'region': rng.choice(['Norte', 'Sur', 'Este'], n),
+        'vendedor': rng.choice(['Ana', 'Luis', 'Marta', 'Pablo'], n),
+        'anio': rng.choice([2023, 2024], n),
+        'importe': rng.uniform(0, 100, n).round(2),
+        'cliente': rng.integers(0, 50, n),
+    })
+
+
+def _leaves(result):
+    return {tuple(r['keys']): r for r in result['rows'] if not r['is_subtotal']}
+
+
+def test_leaves_subtotals_and_grand_total_match_pandas(sales):
+    result = build_pivot(sales, {
+        'rows': ['region', 'vendedor'],
+        'measures': [{'field': 'importe', 'aggregation': 'sum'}, {'field': 'importe', 'aggregation': 'avg'}],
+    })
+    expected = sales.groupby(['region', 'vendedor'])['importe'].agg(['sum', 'mean'])
+    leaves = _leaves(result)
+    assert len(leaves) == len(expected)
+    for (region, vendedor), row in expected.iterrows():
+        assert leaves[(region, vendedor)]['total'] == pytest.approx([row['sum'], row['mean']], abs=0.005)
+
+    subtotals = {r['keys'][0]: r['total'][0] for r in result['rows'] if r['is_subtotal']}
+    for region, total in sales.groupby('region')['importe'].sum().items():
+        assert subtotals[region] == pytest.approx(total, abs=0.005)
+    assert result['grand_total']['total'] == pytest.approx(
+        [sales['importe'].sum(), sales['importe'].mean()], abs=0.005,
+    )
+
+
+def test_subtotal_precedes_its_children(sales):
+    result = build_pivot(sales, {'rows': ['region', 'vendedor'], 'measures': [{'field': 'importe'}]})
+    current = None
+    for row in result['rows']:
+        if row['is_subtotal']:
+            current = row['keys'][0]
+        else:
+            assert row['keys'][0] == current
+
+
+def test_column_axis_cells(sales):
+    result = build_pivot(sales, {
+        'rows': ['region'], 'columns': ['anio'],
+        'measures': [{'field': 'cliente', 'aggregation': 'count_distinct'}],
+    })
+    assert result['column_keys'] == [['2023'], ['2024']]
+    expected = sales.groupby(['region', 'anio'])['cliente'].nunique().unstack()
+    for row in result['rows']:
+        region = row['keys'][0]
+        assert [c[0] for c in row['cells']] == list(expected.loc[region].astype(float))
+    assert result['grand_total']['total'] == [sales['cliente'].nunique()]
+
+
+def test_paging_over_top_level_groups(sales):
+    spec = {'rows': ['region', 'vendedor'], 'measures': [{'field': 'importe'}], 'page_size': 2}
+    first, second = build_pivot(sales, {**spec, 'page': 1}), build_pivot(sales, {**spec, 'page': 2})
+    assert first['total_groups'] == 3 and first['total_pages'] == 2
+    top = lambda result: {r['keys'][0] for r in result['rows']}  # noqa: E731
+    assert top(first) == {'Este', 'Norte'} and top(second) == {'Sur'}
+
+
+def test_missing_rows_or_measures_are_rejected(sales):
+    with pytest.raises(ValueError):
+        build_pivot(sales, {'rows': [], 'measures': [{'field': 'importe'}]})
+    with pytest.raises(ValueError):
+        build_pivot(sales, {'rows': ['region'], 'measures': []})
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services import app_store, profiler
+from reports.services.profiler import detect_datetime_formats, get_table_profile, profile_frame, profile_sketch
+from reports.services.sketches import SUMMARY_QUANTILES, TableSketch
+
+APP_ID = 1
+
+
+@pytest.fixture
+def ventas():
+    rng = np.random.default_rng(0)
+    n = 5_000
+    days = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D')
+    df = pd.DataFrame({
+        'familia': rng.choice(['PVC', 'Aluminio', 'Vidrio', 'Persiana'], n, p=[0.4, 0.3, 0.2, 0.1]),
+        'importe': rng.normal(50, 15, n).round(2),
+        'unidades': rng.integers(1, 9, n),
+        'alta': days.strftime('%d/%m/%Y'),
+        'cargado': pd.Timestamp('2024-06-01') + pd.to_timedelta(rng.integers(0, 3_600, n), unit='s'),
+        'lote': rng.integers(20240101, 20241231, n).astype(str),
+    })
+    df.loc[rng.random(n) < 0.1, 'importe'] = np.nan
+    return df
+
+
+def test_datetime_formats_are_detected_per_column(ventas):
+    df = ventas.assign(iso=ventas['cargado'].dt.strftime('%Y-%m-%d %H:%M:%S'))
+    df.loc[:5, 'alta'] = None
+    # Digit strings such as 20240315 stay text: no format without separators is tried
+    assert detect_datetime_formats(df) == {'alta': '%d/%m/%Y', 'iso': '%Y-%m-%d %H:%M:%S'}
+    assert detect_datetime_formats(df[['familia', 'importe']]) == {}
+
+
+def test_profile_matches_pandas(ventas):
+    profile = profile_frame(ventas)
+    assert profile['rows'] == len(ventas) and not profile['approximate']
+    columns = profile['columns']
+    assert list(columns) == list(ventas.columns)
+
+    importe = columns['importe']
+    values = ventas['importe']
+    assert importe['kind'] == 'numeric'
+    assert importe['null_count'] == values.isna().sum()
+    assert importe['distinct_count'] == values.nunique()
+    assert (importe['min'], importe['max']) == (values.min(), values.max())
+    assert importe['mean'] == round(values.mean(), 4)
+    assert importe['quantiles'] == {f'p{int(q * 100)}': values.quantile(q) for q in SUMMARY_QUANTILES}
+    hist = importe['histogram']
+    assert sum(hist['counts']) == values.notna().sum()
+    assert len(hist['edges']) == len(hist['counts']) + 1 <= profiler.MAX_HISTOGRAM_BINS + 1
+
+    familia = columns['familia']
+    assert familia['kind'] == 'categorical'
+    assert familia['top_values'] == [{'value': v, 'count': c} for v, c in ventas['familia'].value_counts().items()]
+    assert columns['lote']['kind'] == 'categorical'
+    assert len(columns['lote']['top_values']) == profiler.TOP_K
+
+
+def test_datetime_columns(ventas):
+    columns = profile_frame(ventas)['columns']
+    alta = columns['alta']
+    parsed = pd.to_datetime(ventas['alta'], format='%d/%m/%Y')
+    assert (alta['kind'], alta['format']) == ('datetime', '%d/%m/%Y')
+    assert (alta['min'], alta['max']) == (parsed.min().isoformat(), parsed.max().isoformat())
+    assert sum(alta['histogram']['counts']) == len(ventas)
+    assert alta['histogram']['edges'][0] == parsed.min().isoformat()
+
+    cargado = columns['cargado']
+    assert (cargado['kind'], cargado['format']) == ('datetime', None)
+    assert cargado['max'] == ventas['cargado'].max().isoformat()
+
+
+def test_constant_and_empty_columns():
+    df = pd.DataFrame({'uno': [7.0] * 4, 'vacia': [np.nan] * 4, 'texto': [None] * 4})
+    columns = profile_frame(df)['columns']
+    assert columns['uno']['histogram'] == {'edges': [7.0, 7.0], 'counts': [4]}
+    assert columns['vacia']['histogram'] is None and columns['vacia']['mean'] is None
+    assert columns['texto']['top_values'] == [] and columns['texto']['null_count'] == 4
+
+
+def test_sketch_profile_approximates_the_exact_one(ventas):
+    sketch = TableSketch()
+    for start in range(0, len(ventas), 1_000):
+        sketch.update(ventas.iloc[start:start + 1_000])
+    approx = profile_sketch(sketch, ventas.head(1_000))
+    exact = profile_frame(ventas)
+    assert approx['approximate'] and approx['rows'] == len(ventas)
+    assert set(approx['columns']) == set(exact['columns'])
+
+    a, e = approx['columns']['importe'], exact['columns']['importe']
+    assert (a['null_count'], a['min'], a['max']) == (e['null_count'], e['min'], e['max'])
+    assert a['quantiles']['p50'] == pytest.approx(e['quantiles']['p50'], rel=0.02)
+    assert sum(a['histogram']['counts']) == ventas['importe'].notna().sum()
+    assert approx['columns']['alta']['kind'] == 'datetime'
+    assert approx['columns']['familia']['top_values'][0]['value'] == 'PVC'
+
+
+def test_stored_profile_follows_the_table_version(ventas):
+    info = app_store.save_table(APP_ID, 'ventas', ventas)
+    profiler.store_table_profile(APP_ID, 'ventas', ventas, info['version'])
+    assert get_table_profile(APP_ID, 'ventas')['rows'] == len(ventas)
+
+    # A reload without a new profile is profiled again on demand
+    app_store.save_table(APP_ID, 'ventas', ventas.head(10))
+    assert get_table_profile(APP_ID, 'ventas')['rows'] == 10
+
+    with pytest.raises(ValueError):
+        get_table_profile(APP_ID, 'no_cargada')
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services import qlik_parser
+from reports.services.qlik_parser import MAX_RAW_ROWS, process_file
+
+
+def _frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'familia': rng.choice(['PVC', 'Aluminio', 'Vidrio'], n),
+        'importe': rng.uniform(0, 100, n).round(2),
+    })
+
+
+def _chart(result, chart_id):
+    return next(c for c in result['charts'] if c['id'] == chart_id)['data']
+
+
+def test_sources_above_the_raw_row_cap_are_read_whole(tmp_path):
+    # 150k rows: over MAX_RAW_ROWS, far below the 1M sketch threshold and 64 MB
+    n = 3 * MAX_RAW_ROWS
+    df = _frame(n)
+    df.loc[n - 1000:, 'familia'] = 'Persiana'  # only in the last rows
+    path = tmp_path / 'ventas.csv'
+    df.to_csv(path, index=False)
+
+    result, rows, cols, _ = process_file(str(path), use_cache=False)
+    assert rows == n and cols == 2
+    assert result['summary']['total_rows'] == n
+    pie = _chart(result, 'pie_familia')
+    assert dict(zip(pie['labels'], pie['datasets'][0]['data'])) == df['familia'].value_counts().to_dict()
+    bar = _chart(result, 'bar_familia_importe')
+    expected = df.groupby('familia')['importe'].sum()
+    np.testing.assert_allclose(bar['datasets'][0]['data'], expected[bar['labels']].round(2))
+
+
+def test_small_sources_stay_in_memory(tmp_path):
+    path = tmp_path / 'ventas.csv'
+    _frame(1_000).to_csv(path, index=False)
+    result, rows, _, _ = process_file(str(path), use_cache=False)
+    assert rows == 1_000
+    assert 'streamed' not in result['summary']
+
+
+def test_sources_without_row_estimate_are_not_truncated(tmp_path, monkeypatch):
+    # .xlsx has no cheap row estimate: a full in-memory read falls back to streaming
+    monkeypatch.setattr(qlik_parser, 'MAX_RAW_ROWS', 100)
+    path = tmp_path / 'ventas.xlsx'
+    df = _frame(300)
+    df.to_excel(path, index=False)
+
+    result, rows, _, _ = process_file(str(path), use_cache=False)
+    assert rows == 300
+    assert result['summary']['streamed']
+    pie = _chart(result, 'pie_familia')
+    assert sum(pie['datasets'][0]['data']) == 300
+
+
+@pytest.mark.parametrize('streaming', [None, False])
+def test_cached_result_covers_the_whole_source(tmp_path, monkeypatch, streaming):
+    monkeypatch.setattr(qlik_parser, 'MAX_RAW_ROWS', 100)
+    path = tmp_path / 'ventas.csv'
+    _frame(500).to_csv(path, index=False)
+    assert process_file(str(path), streaming=streaming)[1] == 500
+
+
+# ── Chart planning ──
+
+@pytest.fixture
+def ventas():
+    rng = np.random.default_rng(1)
+    n = 3_000
+    return pd.DataFrame({
+        'familia': rng.choice(['PVC', 'Aluminio', 'Vidrio', 'Persiana'], n, p=[0.4, 0.3, 0.2, 0.1]),
+        'region': rng.choice(['Norte', 'Sur'], n),
+        'tienda': rng.choice([f'T{i:02d}' for i in range(20)], n),
+        'canal': rng.choice(['web', 'tienda'], n),
+        'importe': rng.uniform(0, 100, n).round(2),
+        'unidades': rng.integers(1, 9, n),
+        'coste': rng.uniform(0, 50, n).round(2),
+        'margen': rng.uniform(-5, 5, n).round(2),
+        'fecha': (pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 60, n), unit='D')).astype(str),
+    })
+
+
+def test_plan_charts_groups_each_category_once(ventas):
+    plan = qlik_parser.plan_charts(qlik_parser.classify_columns(ventas))
+    numeric = ['importe', 'unidades', 'coste']
+    assert plan == {
+        'familia': {'sums': numeric, 'counts': True},
+        'region': {'sums': numeric, 'counts': True},
+        'tienda': {'sums': numeric, 'counts': False},
+    }
+
+
+def test_charts_match_one_groupby_per_pair(ventas):
+    columns_info = qlik_parser.classify_columns(ventas)
+    before = ventas.copy()
+    charts = qlik_parser.generate_chart_data(ventas, columns_info)
+    pd.testing.assert_frame_equal(ventas, before)
+
+    bars = [f'bar_{c}_{n}' for c in ('familia', 'region', 'tienda') for n in ('importe', 'unidades', 'coste')]
+    assert [c['id'] for c in charts] == bars + ['pie_familia', 'pie_region', 'line_fecha']
+
+    by_id = {c['id']: c['data'] for c in charts}
+    for cat in ('familia', 'region', 'tienda'):
+        for num in ('importe', 'unidades', 'coste'):
+            expected = ventas.groupby(cat)[num].sum().nlargest(15)
+            bar = by_id[f'bar_{cat}_{num}']
+            assert bar['labels'] == expected.index.tolist()
+            assert bar['datasets'][0]['data'] == [round(float(v), 2) for v in expected]
+    for cat in ('familia', 'region'):
+        expected = ventas[cat].value_counts().nlargest(10)
+        pie = by_id[f'pie_{cat}']
+        assert pie['labels'] == expected.index.tolist()
+        assert pie['datasets'][0]['data'] == expected.tolist()
+
+    line = by_id['line_fecha']
+    daily = ventas.groupby(pd.to_datetime(ventas['fecha']))[['importe', 'unidades']].sum()
+    assert line['labels'] == [d.strftime('%Y-%m-%d') for d in daily.index]
+    assert [d['label'] for d in line['datasets']] == ['importe', 'unidades']
+    assert line['datasets'][0]['data'] == [round(float(v), 2) for v in daily['importe']]
+
+
+def test_unparseable_dates_are_left_out_of_the_line_chart():
+    df = pd.DataFrame({'fecha': ['2024-01-02', 'n/d', '2024-01-01'], 'importe': [2.0, 5.0, 1.0]})
+    charts = qlik_parser.generate_chart_data(df, {'categorical': [], 'numeric': ['importe'], 'datetime': ['fecha']})
+    line = charts[0]['data']
+    assert line['labels'] == ['2024-01-01', '2024-01-02']
+    assert line['datasets'][0]['data'] == [1.0, 2.0]
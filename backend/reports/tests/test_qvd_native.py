@@ -0,0 +1,171 @@
+import struct
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.benchmarks.datasets import write_qvd
+from reports.services.qvd_native import read_header, read_qvd
+
+
+def _symbol(kind, number=None, text=None):
+    """Symbol table entry: type byte, int32 / float64 number, NUL-terminated text."""
+    out = bytes([kind])
+    if kind in (1, 5):
+        out += struct.pack('<i', number)
+    elif kind in (2, 6):
+        out += struct.pack('<d', number)
+    if kind in (4, 5, 6):
+        out += text.encode('utf-8') + b'\0'
+    return out
+
+
+# name, NumberFormat type, bias, bit offset, bit width, symbols
+FIELDS = [
+    ('familia', 'UNKNOWN', 0, 0, 2, [_symbol(4, text='PVC'), _symbol(4, text='Aluminio'), _symbol(4, text='ñandú')]),
+    ('mes', 'UNKNOWN', 0, 2, 2, [_symbol(5, 1, 'ene'), _symbol(5, 2, 'feb'), _symbol(5, 3, 'mar')]),
+    # Bias -2: a stored 0 is NULL and a stored k + 2 is symbol k; bits 6-8 cross a byte
+    ('importe', 'FIX', -2, 6, 3, [_symbol(6, 12.5, '12,50'), _symbol(6, -3.25, '-3,25')]),
+    ('fecha', 'DATE', 0, 9, 1, [_symbol(6, 45292.0, '01/01/2024'), _symbol(6, 45323.0, '01/02/2024')]),
+    ('codigo', 'UNKNOWN', 0, 10, 1, [_symbol(1, 10), _symbol(4, text='A-1')]),
+    # Single-symbol field: no bits in the record, every row is symbol 0
+    ('constante', 'UNKNOWN', 0, 0, 0, [_symbol(1, 7)]),
+]
+# Symbol index per row of every field with bits (None = NULL)
+ROWS = [
+    (0, 0, 0, 0, 0),
+    (1, 1, None, 1, 1),
+    (2, 2, 1, 0, 0),
+    (0, 0, 1, 1, 1),
+    (1, 2, None, 0, 1),
+]
+RECORD_BYTES = 2
+
+
+def _qvd_bytes():
+    """A QVD assembled by hand: XML header, symbol tables, bit-packed index table."""
+    symbols, fields_xml = b'', ''
+    for name, fmt, bias, bit_offset, bit_width, table in FIELDS:
+        table_bytes = b''.join(table)
+        fields_xml += (
+            f'<QvdFieldHeader><FieldName>{name}</FieldName>'
+            f'<BitOffset>{bit_offset}</BitOffset><BitWidth>{bit_width}</BitWidth><Bias>{bias}</Bias>'
+            f'<NumberFormat><Type>{fmt}</Type></NumberFormat><NoOfSymbols>{len(table)}</NoOfSymbols>'
+            f'<Offset>{len(symbols)}</Offset><Length>{len(table_bytes)}</Length></QvdFieldHeader>'
+        )
+        symbols += table_bytes
+
+    index = b''
+    for row in ROWS:
+        packed = 0
+        for (_, _, bias, bit_offset, _, _), code in zip(FIELDS, row):
+            packed |= ((-2 if code is None else code) - bias) << bit_offset
+        index += packed.to_bytes(RECORD_BYTES, 'little')
+
+    header = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\r\n'
+        f'<QvdTableHeader><TableName>ventas</TableName><Fields>{fields_xml}</Fields>'
+        f'<RecordByteSize>{RECORD_BYTES}</RecordByteSize><NoOfRecords>{len(ROWS)}</NoOfRecords>'
+        f'<Offset>{len(symbols)}</Offset><Length>{len(index)}</Length></QvdTableHeader>'
+    )
+    return header.encode('utf-8') + b'\r\n\0' + symbols + index
+
+
+@pytest.fixture
+def hand_built(tmp_path):
+    path = tmp_path / 'a_mano.qvd'
+    path.write_bytes(_qvd_bytes())
+    return path
+
+
+def test_hand_built_header(hand_built):
+    header = read_header(str(hand_built))
+    assert header['table_name'] == 'ventas'
+    assert header['records'] == len(ROWS)
+    assert [f['name'] for f in header['fields']] == [f[0] for f in FIELDS]
+    assert {f['name']: f['bias'] for f in header['fields']}['importe'] == -2
+
+
+def test_hand_built_values(hand_built):
+    df = read_qvd(str(hand_built))
+    assert df['familia'].astype(str).tolist() == ['PVC', 'Aluminio', 'ñandú', 'PVC', 'Aluminio']
+    # Dual symbols keep their number
+    assert df['mes'].tolist() == [1, 2, 3, 1, 3]
+    np.testing.assert_allclose(df['importe'], [12.5, np.nan, -3.25, -3.25, np.nan])
+    assert df['fecha'].tolist() == [pd.Timestamp(d) for d in
+                                    ('2024-01-01', '2024-02-01', '2024-01-01', '2024-02-01', '2024-01-01')]
+    # Numbers and texts mixed in one field are read as text
+    assert df['codigo'].astype(str).tolist() == ['10', 'A-1', '10', 'A-1', 'A-1']
+    assert df['constante'].tolist() == [7] * len(ROWS)
+
+
+def test_hand_built_projection_and_row_range(hand_built):
+    df = read_qvd(str(hand_built), columns=['importe', 'familia'], start=1, stop=4)
+    assert list(df.columns) == ['importe', 'familia']
+    np.testing.assert_allclose(df['importe'], [np.nan, -3.25, -3.25])
+    assert df['familia'].astype(str).tolist() == ['Aluminio', 'ñandú', 'PVC']
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(1)
+    n = 1_000
+    return pd.DataFrame({
+        'id': np.arange(n, dtype='int64'),
+        'importe': rng.uniform(-50, 500, n).round(2),
+        'familia': rng.choice(['PVC', 'Aluminio', 'Vidrio', 'ñandú ü'], n),
+        'fecha': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, n), unit='D'),
+        'constante': np.ones(n, dtype='int64'),
+        'con_nulos': np.where(rng.random(n) < 0.2, np.nan, rng.integers(0, 9, n)),
+    })
+
+
+@pytest.fixture
+def qvd(tmp_path, frame):
+    path = tmp_path / 'ventas.qvd'
+    write_qvd(frame, path)
+    return path
+
+
+def test_round_trip(qvd, frame):
+    df = read_qvd(str(qvd))
+    assert list(df.columns) == list(frame.columns)
+    assert df['id'].tolist() == frame['id'].tolist()
+    np.testing.assert_allclose(df['importe'], frame['importe'])
+    assert df['familia'].astype(str).tolist() == frame['familia'].tolist()
+    assert pd.api.types.is_datetime64_any_dtype(df['fecha'])
+    assert (df['fecha'] == frame['fecha']).all()
+    assert (df['constante'] == 1).all()
+    pd.testing.assert_series_equal(df['con_nulos'].astype('float64'), frame['con_nulos'], check_names=False)
+
+
+def test_header(qvd, frame):
+    header = read_header(str(qvd))
+    assert header['records'] == len(frame)
+    assert [f['name'] for f in header['fields']] == list(frame.columns)
+
+
+def test_projection_and_row_range(qvd, frame):
+    df = read_qvd(str(qvd), columns=['importe', 'no_existe', 'id'], start=100, stop=250)
+    assert list(df.columns) == ['importe', 'id']
+    assert df['id'].tolist() == list(range(100, 250))
+    np.testing.assert_allclose(df['importe'], frame['importe'].iloc[100:250])
+
+
+def test_chunks_concatenate_to_whole_file(qvd):
+    whole = read_qvd(str(qvd))
+    parts = [read_qvd(str(qvd), start=s, stop=s + 300) for s in range(0, len(whole), 300)]
+    joined = pd.concat(parts, ignore_index=True)
+    assert joined['id'].tolist() == whole['id'].tolist()
+    assert joined['familia'].astype(str).tolist() == whole['familia'].astype(str).tolist()
+
+
+def test_out_of_range_rows_are_empty(qvd):
+    assert len(read_qvd(str(qvd), start=5_000)) == 0
+
+
+def test_empty_table(tmp_path):
+    path = tmp_path / 'vacio.qvd'
+    write_qvd(pd.DataFrame({'a': pd.Series([], dtype='int64')}), path)
+    df = read_qvd(str(path))
+    assert list(df.columns) == ['a'] and len(df) == 0
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.models import ReportApp, ReportSheet
+from reports.services import app_store, rollups
+
+pytestmark = pytest.mark.django_db
+
+LAYOUT = [
+    {'id': 'c1', 'source': 'ventas', 'dimension': 'region', 'metric': 'importe'},
+    {'id': 'c2', 'source': 'ventas', 'dimension': 'region', 'metric': 'importe', 'aggregation': 'avg'},
+    {'id': 'c3', 'source': 'ventas', 'dimension': 'region', 'metric': 'cliente', 'aggregation': 'count_distinct'},
+    {'id': 'c4', 'source': 'ventas', 'dimension': 'familia', 'metric': '=Sum(importe) / Count(cliente)'},
+]
+
+
+@pytest.fixture
+def ventas():
+    rng = np.random.default_rng(0)
+    n = 1_000
+    return pd.DataFrame({
+        'region': rng.choice(['Norte', 'Sur', 'Este'], n),
+        'familia': rng.choice(['PVC', 'Aluminio'], n),
+        'cliente': rng.integers(0, 40, n),
+        'importe': rng.uniform(0, 100, n).round(2),
+    })
+
+
+@pytest.fixture
+def app(user, ventas):
+    app = ReportApp.objects.create(name='Ventas', created_by=user)
+    ReportSheet.objects.create(app=app, title='Resumen', layout_json=LAYOUT)
+    app_store.save_table(app.id, 'ventas', ventas)
+    return app
+
+
+def _key(chart):
+    return rollups.chart_rollup_key(chart)
+
+
+def test_chart_rollup_key():
+    assert _key(LAYOUT[0]) == ('ventas', 'region', 'importe', 'sum')
+    assert _key(LAYOUT[3])[3] == rollups.EXPRESSION_AGGREGATION
+    assert _key({'source': 'ventas', 'dimension': 'region'}) is None
+    assert _key({**LAYOUT[0], 'aggregation': 'median'}) is None
+
+
+def test_built_rollups_match_pandas(app, ventas):
+    assert rollups.sync_rollups(app) == len(LAYOUT)
+    by_region = ventas.groupby('region')
+    pd.testing.assert_series_equal(
+        rollups.lookup(app.id, _key(LAYOUT[0])).sort_index(), by_region['importe'].sum(), check_names=False,
+    )
+    pd.testing.assert_series_equal(
+        rollups.lookup(app.id, _key(LAYOUT[1])).sort_index(), by_region['importe'].mean(), check_names=False,
+    )
+    assert rollups.lookup(app.id, _key(LAYOUT[2])).sort_index().tolist() == by_region['cliente'].nunique().tolist()
+    by_familia = ventas.groupby('familia')
+    expected = by_familia['importe'].sum() / by_familia['cliente'].count()
+    np.testing.assert_allclose(rollups.lookup(app.id, _key(LAYOUT[3])).sort_index(), expected)
+
+
+def test_sync_only_builds_what_changed(app, ventas):
+    rollups.sync_rollups(app)
+    assert rollups.sync_rollups(app) == 0
+
+    # A reload makes every rollup of the table stale
+    app_store.save_table(app.id, 'ventas', ventas.head(10))
+    assert rollups.lookup(app.id, _key(LAYOUT[0])) is None
+    assert rollups.sync_rollups(app) == len(LAYOUT)
+    assert rollups.lookup(app.id, _key(LAYOUT[0])).sum() == pytest.approx(ventas.head(10)['importe'].sum())
+
+
+def test_unused_rollups_are_dropped(app):
+    rollups.sync_rollups(app)
+    files = set((app_store.app_dir(app.id) / 'rollups').glob('*.pkl'))
+    app.sheets.update(layout_json=LAYOUT[:1])
+    assert rollups.sync_rollups(app) == 0
+    assert rollups.lookup(app.id, _key(LAYOUT[1])) is None
+    assert len(set((app_store.app_dir(app.id) / 'rollups').glob('*.pkl'))) == 1 < len(files)
+
+
+def test_unusable_keys_are_skipped(app):
+    app.sheets.update(layout_json=[
+        {'source': 'ventas', 'dimension': 'region', 'metric': 'familia'},  # text metric summed
+        {'source': 'ventas', 'dimension': 'no_existe', 'metric': 'importe'},
+        {'source': 'no_cargada', 'dimension': 'region', 'metric': 'importe'},
+    ])
+    assert rollups.sync_rollups(app) == 0
+
+
+def test_aggregate_by_dimension_reports_errors_apart(ventas):
+    results, errors = rollups.aggregate_by_dimension(
+        ventas, 'region', [('importe', 'max'), ('familia', 'sum'), ('importe', 'max')],
+    )
+    assert list(results) == [('importe', 'max')]
+    assert list(errors) == [('familia', 'sum')]
+    assert results[('importe', 'max')].sort_index().tolist() == ventas.groupby('region')['importe'].max().tolist()
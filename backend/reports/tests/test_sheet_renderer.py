@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.models import ReportApp, ReportSheet
+from reports.services import app_store, rollups
+from reports.services.sheet_renderer import MAX_CHART_POINTS, plan_sheet, render_sheet
+
+pytestmark = pytest.mark.django_db
+
+LAYOUT = [
+    {'id': 'c1', 'type': 'bar', 'source': 'ventas', 'dimension': 'cliente', 'metric': 'importe'},
+    {'id': 'c2', 'type': 'pie', 'source': 'ventas', 'dimension': 'cliente', 'metric': 'importe',
+     'aggregation': 'count'},
+    {'id': 'c3', 'type': 'line', 'source': 'ventas', 'dimension': 'dia', 'metric': 'importe'},
+]
+
+
+@pytest.fixture
+def ventas():
+    rng = np.random.default_rng(0)
+    n = 2_000
+    return pd.DataFrame({
+        'cliente': rng.choice([f'C{i:02d}' for i in range(30)], n),
+        'dia': rng.integers(1, 31, n),
+        'importe': rng.uniform(0, 100, n).round(2),
+    })
+
+
+@pytest.fixture
+def sheet(user, ventas):
+    app = ReportApp.objects.create(name='Ventas', created_by=user)
+    app_store.save_table(app.id, 'ventas', ventas)
+    return ReportSheet.objects.create(app=app, title='Resumen', layout_json=LAYOUT)
+
+
+def _charts(result):
+    return {c['id']: c for c in result['charts']}
+
+
+def test_plan_groups_charts_by_source_and_dimension():
+    plan, invalid = plan_sheet(LAYOUT + [{'id': 'c4', 'source': 'ventas'}])
+    assert sorted(plan) == [('ventas', 'cliente'), ('ventas', 'dia')]
+    assert len(plan[('ventas', 'cliente')]) == 2
+    assert invalid == [{'id': 'c4', 'source': 'ventas'}]
+
+
+def test_charts_sharing_a_dimension_take_one_scan(sheet, ventas):
+    result = render_sheet(sheet)
+    assert result['stats'] == {'rollup_hits': 0, 'scans': 2, 'tables_loaded': 1}
+    charts = _charts(result)
+    assert {c['served_from'] for c in charts.values()} == {'scan'}
+
+    # Bar / pie charts keep the largest categories first
+    expected = ventas.groupby('cliente')['importe'].sum().sort_values(ascending=False).head(MAX_CHART_POINTS)
+    bar = charts['c1']['data']
+    assert bar['labels'] == expected.index.tolist()
+    assert bar['datasets'][0]['data'] == [round(v, 2) for v in expected]
+    # Line charts keep every point in dimension order
+    line = charts['c3']['data']
+    assert line['labels'] == [str(d) for d in sorted(ventas['dia'].unique())]
+
+
+def test_rollups_are_served_without_scanning(sheet):
+    scanned = render_sheet(sheet)
+    rollups.sync_rollups(sheet.app)
+    result = render_sheet(sheet)
+    assert result['stats'] == {'rollup_hits': len(LAYOUT), 'scans': 0, 'tables_loaded': 0}
+    assert [c['data'] for c in result['charts']] == [c['data'] for c in scanned['charts']]
+
+
+def test_unsaved_layout_and_chart_errors(sheet):
+    result = render_sheet(sheet, layout=[
+        {'id': 'a', 'source': 'ventas', 'dimension': 'cliente'},
+        {'id': 'b', 'source': 'ventas', 'dimension': 'cliente', 'metric': 'no_existe'},
+        {'id': 'c', 'source': 'no_cargada', 'dimension': 'cliente', 'metric': 'importe'},
+        {'id': 'd', 'source': 'ventas', 'dimension': 'dia', 'metric': 'importe', 'aggregation': 'max'},
+    ])
+    charts = _charts(result)
+    assert charts['a']['data'] is None and charts['a']['error']
+    assert 'no_existe' in charts['b']['error']
+    assert 'no_cargada' in charts['c']['error']
+    assert charts['d']['served_from'] == 'scan'
+    assert result['stats']['scans'] == 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services.sketches import DDSketch, HyperLogLog, MisraGries, TableSketch
+
+
+def _chunks(data, n):
+    size = -(-len(data) // n)
+    return [data.iloc[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('distinct', [0, 1, 100, 5_000, 200_000])
+def test_hyperloglog_error(distinct):
+    values = pd.Series(np.arange(distinct)).sample(frac=1, random_state=0)
+    hll = HyperLogLog().update(pd.concat([values, values]))
+    assert hll.estimate() == pytest.approx(distinct, rel=0.03, abs=1)
+
+
+def test_hyperloglog_merge_equals_single_pass():
+    a, b = pd.Series(np.arange(0, 60_000)), pd.Series(np.arange(40_000, 100_000))
+    merged = HyperLogLog().update(a).merge(HyperLogLog().update(b))
+    single = HyperLogLog().update(pd.concat([a, b]))
+    assert merged.estimate() == single.estimate()
+
+
+def test_ddsketch_relative_error_against_numpy():
+    signs = np.random.default_rng(1).choice([-1, 1, 0], 100_000)
+    values = np.random.default_rng(0).lognormal(3, 1.5, 100_000) * signs
+    sketch = DDSketch().update(values[:50_000]).merge(DDSketch().update(values[50_000:]))
+    for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+        exact = np.quantile(values, q, method='lower')
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02, abs=1e-9)
+    assert DDSketch().quantile(0.5) is None
+
+
+def test_misra_gries_finds_heavy_hitters():
+    rng = np.random.default_rng(2)
+    noise = rng.integers(0, 10_000, 50_000).astype(str)
+    values = pd.Series(np.concatenate([np.repeat(['PVC', 'Aluminio'], [30_000, 20_000]), noise]))
+    values = values.sample(frac=1, random_state=3)
+    gries = MisraGries(k=20)
+    for chunk in _chunks(values, 10):
+        gries.update(chunk)
+    top = gries.top(2)
+    assert [t['value'] for t in top] == ['PVC', 'Aluminio']
+    # Counts are under-estimated by at most n / (k + 1)
+    assert 30_000 - len(values) / 21 <= top[0]['count'] <= 30_000
+
+
+def test_table_sketch_exact_counters_match_pandas():
+    rng = np.random.default_rng(4)
+    df = pd.DataFrame({
+        'importe': np.where(rng.random(10_000) < 0.1, np.nan, rng.normal(100, 20, 10_000)),
+        'familia': rng.choice(['a', 'b', 'c', None], 10_000),
+    })
+    sketch = TableSketch()
+    for chunk in _chunks(df, 7):
+        sketch.update(chunk)
+    summary = sketch.summary()
+    importe, familia = summary['columns']['importe'], summary['columns']['familia']
+    assert summary['approximate'] and summary['row_count'] == len(df)
+    assert importe['null_count'] == df['importe'].isna().sum()
+    assert importe['sum'] == pytest.approx(df['importe'].sum(), abs=0.01)
+    assert (importe['min'], importe['max']) == (df['importe'].min(), df['importe'].max())
+    assert familia['null_count'] == df['familia'].isna().sum()
+    assert familia['distinct_count'] == 3
@@ -0,0 +1,118 @@
+import gc
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from reports.services import join_planner
+from reports.services.join_planner import execute_plan, execute_plan_spilled, plan_joins
+from reports.services.spill import SpilledFrame, spill_root
+
+
+@pytest.fixture
+def frames():
+    rng = np.random.default_rng(0)
+    n = 3_000
+    ventas = pd.DataFrame({
+        'pedido': np.arange(n),
+        'cod_cliente': rng.choice([f'C{i:03d}' for i in range(200)], n),
+        'importe': rng.uniform(0, 100, n),
+    })
+    clientes = pd.DataFrame({
+        'cod_cliente': np.repeat([f'C{i:03d}' for i in range(0, 250)], 2),
+        'provincia': rng.choice(['La Rioja', 'Navarra', 'Álava'], 500),
+    })
+    return {1: ventas, 2: clientes}
+
+
+@pytest.fixture
+def plan(frames):
+    return plan_joins([{'left_source': 1, 'right_source': 2, 'left_key': 'cod_cliente',
+                        'right_key': 'cod_cliente', 'how': 'inner'}], frames)
+
+
+def _spilled(*chunks):
+    spilled = SpilledFrame()
+    for chunk in chunks:
+        spilled.append(chunk)
+    return spilled
+
+
+def _scratch_dirs():
+    return list(spill_root().iterdir()) if spill_root().exists() else []
+
+
+def test_slices_give_the_rows_of_execute_plan_in_order(frames, plan, monkeypatch):
+    monkeypatch.setattr(join_planner, 'SPILL_CHUNK_ROWS', 1_000)
+    with execute_plan_spilled(plan, frames) as spilled:
+        assert len(spilled.chunks) > 3
+        assert all(c['rows'] <= 1_100 for c in spilled.chunks)
+        whole = pd.concat(list(spilled.iter_chunks()), ignore_index=True)
+        expected = execute_plan(plan, frames).reset_index(drop=True)
+        pd.testing.assert_frame_equal(whole, expected)
+        assert len(spilled) == len(expected) == 2 * len(frames[1])
+        projected = pd.concat(list(spilled.iter_chunks(['pedido'])), ignore_index=True)
+        assert projected['pedido'].tolist() == expected['pedido'].tolist()
+
+
+def test_head_reads_across_chunk_boundaries():
+    df = pd.DataFrame({'n': np.arange(25), 'txt': [f'f{i}' for i in range(25)]})
+    with _spilled(df.iloc[:10], df.iloc[10:20], df.iloc[20:]) as spilled:
+        for n in (5, 10, 15, 21, 25, 100):
+            pd.testing.assert_frame_equal(spilled.head(n), df.head(n))
+    with _spilled() as empty:
+        assert empty.head(5).empty
+
+
+def test_numeric_columns_with_integer_labels():
+    # Headerless sources have integer column labels
+    first = pd.DataFrame({0: [1, 2], 1: ['a', 'b'], 2: [1.5, 2.5]})
+    later = pd.DataFrame({0: [3], 1: ['c'], 2: ['n/d']})
+    with _spilled(first) as spilled:
+        assert spilled.numeric_columns() == {0, 2}
+    with _spilled(first, later) as spilled:
+        assert spilled.numeric_columns() == {0}
+
+
+def test_scratch_space_is_removed_on_error(frames, plan, monkeypatch):
+    calls = []
+
+    def failing(plan, part):
+        calls.append(len(part[1]))
+        if len(calls) == 3:
+            raise MemoryError
+        return execute_plan(plan, part)
+
+    monkeypatch.setattr(join_planner, 'SPILL_CHUNK_ROWS', 1_000)
+    monkeypatch.setattr(join_planner, 'execute_plan', failing)
+    with pytest.raises(MemoryError):
+        execute_plan_spilled(plan, frames)
+    assert len(calls) == 3
+    assert _scratch_dirs() == []
+
+
+def test_scratch_space_is_removed_on_garbage_collection():
+    spilled = _spilled(pd.DataFrame({'n': range(10)}))
+    directory = spilled.directory
+    assert directory.exists()
+    del spilled
+    gc.collect()
+    assert not directory.exists()
+
+
+def test_pickling_hands_the_directory_over():
+    df = pd.DataFrame({'n': range(10)})
+    sender = _spilled(df.iloc[:5], df.iloc[5:])
+    payload = pickle.dumps(sender)
+    directory = sender.directory
+    del sender
+    gc.collect()
+    assert directory.exists()  # the sending side no longer owns it
+
+    receiver = pickle.loads(payload)
+    assert receiver.directory == directory
+    pd.testing.assert_frame_equal(receiver.head(10), df)
+    del receiver
+    gc.collect()
+    assert not directory.exists()
@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from reports.services import columnar_store
+from reports.services.data_manager import QlikEngine
+from reports.services.sql_engine import MAX_RESULT_ROWS, execute_sql
+
+pytest.importorskip('duckdb')
+pytestmark = pytest.mark.django_db
+
+VENTAS = pd.DataFrame({
+    'pedido': range(1, 301),
+    'cod_cliente': [f'C{i % 12}' for i in range(300)],
+    'importe': [round(i * 1.25, 2) for i in range(300)],
+})
+CLIENTES = pd.DataFrame({'cod_cliente': [f'C{i}' for i in range(10)], 'provincia': ['La Rioja', 'Navarra'] * 5})
+
+
+def _csv(df, sep=';', decimal=','):
+    return df.to_csv(index=False, sep=sep, decimal=decimal).encode('utf-8')
+
+
+@pytest.fixture
+def sources(upload):
+    return upload('ventas.csv', _csv(VENTAS)), upload('clientes.csv', _csv(CLIENTES, sep=','))
+
+
+def _run(sql, sources, user):
+    ventas, clientes = sources
+    return QlikEngine.execute_load_script(SimpleNamespace(load_script_json={
+        'engine': 'sql',
+        'sources': [
+            {'source_id': 1, 'upload': str(ventas.id), 'alias': 'ventas'},
+            {'source_id': 2, 'upload': str(clientes.id), 'alias': 'clientes'},
+        ],
+        'sql': sql,
+    }), user)
+
+
+def test_select_over_two_uploads(sources, user):
+    result = _run(
+        'SELECT c.provincia, SUM(v.importe) AS total, COUNT(*) AS pedidos '
+        'FROM ventas v JOIN clientes c USING (cod_cliente) GROUP BY 1 ORDER BY 1;',
+        sources, user,
+    )
+    expected = VENTAS.merge(CLIENTES, on='cod_cliente').groupby('provincia')['importe'].agg(['sum', 'count'])
+    assert result['row_count'] == 2
+    assert result['columns'] == [
+        {'name': 'provincia', 'type': 'categorical'},
+        {'name': 'total', 'type': 'numeric'},
+        {'name': 'pedidos', 'type': 'numeric'},
+    ]
+    assert result['rows'] == [
+        {'provincia': p, 'total': pytest.approx(row['sum']), 'pedidos': row['count']}
+        for p, row in expected.iterrows()
+    ]
+
+
+def test_only_the_preview_rows_are_fetched(sources, user):
+    result = _run('SELECT * FROM ventas', sources, user)
+    assert result['row_count'] == len(VENTAS)
+    assert result['showing'] == len(result['rows']) == MAX_RESULT_ROWS
+
+
+def test_sources_duckdb_cannot_read_are_converted(tmp_path):
+    path = tmp_path / 'miles.csv'
+    path.write_text('pedido;importe\n1;1.234,5\n2;10,25\n', encoding='utf-8')
+    result = execute_sql('SELECT SUM(importe) AS total FROM miles', {'miles': path})
+    assert result['rows'] == [{'total': 1244.75}]
+    assert columnar_store.columnar_path(path).exists()
+
+
+@pytest.mark.parametrize('sql', [
+    'DELETE FROM ventas',
+    'CREATE TABLE copia AS SELECT * FROM ventas',
+    'SELECT 1; SELECT 2',
+    "COPY (SELECT * FROM ventas) TO '/tmp/fuera.csv'",
+    'SET enable_external_access = true',
+    'SELEC 1',
+    '  ',
+])
+def test_only_one_select_statement_is_run(sources, user, sql):
+    with pytest.raises(ValueError):
+        _run(sql, sources, user)
+
+
+@pytest.mark.parametrize('scan', [
+    "read_csv('/etc/passwd')", "read_csv('{other}')", "read_text('{other}')", "read_parquet('{parquet}')",
+])
+def test_files_outside_the_sources_cannot_be_read(sources, user, tmp_path, scan):
+    other = tmp_path / 'otro.csv'
+    other.write_text('secreto\n42\n', encoding='utf-8')
+    parquet = tmp_path / 'otro.parquet'
+    CLIENTES.to_parquet(parquet)
+    with pytest.raises(ValueError, match='Error en la consulta SQL'):
+        _run(f'SELECT * FROM {scan.format(other=other, parquet=parquet)}', sources, user)
+
+
+def test_invalid_alias(tmp_path):
+    with pytest.raises(ValueError):
+        execute_sql('SELECT 1', {'ventas; DROP': tmp_path / 'x.csv'})
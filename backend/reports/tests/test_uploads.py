@@ -0,0 +1,152 @@
+import base64
+import hashlib
+from pathlib import Path
+
+import pytest
+
+from reports.models import UploadSession
+
+pytestmark = pytest.mark.django_db
+
+CSV = ('fecha;cliente;importe\n' + ''.join(f'2024-01-{i % 28 + 1:02d};C{i % 9};{i},5\n' for i in range(2_000))).encode()
+
+
+def _create(api, data=CSV, name='ventas.csv'):
+    response = api.post(
+        '/api/reports/uploads/', HTTP_TUS_RESUMABLE='1.0.0', HTTP_UPLOAD_LENGTH=str(len(data)),
+        HTTP_UPLOAD_METADATA=f'filename {base64.b64encode(name.encode()).decode()}',
+    )
+    assert response.status_code == 201, response.content
+    return response['Location']
+
+
+def _patch(api, url, chunk, offset, content_type='application/offset+octet-stream'):
+    return api.generic('PATCH', url, chunk, content_type=content_type, HTTP_UPLOAD_OFFSET=str(offset))
+
+
+def test_chunked_upload_with_resume(api):
+    url = _create(api)
+    first = _patch(api, url, CSV[:10_000], 0)
+    assert first.status_code == 204 and first['Upload-Offset'] == '10000'
+    # A retry of the same chunk at the old offset conflicts
+    assert _patch(api, url, CSV[:10_000], 0).status_code == 409
+    assert api.head(url)['Upload-Offset'] == '10000'
+
+    last = _patch(api, url, CSV[10_000:], 10_000)
+    assert last.status_code == 204 and last['Upload-Offset'] == str(len(CSV))
+
+    session = UploadSession.objects.get()
+    assert session.status == 'complete'
+    assert session.sha256 == hashlib.sha256(CSV).hexdigest()
+    assert open(session.file.path, 'rb').read() == CSV
+    assert session.dialect['sep'] == ';' and session.dialect['decimal'] == ','
+    assert session.profile['rows'] == 2_000
+
+
+def test_completed_uploads_are_converted_without_auto_convert(api, settings):
+    pytest.importorskip('pyarrow')
+    from reports.services import columnar_store
+
+    assert settings.COLUMNAR_AUTO_CONVERT is False
+    url = _create(api)
+    _patch(api, url, CSV, 0)
+    path = UploadSession.objects.get().file.path
+    assert columnar_store.column_stats(path)['rows'] == 2_000
+
+
+def test_concurrent_patches_of_one_upload_conflict(api):
+    import fcntl
+    import io
+
+    from reports.services import uploads
+
+    url = _create(api)
+    session = UploadSession.objects.get()
+    stale = UploadSession.objects.get()
+    with open(session.file.path, 'rb') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)  # another request is writing
+        assert _patch(api, url, CSV[:100], 0).status_code == 409
+    assert _patch(api, url, CSV[:100], 0).status_code == 204
+
+    # A request that loaded the session before that chunk landed re-checks the offset
+    with pytest.raises(uploads.UploadConflict):
+        uploads.append_chunk(stale, io.BytesIO(CSV[:100]), 0)
+    assert open(session.file.path, 'rb').read() == CSV[:100]
+
+
+def test_excel_uploads_are_profiled_after_the_last_chunk(api, tmp_path, monkeypatch):
+    from openpyxl import Workbook
+
+    from reports.services import uploads
+
+    wb = Workbook()
+    wb.active.append(['cliente', 'importe'])
+    for i in range(30):
+        wb.active.append([f'C{i % 4}', i * 1.5])
+    wb.save(tmp_path / 'ventas.xlsx')
+    data = (tmp_path / 'ventas.xlsx').read_bytes()
+
+    queued = []
+    monkeypatch.setattr(uploads, '_run_in_background', lambda func, *args: queued.append((func, args)))
+    _patch(api, _create(api, data, 'ventas.xlsx'), data, 0)
+    session = UploadSession.objects.get()
+    assert session.status == 'complete' and session.profile is None
+
+    for func, args in queued:
+        func(*args)
+    session.refresh_from_db()
+    assert session.profile['rows'] == 30
+
+
+def test_running_hashes_of_abandoned_uploads_are_dropped(api, monkeypatch):
+    from reports.services import uploads
+
+    monkeypatch.setattr(uploads, 'MAX_HASHERS', 2)
+    monkeypatch.setattr(uploads, '_hashers', type(uploads._hashers)())
+    urls = [_create(api, name=f'ventas_{i}.csv') for i in range(3)]
+    for url in urls:
+        _patch(api, url, CSV[:1_000], 0)
+    ids = [str(s.id) for s in UploadSession.objects.order_by('created_at')]
+    assert [str(i) for i in uploads._hashers] == ids[1:]
+
+    # Idle ones go on the next chunk of any upload
+    monkeypatch.setattr(uploads, 'HASHER_IDLE_SECONDS', 0)
+    _patch(api, urls[1], CSV[1_000:2_000], 1_000)
+    assert [str(i) for i in uploads._hashers] == ids[1:2]
+
+    # An evicted hash is caught up from disk
+    assert _patch(api, urls[0], CSV[1_000:], 1_000).status_code == 204
+    assert UploadSession.objects.get(pk=ids[0]).sha256 == hashlib.sha256(CSV).hexdigest()
+    assert not uploads._hashers  # the idle one evicted, the completed one released
+
+
+def test_wrong_content_type_and_missing_offset(api):
+    url = _create(api)
+    assert _patch(api, url, CSV, 0, content_type='application/octet-stream').status_code == 415
+    response = api.generic('PATCH', url, CSV, content_type='application/offset+octet-stream')
+    assert response.status_code == 400
+
+
+def test_validation(api):
+    assert api.post('/api/reports/uploads/', {'filename': 'x.exe', 'size': 10}, format='json').status_code == 422
+    assert api.post('/api/reports/uploads/', {'filename': 'x.csv', 'size': 0}, format='json').status_code == 422
+
+
+def test_other_users_cannot_see_or_delete_an_upload(api, django_user_model):
+    from rest_framework.test import APIClient
+
+    url = _create(api)
+    other = APIClient()
+    other.force_authenticate(django_user_model.objects.create_user(
+        empleado_id='EMP002', username='luis', email='luis@example.com', password='x',
+    ))
+    assert other.head(url).status_code == 404
+    assert other.delete(url).status_code == 404
+
+
+def test_delete_removes_the_file(api):
+    url = _create(api)
+    session = UploadSession.objects.get()
+    assert api.delete(url).status_code == 204
+    assert not UploadSession.objects.exists()
+    assert not Path(session.file.path).exists()
@@ -2,9 +2,11 @@
 from django.urls import path
 from .views import (
     DBConnectionListCreateView, DBConnectionDetailView, DBConnectionTestView,
-    ReportAppListCreateView, ReportAppDetailView, ReportAppExecuteView,
+    ReportAppListCreateView, ReportAppDetailView, ReportAppExecuteView, ReportAppPivotView,
+    ReportAppFieldValuesView, ReportAppProfileView,
     AppLoadScriptCreateView, AppLoadScriptDetailView,
-    ReportSheetCreateView, ReportSheetDetailView,
+    ReportSheetCreateView, ReportSheetDetailView, ReportSheetRenderView,
+    UploadCreateView, UploadDetailView,
 )
 
 urlpatterns = [
@@ -17,6 +19,9 @@ urlpatterns = [
     path('apps/', ReportAppListCreateView.as_view()),
     path('apps/<int:pk>/', ReportAppDetailView.as_view()),
     path('apps/<int:pk>/execute/', ReportAppExecuteView.as_view()),
+    path('apps/<int:pk>/pivot/', ReportAppPivotView.as_view()),
+    path('apps/<int:pk>/values/', ReportAppFieldValuesView.as_view()),
+    path('apps/<int:pk>/profile/', ReportAppProfileView.as_view()),
 
     # Load Scripts (belong to an app)
     path('scripts/', AppLoadScriptCreateView.as_view()),
@@ -25,4 +30,9 @@ urlpatterns = [
     # Sheets (belong to an app)
     path('sheets/', ReportSheetCreateView.as_view()),
     path('sheets/<int:pk>/', ReportSheetDetailView.as_view()),
+    path('sheets/<int:pk>/render/', ReportSheetRenderView.as_view()),
+
+    # Resumable uploads (tus 1.0)
+    path('uploads/', UploadCreateView.as_view()),
+    path('uploads/<uuid:pk>/', UploadDetailView.as_view()),
 ]
@@ -7,29 +7,52 @@ DBConnection:   /api/reports/connections/              (GET, POST)
 ReportApp:      /api/reports/apps/                     (GET, POST)
                 /api/reports/apps/<id>/                (GET, PUT, DELETE)
                 /api/reports/apps/<id>/execute/         (POST — run all scripts)
+                /api/reports/apps/<id>/pivot/           (POST — pivot table page)
+                /api/reports/apps/<id>/values/          (GET — distinct values of a field)
+                /api/reports/apps/<id>/profile/         (GET — column profile of a table)
 AppLoadScript:  /api/reports/scripts/                   (POST create)
                 /api/reports/scripts/<id>/              (GET, PUT, DELETE)
 ReportSheet:    /api/reports/sheets/                    (POST create)
                 /api/reports/sheets/<id>/               (GET, PUT, DELETE)
+                /api/reports/sheets/<id>/render/        (GET saved layout, POST unsaved layout)
+UploadSession:  /api/reports/uploads/                   (POST create, OPTIONS — tus 1.0)
+                /api/reports/uploads/<uuid>/            (HEAD offset, PATCH chunk, GET, DELETE)
 """
+import base64
+import binascii
 import logging
 
+from django.conf import settings
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 
-from .models import DBConnection, ReportApp, AppLoadScript, ReportSheet
+from .models import DBConnection, ReportApp, AppLoadScript, ReportSheet, UploadSession
 from .serializers import (
     DBConnectionSerializer, DBConnectionListSerializer,
     ReportAppDetailSerializer, ReportAppListSerializer, ReportAppCreateSerializer,
-    AppLoadScriptSerializer, ReportSheetSerializer,
+    AppLoadScriptSerializer, ReportSheetSerializer, UploadSessionSerializer,
 )
 from .services.query_engine import test_connection, execute_app_data_load
+from .services import app_store, rollups
+from .services.sheet_renderer import render_sheet
+from .services.pivot_engine import pivot_app_table
+from .services.field_index import search_values
+from .services.profiler import get_table_profile
+from .services import uploads
 
 logger = logging.getLogger(__name__)
 
 
+def _sync_rollups(app):
+    """Keep precomputed rollups in line with the app's sheet layouts (never fails the request)."""
+    try:
+        rollups.sync_rollups(app)
+    except Exception as e:
+        logger.warning(f'[BI] Rollup sync failed for app {app.id}: {e}')
+
+
 # ─── DBConnection ───
 
 class DBConnectionListCreateView(APIView):
@@ -128,6 +151,7 @@ class ReportAppDetailView(APIView):
         except ReportApp.DoesNotExist:
             return Response({'detail': 'App no encontrada.'}, status=404)
         app.delete()
+        app_store.drop_app(pk)
         return Response({'detail': 'App eliminada.'})
 
 
@@ -150,6 +174,64 @@ class ReportAppExecuteView(APIView):
             return Response({'detail': str(e)}, status=500)
 
 
+class ReportAppPivotView(APIView):
+    """POST — One page of a pivot table over a loaded table of the app."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, pk):
+        if not ReportApp.objects.filter(pk=pk).exists():
+            return Response({'detail': 'App no encontrada.'}, status=404)
+        try:
+            return Response(pivot_app_table(pk, request.data))
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=422)
+        except Exception as e:
+            logger.error(f'[BI] Pivot error on app {pk}: {e}')
+            return Response({'detail': str(e)}, status=500)
+
+
+class ReportAppFieldValuesView(APIView):
+    """
+    GET — Distinct values of a field for filter dropdowns.
+    ?source=<table>&field=<col>&q=<text>&mode=prefix|contains&order=value|count&offset=0&limit=50
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        if not ReportApp.objects.filter(pk=pk).exists():
+            return Response({'detail': 'App no encontrada.'}, status=404)
+        p = request.query_params
+        if not p.get('source') or not p.get('field'):
+            return Response({'detail': 'Los parámetros "source" y "field" son obligatorios.'}, status=400)
+        try:
+            return Response(search_values(
+                pk, p['source'], p['field'],
+                query=p.get('q', ''), mode=p.get('mode', 'prefix'), order=p.get('order', 'value'),
+                offset=p.get('offset', 0), limit=p.get('limit', 50),
+            ))
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=422)
+
+
+class ReportAppProfileView(APIView):
+    """
+    GET — Column profile of a loaded table (nulls, distinct, quantiles, histograms, top values).
+    ?source=<table>
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, pk):
+        if not ReportApp.objects.filter(pk=pk).exists():
+            return Response({'detail': 'App no encontrada.'}, status=404)
+        source = request.query_params.get('source')
+        if not source:
+            return Response({'detail': 'El parámetro "source" es obligatorio.'}, status=400)
+        try:
+            return Response(get_table_profile(pk, source))
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=422)
+
+
 # ─── AppLoadScript ───
 
 class AppLoadScriptCreateView(APIView):
@@ -199,7 +281,8 @@ class ReportSheetCreateView(APIView):
     def post(self, request):
         s = ReportSheetSerializer(data=request.data)
         s.is_valid(raise_exception=True)
-        s.save()
+        sheet = s.save()
+        _sync_rollups(sheet.app)
         return Response(s.data, status=status.HTTP_201_CREATED)
 
 
@@ -221,6 +304,8 @@ class ReportSheetDetailView(APIView):
         s = ReportSheetSerializer(sh, data=request.data, partial=True)
         s.is_valid(raise_exception=True)
         s.save()
+        if 'layout_json' in request.data:
+            _sync_rollups(sh.app)
         return Response(s.data)
 
     def delete(self, request, pk):
@@ -228,5 +313,135 @@ class ReportSheetDetailView(APIView):
             sh = ReportSheet.objects.get(pk=pk)
         except ReportSheet.DoesNotExist:
             return Response({'detail': 'Hoja no encontrada.'}, status=404)
+        app = sh.app
         sh.delete()
+        _sync_rollups(app)
         return Response({'detail': 'Hoja eliminada.'})
+
+
+class ReportSheetRenderView(APIView):
+    """
+    Render all charts of a sheet server-side in one response.
+    GET renders the saved layout; POST {layout_json} renders an unsaved one.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _render(self, pk, layout=None):
+        try:
+            sh = ReportSheet.objects.get(pk=pk)
+        except ReportSheet.DoesNotExist:
+            return Response({'detail': 'Hoja no encontrada.'}, status=404)
+        if layout is not None and not isinstance(layout, list):
+            return Response({'detail': '"layout_json" debe ser una lista.'}, status=400)
+        try:
+            return Response(render_sheet(sh, layout))
+        except Exception as e:
+            logger.error(f'[BI] Sheet {pk} render error: {e}')
+            return Response({'detail': str(e)}, status=500)
+
+    def get(self, request, pk):
+        return self._render(pk)
+
+    def post(self, request, pk):
+        return self._render(pk, request.data.get('layout_json'))
+
+
+# ─── Resumable uploads (tus) ───
+
+def _tus_headers(response, **headers):
+    response['Tus-Resumable'] = uploads.TUS_VERSION
+    for name, value in headers.items():
+        response[name.replace('_', '-')] = str(value)
+    return response
+
+
+def _upload_metadata(header):
+    """Upload-Metadata header ('key base64value, ...') as a dict."""
+    metadata = {}
+    for pair in filter(None, (p.strip() for p in (header or '').split(','))):
+        key, _, value = pair.partition(' ')
+        try:
+            metadata[key] = base64.b64decode(value).decode('utf-8') if value else ''
+        except (binascii.Error, UnicodeDecodeError):
+            raise ValueError(f'Upload-Metadata inválido en "{key}".')
+    return metadata
+
+
+class UploadCreateView(APIView):
+    """
+    POST with Upload-Length and Upload-Metadata (filename) headers creates an
+    upload and returns its URL in Location. JSON {filename, size} also works.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def options(self, request):
+        return _tus_headers(
+            Response(status=204),
+            Tus_Version=uploads.TUS_VERSION, Tus_Extension=uploads.TUS_EXTENSIONS,
+            Tus_Max_Size=settings.RESUMABLE_UPLOAD_MAX_BYTES,
+        )
+
+    def post(self, request):
+        try:
+            metadata = _upload_metadata(request.headers.get('Upload-Metadata'))
+            filename = metadata.get('filename') or request.data.get('filename')
+            size = int(request.headers.get('Upload-Length') or request.data.get('size') or 0)
+            session = uploads.create_upload(request.user, filename, size)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=422)
+        response = Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+        return _tus_headers(response, Location=request.build_absolute_uri(f'{session.id}/'))
+
+
+class UploadDetailView(APIView):
+    """
+    HEAD → Upload-Offset to resume from; PATCH (application/offset+octet-stream)
+    appends a chunk at Upload-Offset; GET → status, dialect and profile; DELETE.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def _get(self, request, pk):
+        return UploadSession.objects.filter(pk=pk, created_by=request.user).first()
+
+    def options(self, request, pk):
+        return UploadCreateView().options(request)
+
+    def head(self, request, pk):
+        session = self._get(request, pk)
+        if session is None:
+            return Response({'detail': 'Subida no encontrada.'}, status=404)
+        return _tus_headers(
+            Response(status=200),
+            Upload_Offset=session.offset, Upload_Length=session.size, Cache_Control='no-store',
+        )
+
+    def patch(self, request, pk):
+        session = self._get(request, pk)
+        if session is None:
+            return Response({'detail': 'Subida no encontrada.'}, status=404)
+        if request.content_type != 'application/offset+octet-stream':
+            return Response({'detail': 'Content-Type debe ser application/offset+octet-stream.'}, status=415)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return Response({'detail': 'Falta la cabecera Upload-Offset.'}, status=400)
+        try:
+            session = uploads.append_chunk(session, request.stream, offset)
+        except uploads.UploadConflict as e:
+            return Response({'detail': str(e)}, status=409)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=422)
+        return _tus_headers(Response(status=204), Upload_Offset=session.offset)
+
+    def get(self, request, pk):
+        session = self._get(request, pk)
+        if session is None:
+            return Response({'detail': 'Subida no encontrada.'}, status=404)
+        return Response(UploadSessionSerializer(session).data)
+
+    def delete(self, request, pk):
+        session = self._get(request, pk)
+        if session is None:
+            return Response({'detail': 'Subida no encontrada.'}, status=404)
+        uploads.delete_upload(session)
+        return _tus_headers(Response(status=204))